@@ -1,39 +1,119 @@
-import os 
-from pathlib import Path
-import sys
-
-
-def findfile(name, path):
-    _li_file_path = []
-    for (dirpath, dir, files) in os.walk(path):
-        for filename in files:
-            if name in filename:
-                _li_file_path.append(dirpath)
-
-    return _li_file_path
-
-if sys.platform.startswith('win32'):
-  li_file_path = findfile("Rscript", "C:/") + findfile("Rscript", "D:/") 
-
-  for i in range(len(li_file_path)):
-    try:
-      file_path = li_file_path[i]
-      file_path = file_path.replace('/', '\\')
-      path_dir = os.path.dirname(os.path.abspath(__file__))
-      os.system('"'+ os.path.join(file_path, "Rscript") + '"' + ' ' + os.path.join(path_dir, "input\haploR.R"))
-      
-    except:
-      print("There's a problem")
-
-
-else:
-  li_file_path = findfile("Rscript", "/")
-
-  for i in range(len(li_file_path)):
-    try:
-      file_path = li_file_path[i]
-      path_dir = os.path.dirname(os.path.abspath(__file__))
-      os.system('"'+ os.path.join(file_path, "Rscript") + '"' + ' ' + os.path.join(path_dir, "input/haploR.R"))
-      
-    except:
-      print("There's a problem")
\ No newline at end of file
+import os
+from pathlib import Path
+import sys
+import argparse
+import shutil
+import subprocess
+
+# RSCRIPT_ENV : Environment variable of the path of Rscript
+RSCRIPT_ENV = 'BETA_META_RSCRIPT'
+
+# Rscript (Rscript.exe on Windows)
+RSCRIPT_NAME = 'Rscript.exe' if sys.platform.startswith('win32') else 'Rscript'
+
+path_dir = os.path.dirname(os.path.abspath(__file__))
+
+# path_rscript_cache : Last path of Rscript which ran haploR.R successfully
+path_rscript_cache = os.path.join(path_dir, '.rscript_path')
+
+
+def findfile(name, path):
+    """
+    Walk the directory tree from path and return the path of the first executable file whose name includes name (None if none)
+    """
+    for (dirpath, dir, files) in os.walk(path):
+        for filename in files:
+            if (name in filename) and IsExecutable(os.path.join(dirpath, filename)):
+                return os.path.join(dirpath, filename)
+
+    return None
+
+def IsExecutable(path_rscript):
+    return (path_rscript is not None) and os.path.isfile(path_rscript) and os.access(path_rscript, os.X_OK)
+
+def ReadRscriptCache():
+    try:
+        with open(path_rscript_cache) as fp:
+            return fp.read().strip() or None
+
+    except OSError:
+        return None
+
+def WriteRscriptCache(path_rscript):
+    try:
+        with open(path_rscript_cache, 'w') as fp:
+            fp.write(path_rscript)
+
+    except OSError:
+        print(f"The path of Rscript is not cached ({path_rscript_cache} is not writable)")
+
+def FindRscript(path_option=None, search_filesystem=False):
+    """
+    Find Rscript in the order of the option, the environment variable, PATH, the cache of the last successful run & (optionally) the file system
+
+        Args:
+            path_option (str): Path of Rscript given as an option (None: not given)
+            search_filesystem (bool): Walk the whole file system (C:/ & D:/ on Windows, / otherwise) as the last resort - it can take minutes
+
+        Returns:
+            path_rscript (str): Path of Rscript (None if not found)
+    """
+    for path_rscript in [path_option, os.environ.get(RSCRIPT_ENV)]:
+        if path_rscript:
+            # The explicit path is used as given - a wrong path stops the run instead of falling back to another Rscript.
+            if not IsExecutable(path_rscript):
+                sys.exit(f"Rscript is not found at {path_rscript}")
+
+            return path_rscript
+
+    path_rscript = shutil.which('Rscript')
+
+    if path_rscript is not None:
+        return path_rscript
+
+    path_rscript = ReadRscriptCache()
+
+    if IsExecutable(path_rscript):
+        return path_rscript
+
+    if search_filesystem:
+        li_root = ["C:/", "D:/"] if sys.platform.startswith('win32') else ["/"]
+
+        for root in li_root:
+            path_rscript = findfile(RSCRIPT_NAME, root)
+
+            if path_rscript is not None:
+                return path_rscript
+
+    return None
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Beta_Meta_LD: run input/haploR.R with Rscript')
+  parser.add_argument('--rscript', dest='path_rscript', default=None,
+                      help=f'Path of Rscript (default: ${RSCRIPT_ENV}, PATH, then the path of the last successful run)')
+  parser.add_argument('--search-filesystem', dest='search_filesystem', action='store_true',
+                      help='Walk the whole file system for Rscript if it is not found otherwise (slow)')
+  args = parser.parse_args()
+
+  path_rscript = FindRscript(args.path_rscript, args.search_filesystem)
+
+  if path_rscript is None:
+    sys.exit(f"Rscript is not found - install R, add it to PATH, or use --rscript, ${RSCRIPT_ENV} or --search-filesystem")
+
+  try:
+    # haploR.R is run once with the arguments as a list (no shell quoting of the paths)
+    returncode = subprocess.run([path_rscript, os.path.join(path_dir, "input", "haploR.R")]).returncode
+
+  except OSError as e:
+    print(str(e))
+    print("There's a problem")
+    sys.exit(1)
+
+  if returncode == 0:
+    WriteRscriptCache(os.path.abspath(path_rscript))
+
+  else:
+    print("There's a problem")
+
+  sys.exit(returncode)
@@ -0,0 +1,309 @@
+import os, datetime
+import argparse
+import io
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+
+#-------------------------------------------------------
+# Common Function
+#-------------------------------------------------------
+def WriteLog(functionname, msg, type='INFO', fplog=None):
+    head = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    writestr = f"[{head}][{functionname}] {msg}\n"
+    if( True ):
+        writestr = f"[{functionname}] {msg}\n"
+        print(writestr)
+
+    if( fplog != None ):
+        fplog.write(writestr)
+        fplog.flush()
+
+# HAPLOREG_URL : HaploReg v4.1 form queried by queryHaploreg of haploR
+HAPLOREG_URL = "https://pubs.broadinstitute.org/mammals/haploreg/haploreg.php"
+
+# li_LD_POPULATION : Populations of the LD of HaploReg (1000 Genomes Phase 1)
+li_LD_POPULATION = ['AFR', 'AMR', 'ASN', 'EUR']
+
+def QueryHaploreg(li_rsid, ld_thresh=1, ld_pop='ASN', url=HAPLOREG_URL, timeout=300):
+    """
+    Query the SNPs in LD with each rsID in one request, with the parameters of queryHaploreg of haploR
+
+        Args:
+            li_rsid (list): Query rsIDs
+            ld_thresh (float): Minimum r^2 of the SNPs in LD (ldThresh)
+            ld_pop (str): Population of the LD (ldPop, See li_LD_POPULATION)
+            url (str): URL of the HaploReg form
+            timeout (float): Timeout of the request in seconds
+
+        Returns:
+            dict_partner (dict): rsIDs in LD (in the order of the response) of each query rsID - empty for the rsIDs unknown to HaploReg
+    """
+    data = urllib.parse.urlencode({'query': ','.join(li_rsid), 'gwas_idx': 0, 'gene': '', 'ldThresh': f"{ld_thresh:g}", 'ldPop': ld_pop,
+                                   'epi': 'vanilla', 'cons': 'siphy', 'genetypes': 'gencode', 'output': 'text'}).encode()
+
+    with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=timeout) as response:
+        text = response.read().decode('utf-8', errors='replace')
+
+    dict_partner = {rsid: [] for rsid in li_rsid}
+
+    if text.strip() == '':
+        return dict_partner
+
+    df_ld = pd.read_csv(io.StringIO(text), sep='\t', dtype='str', usecols=['rsID', 'query_snp_rsid'])
+
+    for rsid, df_query in df_ld.groupby('query_snp_rsid', sort=False):
+        if rsid in dict_partner:
+            dict_partner[rsid] = df_query['rsID'].tolist()
+
+    return dict_partner
+
+###################################
+# Query Runner
+###################################
+
+class RateLimiter:
+    def __init__(self, rate=None):
+        """
+        Initializes a RateLimiter object - the requests of all threads start at least 1/rate seconds apart
+
+        Args:
+        rate (float): Maximum number of requests per second (None: unlimited)
+        """
+        self.interval = 0.0 if rate is None else 1.0 / rate
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def Wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start_time = max(now, self.next_time)
+            self.next_time = start_time + self.interval
+
+        time.sleep(max(0.0, start_time - now))
+
+def IsRetryable(e):
+    """
+    The connection errors, the timeouts, the server errors (5xx) & 429 (Too Many Requests) are retried, the other HTTP errors are not
+    """
+    if isinstance(e, urllib.error.HTTPError):
+        return (e.code >= 500) or (e.code == 429)
+
+    return isinstance(e, OSError)
+
+def QueryHaploregRetry(li_rsid, ld_thresh, ld_pop, url, rate_limiter, n_retry=5, backoff=1.0):
+    """
+    QueryHaploreg with the rate limit & up to n_retry retries - waits backoff * 2^attempt seconds (with a random jitter) before each retry
+    """
+    for attempt in range(n_retry + 1):
+        rate_limiter.Wait()
+
+        try:
+            return QueryHaploreg(li_rsid, ld_thresh, ld_pop, url)
+
+        except Exception as e:
+            if (attempt == n_retry) or (not IsRetryable(e)):
+                raise
+
+            time.sleep(backoff * 2**attempt * (1 + random.random()))
+
+###################################
+# LD Store
+###################################
+
+class LDStore:
+    def __init__(self, path):
+        """
+        Initializes a LDStore object - SQLite store of the SNPs in LD keyed by (rsID, LD threshold, population)
+
+        Args:
+        path (str): Path of the SQLite file (created if it does not exist)
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS ld (
+                                 rsid TEXT NOT NULL, ld_thresh REAL NOT NULL, ld_pop TEXT NOT NULL, partner TEXT NOT NULL,
+                                 updated TEXT NOT NULL, PRIMARY KEY (rsid, ld_thresh, ld_pop)) WITHOUT ROWID""")
+        self.conn.commit()
+
+    def Get(self, li_rsid, ld_thresh, ld_pop):
+        """
+        Look up the rsIDs in the store
+
+            Args:
+                li_rsid (list): Query rsIDs
+                ld_thresh (float): Minimum r^2 of the SNPs in LD
+                ld_pop (str): Population of the LD
+
+            Returns:
+                dict_partner (dict): rsIDs in LD of each stored query rsID (the others are missing)
+        """
+        dict_partner = {}
+        li_rsid = list(dict.fromkeys(li_rsid))
+
+        # The number of the SQL variables is limited (999 in old SQLite).
+        for start in range(0, len(li_rsid), 900):
+            li_batch = li_rsid[start:start + 900]
+            cursor = self.conn.execute(f"SELECT rsid, partner FROM ld WHERE ld_thresh = ? AND ld_pop = ? AND rsid IN ({','.join('?'*len(li_batch))})",
+                                       [float(ld_thresh), ld_pop] + li_batch)
+            dict_partner.update((rsid, json.loads(partner)) for rsid, partner in cursor)
+
+        return dict_partner
+
+    def Put(self, dict_partner, ld_thresh, ld_pop):
+        """
+        Store the rsIDs in LD of each query rsID in one transaction
+        """
+        updated = datetime.datetime.now().isoformat(timespec='seconds')
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO ld VALUES (?, ?, ?, ?, ?)",
+                                  [(rsid, float(ld_thresh), ld_pop, json.dumps(li_partner), updated) for rsid, li_partner in dict_partner.items()])
+
+    def Close(self):
+        self.conn.close()
+
+def LookupLD(store, li_rsid, ld_thresh=1, ld_pop='ASN', batch_size=100, offline=False, url=HAPLOREG_URL, 
+             n_worker=4, rate=2.0, n_retry=5, backoff=1.0, fplog=None):
+    """
+    Look up the SNPs in LD with each rsID - from the store, querying HaploReg only for the missing rsIDs in batches of batch_size
+    
+    The batches are queried by n_worker threads with the rate limit & the retries (See QueryHaploregRetry). Each batch is stored 
+    as soon as it is resolved, so the store is the checkpoint of an interrupted run - the next run queries the remaining rsIDs only.
+
+        Args:
+            store (LDStore): LD store
+            li_rsid (list): Query rsIDs
+            ld_thresh (float): Minimum r^2 of the SNPs in LD
+            ld_pop (str): Population of the LD
+            batch_size (int): Number of rsIDs of each HaploReg request
+            offline (bool): Serve the store only (the missing rsIDs are not resolved)
+            url (str): URL of the HaploReg form
+            n_worker (int): Number of concurrent requests
+            rate (float): Maximum number of requests per second (None: unlimited)
+            n_retry (int): Number of retries of a failed request
+            backoff (float): Wait before the first retry in seconds (doubled at each retry)
+            fplog: Log file object (None: print only)
+
+        Returns:
+            dict_partner (dict): rsIDs in LD of each resolved query rsID
+            li_missing (list): Query rsIDs which are not resolved (offline or failed requests)
+    """
+    myNAME = sys._getframe().f_code.co_name
+    li_rsid = list(dict.fromkeys(li_rsid))
+    dict_partner = store.Get(li_rsid, ld_thresh, ld_pop)
+    li_missing = [rsid for rsid in li_rsid if rsid not in dict_partner]
+    WriteLog(myNAME, f"{len(dict_partner)} of {len(li_rsid)} rsIDs are in the store", type='INFO', fplog=fplog)
+
+    if offline or (len(li_missing) == 0):
+        return dict_partner, li_missing
+
+    li_failed = []
+    li_batch = [li_missing[start:start + batch_size] for start in range(0, len(li_missing), batch_size)]
+    rate_limiter = RateLimiter(rate)
+    executor = ThreadPoolExecutor(max_workers=max(1, n_worker))
+
+    try:
+        dict_future = {executor.submit(QueryHaploregRetry, batch, ld_thresh, ld_pop, url, rate_limiter, n_retry, backoff): batch for batch in li_batch}
+
+        # The store is written from this thread only (a SQLite connection is not shared between threads).
+        for i, future in enumerate(as_completed(dict_future), start=1):
+            batch = dict_future[future]
+
+            try:
+                dict_batch = future.result()
+
+            except Exception as e:
+                # The failed batch is not stored, so it is queried again in the next run.
+                WriteLog(myNAME, f"HaploReg request of {len(batch)} rsIDs failed ({e})", type='WARNING', fplog=fplog)
+                li_failed.extend(batch)
+                continue
+
+            store.Put(dict_batch, ld_thresh, ld_pop)
+            dict_partner.update(dict_batch)
+
+            if (i % 100 == 0) or (i == len(li_batch)):
+                WriteLog(myNAME, f"{i} of {len(li_batch)} batches are done", type='INFO', fplog=fplog)
+
+    finally:
+        # An interrupted run keeps the stored batches & cancels the others.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return dict_partner, li_failed
+
+def WriteCorrelatedFile(path_output_dir, rsid, li_partner):
+    """
+    Write output/correlated_with_{rsID}.txt in the format of write.table of haploR.R (the rsID column with the row numbers)
+    """
+    with open(os.path.join(path_output_dir, f"correlated_with_{rsid}.txt"), 'w', newline='\n') as fp:
+        fp.write("rsID\n")
+        fp.writelines(f"{i}\t{partner}\n" for i, partner in enumerate(li_partner, start=1))
+
+def ReadInputSNP(path_input):
+    """
+    Read the rsIDs of input_SNPs.txt (one per line, the empty lines are skipped)
+    """
+    with open(path_input) as fp:
+        return [line.strip() for line in fp if line.strip() != '']
+
+####################################
+# main
+####################################
+if __name__ == '__main__':
+    path_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Beta_Meta_LD: SNPs in LD with input/input_SNPs.txt from HaploReg with a persistent local store')
+    parser.add_argument('--input', dest='path_input', default=os.path.join(path_dir, 'input', 'input_SNPs.txt'),
+                        help='File of the query rsIDs, one per line (default: input/input_SNPs.txt)')
+    parser.add_argument('--output-dir', dest='path_output_dir', default=os.path.join(path_dir, 'output'),
+                        help='Directory of the correlated_with_{rsID}.txt files (default: output/)')
+    parser.add_argument('--store', dest='path_store', default=os.path.join(path_dir, 'output', 'ld_store.sqlite'),
+                        help='SQLite store of the resolved rsIDs (default: output/ld_store.sqlite)')
+    parser.add_argument('--ld-thresh', dest='ld_thresh', type=float, default=1,
+                        help='Minimum r^2 of the SNPs in LD - ldThresh of queryHaploreg (default: 1)')
+    parser.add_argument('--ld-pop', dest='ld_pop', choices=li_LD_POPULATION, default='ASN',
+                        help='Population of the LD - ldPop of queryHaploreg (default: ASN)')
+    parser.add_argument('--batch-size', dest='batch_size', type=int, default=100,
+                        help='Number of rsIDs of each HaploReg request (default: 100)')
+    parser.add_argument('--workers', dest='n_worker', type=int, default=4,
+                        help='Number of concurrent HaploReg requests (default: 4)')
+    parser.add_argument('--rate', dest='rate', type=float, default=2.0,
+                        help='Maximum number of HaploReg requests per second (default: 2)')
+    parser.add_argument('--retries', dest='n_retry', type=int, default=5,
+                        help='Number of retries of a failed request, with an exponential backoff (default: 5)')
+    parser.add_argument('--backoff', dest='backoff', type=float, default=1.0,
+                        help='Wait before the first retry in seconds, doubled at each retry (default: 1)')
+    parser.add_argument('--offline', dest='offline', action='store_true',
+                        help='Serve the store only without querying HaploReg')
+    parser.add_argument('--url', dest='url', default=HAPLOREG_URL,
+                        help='URL of the HaploReg form (e.g. a local mirror)')
+    args = parser.parse_args()
+
+    os.makedirs(args.path_output_dir, exist_ok=True)
+    li_rsid = ReadInputSNP(args.path_input)
+    store = LDStore(args.path_store)
+
+    try:
+        dict_partner, li_missing = LookupLD(store, li_rsid, args.ld_thresh, args.ld_pop, args.batch_size, args.offline, args.url, 
+                                            args.n_worker, args.rate, args.n_retry, args.backoff)
+
+    finally:
+        store.Close()
+
+    for rsid in li_rsid:
+        if rsid in dict_partner:
+            WriteCorrelatedFile(args.path_output_dir, rsid, dict_partner[rsid])
+
+    if len(li_missing) > 0:
+        print(f"{len(li_missing)} rsIDs are not resolved : {' '.join(li_missing[:10])}{' ...' if len(li_missing) > 10 else ''}")
+        sys.exit(1)
+
+    print("LD Complete")
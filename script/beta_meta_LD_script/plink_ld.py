@@ -0,0 +1,182 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from haploreg import WriteCorrelatedFile, ReadInputSNP, li_LD_POPULATION
+
+# dict_POPULATION_ALIAS : Populations of the 1000 Genomes Phase 3 panel counted in each population of HaploReg (Phase 1)
+dict_POPULATION_ALIAS = {'AFR': ['AFR'], 'AMR': ['AMR'], 'ASN': ['ASN', 'EAS'], 'EUR': ['EUR']}
+
+# BED_MAGIC : First 3 bytes of a SNP-major PLINK .bed file
+BED_MAGIC = bytes([0x6c, 0x1b, 0x01])
+
+# Dosage of the first allele (A1) of the 4 genotypes of 2 bits (00: A1/A1, 01: missing, 10: A1/A2, 11: A2/A2) of each byte
+BED_DOSAGE_TABLE = np.array([[[2.0, np.nan, 1.0, 0.0][(byte >> (2*i)) & 3] for i in range(4)] for byte in range(256)], dtype='float64')
+
+class PlinkLD:
+    def __init__(self, prefix, ld_pop=None, path_panel=None):
+        """
+        Initializes a PlinkLD object - LD of the variants of the PLINK files {prefix}.bed/.bim/.fam
+
+        The .bed file is memory-mapped, and only the windows of the variants around the query SNPs are decoded.
+
+        Args:
+        prefix (str): Path of the PLINK files without the extension
+        ld_pop (str): Population of the LD (See li_LD_POPULATION, None: all samples)
+        path_panel (str): Sample panel with the 'sample' & 'super_pop' columns (e.g. integrated_call_samples_v3.20130502.ALL.panel of the 1000 Genomes)
+        """
+        self.df_bim = pd.read_csv(f"{prefix}.bim", sep=r'\s+', header=None, names=['CHR', 'SNP', 'CM', 'BP', 'A1', 'A2'],
+                                  dtype={'CHR': 'str', 'SNP': 'str', 'A1': 'str', 'A2': 'str'})
+        df_fam = pd.read_csv(f"{prefix}.fam", sep=r'\s+', header=None, usecols=[0, 1], names=['FID', 'IID'], dtype='str')
+        self.n_sample = len(df_fam)
+        self.n_byte = (self.n_sample + 3) // 4
+
+        with open(f"{prefix}.bed", 'rb') as fp:
+            if fp.read(3) != BED_MAGIC:
+                raise ValueError(f"{prefix}.bed is not a SNP-major PLINK .bed file")
+
+        self.bed = np.memmap(f"{prefix}.bed", dtype='uint8', mode='r', offset=3, shape=(len(self.df_bim), self.n_byte))
+
+        # Samples of the population
+        if ld_pop is None:
+            self.sample_idx = np.arange(self.n_sample)
+
+        else:
+            if path_panel is None:
+                raise ValueError("The population of the LD requires the sample panel")
+
+            df_panel = pd.read_csv(path_panel, sep='\t', dtype='str')
+            set_sample = set(df_panel.loc[df_panel['super_pop'].isin(dict_POPULATION_ALIAS[ld_pop]), 'sample'])
+            self.sample_idx = np.flatnonzero(df_fam['IID'].isin(set_sample).to_numpy())
+
+            if len(self.sample_idx) < 2:
+                raise ValueError(f"The population {ld_pop} has {len(self.sample_idx)} samples in {prefix}.fam")
+
+        # Variants in the order of the position in each chromosome
+        self.order = np.lexsort((self.df_bim['BP'].to_numpy(), self.df_bim['CHR'].to_numpy()))
+
+    def DecodeGenotype(self, variant_idx):
+        """
+        Decode the standardized dosages of the variants - the missing genotypes are set to the mean (0 after the standardization)
+
+            Args:
+                variant_idx (np.ndarray): Rows of the variants in the .bim file
+
+            Returns:
+                genotype (np.ndarray): (variant, sample) standardized dosages in float32 (0 for the monomorphic variants)
+        """
+        genotype = BED_DOSAGE_TABLE[self.bed[variant_idx]].reshape(len(variant_idx), -1)[:, self.sample_idx]
+        count = (~np.isnan(genotype)).sum(axis=1, keepdims=True)
+        mean = np.nansum(genotype, axis=1, keepdims=True) / np.maximum(count, 1)
+        genotype = np.where(np.isnan(genotype), mean, genotype) - mean
+        std = np.sqrt((genotype**2).mean(axis=1, keepdims=True))
+        genotype = np.divide(genotype, std, out=np.zeros_like(genotype), where=(std > 0))
+
+        return genotype.astype('float32')
+
+    def CalculateLD(self, li_rsid, ld_thresh=1, window_kb=1000, chunk_size=2048):
+        """
+        SNPs in LD (r^2 >= ld_thresh) with each query rsID within window_kb on the same chromosome
+
+        The variants in the position order are decoded by chunks of chunk_size, each once while the windows of the sorted query SNPs 
+        slide over them. The r^2 of the queries of a chunk against the chunks of their windows are calculated with matrix products 
+        (accumulated in float64, so that ld_thresh = 1 keeps the SNPs in perfect LD).
+
+            Args:
+                li_rsid (list): Query rsIDs
+                ld_thresh (float): Minimum r^2 of the SNPs in LD (ldThresh of queryHaploreg)
+                window_kb (float): Maximum distance of the SNPs in LD in kb
+                chunk_size (int): Number of the variants decoded at once
+
+            Returns:
+                dict_partner (dict): rsIDs in LD of each query rsID, with itself, in the order of the position - empty for the rsIDs not in the .bim file
+        """
+        dict_partner = {rsid: [] for rsid in li_rsid}
+        snp = self.df_bim['SNP'].to_numpy()[self.order]
+        chrom = self.df_bim['CHR'].to_numpy()[self.order]
+        bp = self.df_bim['BP'].to_numpy()[self.order]
+        rank = np.empty(len(self.order), dtype='int64')
+        rank[self.order] = np.arange(len(self.order))
+
+        # Window [start, end) of each query in the position order - only the query rsIDs are looked up in the .bim file
+        # (isin hashes the query rsIDs only, and allows the duplicated IDs such as '.' of the .bim file)
+        variant_idx = np.flatnonzero(self.df_bim['SNP'].isin(list(dict_partner)).to_numpy())
+        query = np.unique(rank[variant_idx])
+        chrom_start = np.searchsorted(chrom, chrom[query], side='left')
+        chrom_end = np.searchsorted(chrom, chrom[query], side='right')
+        start = np.array([cs + np.searchsorted(bp[cs:ce], pos - window_kb*1000, side='left') for cs, ce, pos in zip(chrom_start, chrom_end, bp[query])], dtype='int64')
+        end = np.array([cs + np.searchsorted(bp[cs:ce], pos + window_kb*1000, side='right') for cs, ce, pos in zip(chrom_start, chrom_end, bp[query])], dtype='int64')
+
+        dict_chunk = {}
+        tolerance = 1e-6
+
+        def GetChunk(c):
+            if c not in dict_chunk:
+                dict_chunk[c] = self.DecodeGenotype(self.order[c*chunk_size:(c+1)*chunk_size])
+
+            return dict_chunk[c]
+
+        for c in np.unique(query // chunk_size):
+            select = np.flatnonzero(query // chunk_size == c)
+            group_start, group_end = start[select].min(), end[select].max()
+
+            # The queries are sorted, so the chunks before the window are not used again.
+            for c_old in [c_old for c_old in dict_chunk if c_old < group_start // chunk_size]:
+                del dict_chunk[c_old]
+
+            genotype_query = GetChunk(c)[query[select] - c*chunk_size].astype('float64')
+            li_r_square = []
+
+            for c_window in range(group_start // chunk_size, (group_end - 1) // chunk_size + 1):
+                li_r_square.append((genotype_query @ GetChunk(c_window).astype('float64').T / len(self.sample_idx))**2)
+
+            # r_square : (query, variant) r^2 from the first variant of the chunk of group_start
+            r_square = np.concatenate(li_r_square, axis=1)
+            offset = (group_start // chunk_size) * chunk_size
+
+            for k, i in enumerate(select):
+                r_square[k, query[i] - offset] = 1.0
+                partner = np.flatnonzero(r_square[k, start[i] - offset:end[i] - offset] >= ld_thresh - tolerance) + start[i]
+                dict_partner[snp[query[i]]] = snp[partner].tolist()
+
+        return dict_partner
+
+####################################
+# main
+####################################
+if __name__ == '__main__':
+    path_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Beta_Meta_LD: SNPs in LD with input/input_SNPs.txt from local PLINK .bed/.bim/.fam files')
+    parser.add_argument('--bfile', dest='prefix', required=True,
+                        help='Path of the PLINK .bed/.bim/.fam files without the extension')
+    parser.add_argument('--input', dest='path_input', default=os.path.join(path_dir, 'input', 'input_SNPs.txt'),
+                        help='File of the query rsIDs, one per line (default: input/input_SNPs.txt)')
+    parser.add_argument('--output-dir', dest='path_output_dir', default=os.path.join(path_dir, 'output'),
+                        help='Directory of the correlated_with_{rsID}.txt files (default: output/)')
+    parser.add_argument('--ld-thresh', dest='ld_thresh', type=float, default=1,
+                        help='Minimum r^2 of the SNPs in LD - ldThresh of queryHaploreg (default: 1)')
+    parser.add_argument('--ld-pop', dest='ld_pop', choices=li_LD_POPULATION, default=None,
+                        help='Population of the LD - ldPop of queryHaploreg, with --panel (default: all samples)')
+    parser.add_argument('--panel', dest='path_panel', default=None,
+                        help="Sample panel with the 'sample' & 'super_pop' columns (ASN includes EAS)")
+    parser.add_argument('--window-kb', dest='window_kb', type=float, default=1000,
+                        help='Maximum distance of the SNPs in LD in kb (default: 1000)')
+    args = parser.parse_args()
+
+    if (args.ld_pop is not None) and (args.path_panel is None):
+        parser.error('--ld-pop requires --panel')
+
+    os.makedirs(args.path_output_dir, exist_ok=True)
+    li_rsid = ReadInputSNP(args.path_input)
+    dict_partner = PlinkLD(args.prefix, args.ld_pop, args.path_panel).CalculateLD(li_rsid, args.ld_thresh, args.window_kb)
+
+    for rsid in li_rsid:
+        WriteCorrelatedFile(args.path_output_dir, rsid, dict_partner[rsid])
+
+    li_missing = [rsid for rsid in li_rsid if len(dict_partner[rsid]) == 0]
+
+    if len(li_missing) > 0:
+        print(f"{len(li_missing)} rsIDs are not in {args.prefix}.bim : {' '.join(li_missing[:10])}{' ...' if len(li_missing) > 10 else ''}")
+
+    print("LD Complete")
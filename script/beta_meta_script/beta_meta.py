@@ -1,12 +1,25 @@
 import os, datetime
+import pickle
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+import multiprocessing
+import openpyxl
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from pandas.api.types import union_categoricals
 import numpy as np
 import matplotlib.image as mpimg
 import matplotlib.pyplot as plt
 import zepid
 import sys
 from zepid.graphics import EffectMeasurePlot
-from scipy.stats import norm
+from scipy.stats import norm, chi2
+from scipy.optimize import brentq
 
 #-------------------------------------------------------
 # Common Function
@@ -94,45 +107,2301 @@ print(CalculateSignEffectDirection('G', 'C', 'C', 'G'), 'result:-1')  #If the EA
 print(CalculateSignEffectDirection('-', 'A', 'G', 'A'), 'result:0')   #If the value of EA or NEA is not one of "A, G, T, C", the two studies are not combined.
 """
 
+# li_ALLELE : Alleles in the order of their integer codes (Other values are encoded as len(li_ALLELE))
+li_ALLELE = ['A', 'G', 'T', 'C']
+
+def EncodeAllele(allele):
+    """
+    Encode alleles as small integers
+    
+        Args:
+            allele (array-like): Alleles (or the codes, which are returned as they are)
+        
+        Returns:
+            code (np.ndarray): A:0, G:1, T:2, C:3 and 4 for the values which are not one of "A, G, T, C" (uint8)
+    """
+    allele = np.asarray(allele)
+    
+    if np.issubdtype(allele.dtype, np.integer):
+        return allele.astype('uint8')
+    
+    code = pd.Series(allele.astype('object'), dtype='object').map({allele: code for code, allele in enumerate(li_ALLELE)})
+    
+    return code.fillna(len(li_ALLELE)).to_numpy(dtype='uint8')
+
+def DecodeAllele(code):
+    """
+    Decode the allele codes of EncodeAllele ('N' for the values which are not one of "A, G, T, C")
+    """
+    return np.asarray(li_ALLELE + ['N'], dtype='object')[np.asarray(code, dtype='int64')]
+
+def CreateSignEffectDirectionTable():
+    """
+    Precompute CalculateSignEffectDirection for every combination of the encoded alleles
+    
+        Returns:
+            table (np.ndarray): 4x4x4x4 array of the direction sign indexed by 
+                                (effect_allele_study1, non_effect_allele_study1, effect_allele_study2, non_effect_allele_study2)
+    """
+    n_allele = len(li_ALLELE)
+    table = np.zeros((n_allele, n_allele, n_allele, n_allele), dtype='int8')
+    
+    for ea1 in range(n_allele):
+        for nea1 in range(n_allele):
+            for ea2 in range(n_allele):
+                for nea2 in range(n_allele):
+                    table[ea1, nea1, ea2, nea2] = CalculateSignEffectDirection(li_ALLELE[ea1], li_ALLELE[nea1], li_ALLELE[ea2], li_ALLELE[nea2])
+    
+    return table
+
+SIGN_EFFECT_DIRECTION_TABLE = CreateSignEffectDirectionTable()
+
+def HarmonizeEffectDirection(group_id, effect_allele_code, non_effect_allele_code, p_val, n_group):
+    """
+    Calculate the direction sign of every study row relative to the reference study of its (PHENOTYPE, SNP) group
+    
+    The reference study of each group is the one with the smallest p-value (the first one in the row order if tied).
+    
+        Args:
+            group_id (np.ndarray): Group index (0 ~ n_group-1) of each study row
+            effect_allele_code (np.ndarray): Encoded effect allele of each study row (See EncodeAllele)
+            non_effect_allele_code (np.ndarray): Encoded non-effect allele of each study row
+            p_val (np.ndarray): P-value of each study row
+            n_group (int): Number of (PHENOTYPE, SNP) groups
+        
+        Returns:
+            ref_row (np.ndarray): Position of the reference study row of each group (-1 if the group is empty)
+            sign (np.ndarray): Same direction (1) / Opposite direction (-1) / Not combined (0) of each study row
+    """
+    group_id = np.asarray(group_id, dtype='int64')
+    effect_allele_code = np.asarray(effect_allele_code, dtype='uint8')
+    non_effect_allele_code = np.asarray(non_effect_allele_code, dtype='uint8')
+    
+    # Group-wise argmin of the p-value : lexsort is stable, so ties keep the row order.
+    order = np.lexsort((np.asarray(p_val, dtype='float64'), group_id))
+    is_first = np.ones(len(order), dtype='bool')
+    is_first[1:] = group_id[order][1:] != group_id[order][:-1]
+    
+    ref_row = np.full(n_group, -1, dtype='int64')
+    ref_row[group_id[order][is_first]] = order[is_first]
+    
+    ref_effect_allele = effect_allele_code[ref_row[group_id]]
+    ref_non_effect_allele = non_effect_allele_code[ref_row[group_id]]
+    
+    n_allele = len(li_ALLELE)
+    valid = (ref_effect_allele < n_allele) & (ref_non_effect_allele < n_allele) & (effect_allele_code < n_allele) & (non_effect_allele_code < n_allele)
+    
+    sign = np.zeros(len(group_id), dtype='int8')
+    sign[valid] = SIGN_EFFECT_DIRECTION_TABLE[ref_effect_allele[valid], ref_non_effect_allele[valid], effect_allele_code[valid], non_effect_allele_code[valid]]
+    
+    return ref_row, sign
+
+def CalculateGroupStatistics(group_id, beta, beta_se, p_val, n_group):
+    """
+    Calculate the fixed-effect meta-analysis statistics of all (PHENOTYPE, SNP) groups at once
+    
+        Args:
+            group_id (np.ndarray): Group index (0 ~ n_group-1) of each study row
+            beta (np.ndarray): Effect size of each study row
+            beta_se (np.ndarray): Standard error of the effect size of each study row
+            p_val (np.ndarray): P-value of each study row
+            n_group (int): Number of (PHENOTYPE, SNP) groups
+        
+        Returns:
+            dict_stat (dict): Arrays of length n_group - 
+                SUM_W, SUM_W_BETA, SUM_W_BETA_SQUARE, SUM_W_SQUARE, COUNT : Sums of the inverse-variance weights w_i, w_i*beta_i, w_i*beta_i^2, w_i^2 and the number of studies
+                BETA_META, STD_BETA_META : Weighted average of the effect sizes and its standard error (the study values themselves for a single study)
+                Q, I_SQUARE : Cochran's Q statistic and Higgin's heterogeneity metric (NaN if not processed)
+                Q_PROCESSED, I_SQUARE_PROCESSED : Whether Q and I_SQUARE are calculated (False is written as 'Unprocessed')
+                Z, P_VALUE : Z score and integrated p-value (the p-value of the first study if I_SQUARE is not processed)
+                FIRST_ROW : Position of the first study row of each group (-1 if the group is empty)
+    """
+    group_id = np.asarray(group_id, dtype='int64')
+    beta = np.asarray(beta, dtype='float64')
+    beta_se = np.asarray(beta_se, dtype='float64')
+    p_val = np.asarray(p_val, dtype='float64')
+    
+    # For each group, the study values are summed in the order of the study rows.
+    w = beta_se**(-2)
+    sum_w = np.bincount(group_id, weights=w, minlength=n_group)
+    sum_w_beta = np.bincount(group_id, weights=w*beta, minlength=n_group)
+    sum_w_beta_square = np.bincount(group_id, weights=w*beta*beta, minlength=n_group)
+    sum_w_square = np.bincount(group_id, weights=w**2, minlength=n_group)
+    count = np.bincount(group_id, minlength=n_group)
+
+    first_row = np.full(n_group, -1, dtype='int64')
+    first_row[group_id[::-1]] = np.arange(len(group_id) - 1, -1, -1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta_meta = np.where(count > 1, sum_w_beta/sum_w, np.nan)
+        std_beta_meta = np.where(count > 1, sum_w**-0.5, np.nan)
+    
+    single = count == 1
+    beta_meta[single] = beta[first_row[single]]
+    std_beta_meta[single] = beta_se[first_row[single]]
+    
+    # Cochran's Q statistic is summed around the weighted average as in the per-study definition.
+    q = np.bincount(group_id, weights=w*(beta - beta_meta[group_id])**2, minlength=n_group)
+    
+    return CompleteGroupStatistics(sum_w, sum_w_beta, sum_w_beta_square, sum_w_square, count, beta_meta, std_beta_meta, q, p_val, first_row)
+
+def CalculateGroupStatisticsFromSums(sum_w, sum_w_beta, sum_w_beta_square, sum_w_square, count, p_val, first_row):
+    """
+    Calculate the fixed-effect meta-analysis statistics of all groups from their sufficient statistics only (See CalculateGroupStatistics)
+    
+    Q is calculated as sum(w_i*beta_i^2) - sum(w_i*beta_i)^2/sum(w_i), so it may differ from the per-study sum by rounding.
+    
+        Args:
+            sum_w, sum_w_beta, sum_w_beta_square, sum_w_square (np.ndarray): Sums of w_i, w_i*beta_i, w_i*beta_i^2, w_i^2 of each group
+            count (np.ndarray): Number of studies of each group
+            p_val (np.ndarray): P-value of each study row
+            first_row (np.ndarray): Position of the first study row of each group
+        
+        Returns:
+            dict_stat (dict): Arrays of length n_group (See CalculateGroupStatistics)
+    """
+    sum_w = np.asarray(sum_w, dtype='float64')
+    sum_w_beta = np.asarray(sum_w_beta, dtype='float64')
+    sum_w_beta_square = np.asarray(sum_w_beta_square, dtype='float64')
+    count = np.asarray(count, dtype='int64')
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta_meta = np.where(count > 0, sum_w_beta/sum_w, np.nan)
+        std_beta_meta = np.where(count > 0, sum_w**-0.5, np.nan)
+        q = sum_w_beta_square - sum_w_beta**2/sum_w
+    
+    # The cancellation error of the one-pass Q is removed (Q = 0 when all studies have the same effect size).
+    q[q <= 1e-12 * np.abs(sum_w_beta_square)] = 0
+    
+    return CompleteGroupStatistics(sum_w, sum_w_beta, sum_w_beta_square, np.asarray(sum_w_square, dtype='float64'), count, 
+                                   beta_meta, std_beta_meta, q, np.asarray(p_val, dtype='float64'), np.asarray(first_row, dtype='int64'))
+
+def CompleteGroupStatistics(sum_w, sum_w_beta, sum_w_beta_square, sum_w_square, count, beta_meta, std_beta_meta, q, p_val, first_row):
+    """
+    Calculate Higgin's heterogeneity metric & the integrated p-value from the group sums, the weighted averages and Q
+    
+        Returns:
+            dict_stat (dict): Arrays of length n_group (See CalculateGroupStatistics)
+    """
+    n_group = len(count)
+    q = np.array(q, dtype='float64')
+    q_processed = count > 1
+    q[~q_processed] = np.nan
+    
+    i_square_processed = q_processed & (q != 0)
+    i_square = np.full(n_group, np.nan)
+    i_square[i_square_processed] = np.maximum(100 * (q[i_square_processed] - (count[i_square_processed] - 1)) / q[i_square_processed], 0)
+    
+    z, p_value = CalculateIntegratedPvalueArray(beta_meta, std_beta_meta, i_square_processed, p_val, first_row)
+    
+    dict_stat = {'SUM_W': sum_w, 'SUM_W_BETA': sum_w_beta, 'SUM_W_BETA_SQUARE': sum_w_beta_square, 'SUM_W_SQUARE': sum_w_square, 'COUNT': count,
+                 'BETA_META': beta_meta, 'STD_BETA_META': std_beta_meta, 'Q': q, 'I_SQUARE': i_square, 
+                 'Q_PROCESSED': q_processed, 'I_SQUARE_PROCESSED': i_square_processed, 'Z': z, 'P_VALUE': p_value, 'FIRST_ROW': first_row}
+    
+    return dict_stat
+
+def CalculateTauSquareDL(sum_w, sum_w_square, q, count, random):
+    """
+    Calculate the DerSimonian-Laird between-study variance (tau^2) of all heterogeneous groups from their sums
+    
+        Args:
+            sum_w (np.ndarray): Sum of the inverse-variance weights of each group
+            sum_w_square (np.ndarray): Sum of the squared inverse-variance weights of each group
+            q (np.ndarray): Cochran's Q statistic of each group
+            count (np.ndarray): Number of studies of each group
+            random (np.ndarray): Whether the Random Effect Model is applied to each group
+        
+        Returns:
+            tau_square (np.ndarray): Between-study variance of each group (NaN if not random)
+    """
+    random = np.asarray(random, dtype='bool')
+    
+    tau_square = np.full(len(random), np.nan)
+    tau_square[random] = (q[random] - count[random] + 1) / (sum_w[random] - sum_w_square[random] / sum_w[random])
+    tau_square[random] = np.maximum(tau_square[random], 0)
+    
+    return tau_square
+
+def CalculateTauSquareIterative(group_id, beta, beta_se, random, method='REML', tau_square_init=None, tol=1e-5, max_iter=100):
+    """
+    Calculate the REML or Paule-Mandel between-study variance (tau^2) of all heterogeneous groups together
+    
+    Every iteration updates the unconverged groups only; a group leaves the iteration once its full step changes tau^2 by less than 
+    tol times the larger of tau^2 & the mean variance of its studies (so that the groups of precise studies converge as well).
+    REML uses Fisher scoring and Paule-Mandel uses the Newton step on the generalized Q statistic (Q(tau^2) = count - 1).
+    The steps are damped as in metafor: a step which lowers the restricted log-likelihood (REML) or moves Q(tau^2) away from count - 1 (PM) 
+    is taken back by half, and the step of a group is halved whenever its direction flips. The groups which still do not converge 
+    (and the REML groups stopped at a local maximum or at tau^2 = 0 below a higher likelihood) are solved by SolveTauSquareBracket.
+    
+        Args:
+            group_id (np.ndarray): Group index of each study row
+            beta (np.ndarray): Effect size of each study row
+            beta_se (np.ndarray): Standard error of the effect size of each study row
+            random (np.ndarray): Whether the Random Effect Model is applied to each group
+            method (str): 'REML' or 'PM'
+            tau_square_init (np.ndarray): Starting tau^2 of each group (0 if None)
+            tol (float): Relative convergence tolerance of tau^2
+            max_iter (int): Maximum number of iterations
+        
+        Returns:
+            tau_square (np.ndarray): Between-study variance of each group (NaN if not random)
+            converged (np.ndarray): Whether tau^2 of each group converged within max_iter or was solved by SolveTauSquareBracket
+            n_iter (np.ndarray): Number of iterations of each group
+    """
+    if method not in ('REML', 'PM'):
+        raise ValueError(f"Unknown tau^2 estimator: {method}")
+    
+    group_id = np.asarray(group_id, dtype='int64')
+    random = np.asarray(random, dtype='bool')
+    n_group = len(random)
+    
+    tau_square = np.full(n_group, np.nan)
+    converged = np.zeros(n_group, dtype='bool')
+    n_iter = np.zeros(n_group, dtype='int64')
+    
+    # groups : Group index of the unconverged groups / local_id : Position of the study row's group in groups
+    groups = np.flatnonzero(random)
+    local = np.full(n_group, -1, dtype='int64')
+    local[groups] = np.arange(len(groups))
+    
+    row_random = random[group_id]
+    row_group = group_id[row_random]
+    local_id = local[row_group]
+    y_random = y = np.asarray(beta, dtype='float64')[row_random]
+    v_random = v = np.asarray(beta_se, dtype='float64')[row_random]**2
+    
+    tau = np.zeros(len(groups)) if tau_square_init is None else np.nan_to_num(np.asarray(tau_square_init, dtype='float64')[groups])
+    count = np.bincount(local_id, minlength=len(groups))
+    v_mean = np.bincount(local_id, weights=v, minlength=len(groups)) / np.maximum(count, 1)
+    
+    # tau_prev, merit_prev, adj_prev : Last accepted tau^2, its merit & its full step / step : Damping factor of the step
+    tau_prev = tau.copy()
+    merit_prev = np.full(len(groups), np.inf)
+    adj_prev = np.zeros(len(groups))
+    step = np.ones(len(groups))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(max_iter):
+            if len(groups) == 0:
+                break
+            
+            n_local = len(groups)
+            w = 1/(v + tau[local_id])
+            sum_w = np.bincount(local_id, weights=w, minlength=n_local)
+            mu = np.bincount(local_id, weights=w*y, minlength=n_local) / sum_w
+            residual_square = (y - mu[local_id])**2
+            sum_w_square_residual_square = np.bincount(local_id, weights=w**2 * residual_square, minlength=n_local)
+            q_generalized = np.bincount(local_id, weights=w * residual_square, minlength=n_local)
+            
+            # merit : Negative restricted log-likelihood without the constant (REML) or |Q(tau^2) - (count - 1)| (PM)
+            if method == 'REML':
+                sum_w_square = np.bincount(local_id, weights=w**2, minlength=n_local)
+                sum_w_cube = np.bincount(local_id, weights=w**3, minlength=n_local)
+                trace_P = sum_w - sum_w_square / sum_w
+                trace_PP = sum_w_square - 2 * sum_w_cube / sum_w + (sum_w_square / sum_w)**2
+                adj = (sum_w_square_residual_square - trace_P) / trace_PP
+                merit = 0.5 * (np.bincount(local_id, weights=np.log(v + tau[local_id]), minlength=n_local) + np.log(sum_w) + q_generalized)
+                
+            else:
+                adj = (q_generalized - (count - 1)) / sum_w_square_residual_square
+                merit = np.abs(q_generalized - (count - 1))
+            
+            # worse : The last step worsened the merit - it is taken back by half & checked again in the next iteration
+            worse = merit > merit_prev + 1e-10 * np.maximum(1, np.abs(merit_prev))
+            flip = ~worse & (adj * adj_prev < 0)
+            step[worse | flip] *= 0.5
+            
+            tau_full = np.maximum(np.nan_to_num(tau + adj, nan=0.0, neginf=0.0), 0)
+            done = ~worse & (np.abs(tau_full - tau) <= tol * np.maximum(v_mean, tau_full))
+            tau_new = np.where(worse, tau_prev + 0.5 * (tau - tau_prev), 
+                               np.where(done, tau_full, np.maximum(np.nan_to_num(tau + step * adj, nan=0.0, neginf=0.0), 0)))
+            
+            tau_prev = np.where(worse, tau_prev, tau)
+            merit_prev = np.where(worse, merit_prev, merit)
+            adj_prev = np.where(worse, adj_prev, adj)
+            tau = tau_new
+            
+            tau_square[groups] = tau
+            n_iter[groups] += 1
+            converged[groups[done]] = True
+            
+            # Drop the converged groups & their study rows from the next iteration
+            if done.any():
+                keep = ~done
+                relocal = np.cumsum(keep) - 1
+                row_keep = keep[local_id]
+                local_id = relocal[local_id[row_keep]]
+                y = y[row_keep]
+                v = v[row_keep]
+                groups = groups[keep]
+                tau = tau[keep]
+                count = count[keep]
+                v_mean = v_mean[keep]
+                tau_prev = tau_prev[keep]
+                merit_prev = merit_prev[keep]
+                adj_prev = adj_prev[keep]
+                step = step[keep]
+    
+    # fallback : Groups solved by SolveTauSquareBracket
+    fallback = random & ~converged
+    
+    if method == 'REML':
+        fallback |= random & converged & CheckTauSquareMaximum(row_group, y_random, v_random, tau_square, n_group)
+    
+    fallback = np.flatnonzero(fallback)
+    
+    if len(fallback) > 0:
+        row_fallback = np.flatnonzero(np.isin(row_group, fallback))
+        row_fallback = row_fallback[np.argsort(row_group[row_fallback], kind='stable')]
+        li_row = np.split(row_fallback, np.cumsum(np.bincount(row_group[row_fallback], minlength=n_group)[fallback])[:-1])
+        
+        for group, row in zip(fallback, li_row):
+            tau_square[group] = SolveTauSquareBracket(y_random[row], v_random[row], method)
+            converged[group] = np.isfinite(tau_square[group])
+    
+    return tau_square, converged, n_iter
+
+def CalculateRestrictedLogLikelihood(group_id, y, v, tau_square, n_group):
+    """
+    Restricted log-likelihood of the random-effects model of each group without the constant
+    
+        Args:
+            group_id (np.ndarray): Group index of each study row
+            y (np.ndarray): Effect size of each study row
+            v (np.ndarray): Variance of the effect size of each study row
+            tau_square (np.ndarray): Between-study variance of each group
+            n_group (int): Number of groups
+        
+        Returns:
+            log_likelihood (np.ndarray): -(sum(log(v_i + tau^2)) + log(sum(w_i)) + sum(w_i*(y_i - mu)^2))/2 with w_i = 1/(v_i + tau^2)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = 1/(v + tau_square[group_id])
+        sum_w = np.bincount(group_id, weights=w, minlength=n_group)
+        mu = np.bincount(group_id, weights=w*y, minlength=n_group) / sum_w
+        q_generalized = np.bincount(group_id, weights=w * (y - mu[group_id])**2, minlength=n_group)
+        
+        return -0.5 * (np.bincount(group_id, weights=np.log(v + tau_square[group_id]), minlength=n_group) + np.log(sum_w) + q_generalized)
+
+def CheckTauSquareMaximum(group_id, y, v, tau_square, n_group, n_grid=25):
+    """
+    Whether the restricted log-likelihood of each group is higher at some tau^2 of a grid than at tau_square 
+    (tau_square is then a local maximum, or the boundary 0, below the REML estimate)
+    
+    The grid spans 0 and 1e-3 ~ 1e3 times the mean variance of the studies of the group.
+    """
+    count = np.bincount(group_id, minlength=n_group)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.bincount(group_id, weights=v, minlength=n_group) / count
+    
+    tau_square = np.nan_to_num(tau_square)
+    log_likelihood_max = CalculateRestrictedLogLikelihood(group_id, y, v, tau_square, n_group)
+    higher = np.zeros(n_group, dtype='bool')
+    
+    for ratio in np.concatenate([[0], np.geomspace(1e-3, 1e3, n_grid)]):
+        log_likelihood = CalculateRestrictedLogLikelihood(group_id, y, v, ratio * scale, n_group)
+        higher |= log_likelihood > log_likelihood_max + 1e-8 * np.maximum(1, np.abs(log_likelihood_max))
+    
+    return higher
+
+def SolveTauSquareBracket(y, v, method='REML', n_grid=200):
+    """
+    Calculate the REML or Paule-Mandel tau^2 of a single group by a bracketed root search - the fallback of CalculateTauSquareIterative
+    
+    REML : The maximum of the restricted log-likelihood on a grid is refined by brentq on the REML score in the grid interval around it.
+    PM : Q(tau^2) decreases with tau^2, so the root of Q(tau^2) - (count - 1) is bracketed by the first grid point below count - 1.
+    
+        Args:
+            y (np.ndarray): Effect size of each study of the group
+            v (np.ndarray): Variance of the effect size of each study of the group
+            method (str): 'REML' or 'PM'
+            n_grid (int): Number of the grid points (1e-6 ~ 1e4 times the scale of the effect sizes & the variances)
+        
+        Returns:
+            tau_square (float): Between-study variance of the group
+    """
+    def Score(tau_square):
+        w = 1/(v + tau_square)
+        residual_square = (y - np.sum(w*y)/np.sum(w))**2
+        
+        if method == 'REML':
+            return np.sum(w**2 * residual_square) - (np.sum(w) - np.sum(w**2)/np.sum(w))
+        
+        return np.sum(w * residual_square) - (len(y) - 1)
+    
+    scale = max(np.var(y), np.mean(v))
+    grid = np.concatenate([[0], scale * np.geomspace(1e-6, 1e4, n_grid)])
+    
+    if method == 'PM':
+        score = np.array([Score(tau_square) for tau_square in grid])
+        below = np.flatnonzero(score <= 0)
+        
+        if len(below) == 0:
+            return grid[-1]
+        
+        if below[0] == 0:
+            return 0.0
+        
+        return brentq(Score, grid[below[0] - 1], grid[below[0]])
+    
+    group_id = np.zeros(len(y), dtype='int64')
+    log_likelihood = np.array([CalculateRestrictedLogLikelihood(group_id, y, v, np.array([tau_square]), 1)[0] for tau_square in grid])
+    best = int(np.nanargmax(log_likelihood))
+    
+    if best == 0:
+        return 0.0
+    
+    low, high = grid[best - 1], grid[min(best + 1, len(grid) - 1)]
+    
+    if Score(low) > 0 > Score(high):
+        return brentq(Score, low, high)
+    
+    return grid[best]
+
+def CalculateRandomEffectArray(group_id, beta, beta_se, tau_square, random):
+    """
+    Random Effect Model - Calculate the weighted average of the effect sizes of all heterogeneous groups at once
+    
+        Args:
+            group_id (np.ndarray): Group index of each study row
+            beta (np.ndarray): Effect size of each study row
+            beta_se (np.ndarray): Standard error of the effect size of each study row
+            tau_square (np.ndarray): Between-study variance of each group
+            random (np.ndarray): Whether the Random Effect Model is applied to each group
+        
+        Returns:
+            beta_random (np.ndarray): Weighted average of the effect sizes by the Random Effect Model (NaN if not random)
+            std_beta_random (np.ndarray): Standard error of beta_random (NaN if not random)
+    """
+    group_id = np.asarray(group_id, dtype='int64')
+    random = np.asarray(random, dtype='bool')
+    n_group = len(random)
+    
+    # The studies of the random groups are re-weighted with w_i_R = 1/(1/w_i + tau^2).
+    row_random = random[group_id]
+    group_id_random = group_id[row_random]
+    w_i = np.asarray(beta_se, dtype='float64')[row_random]**(-2)
+    w_i_R = 1/(1/w_i + tau_square[group_id_random])
+    
+    sum_w_i_R_beta_i = np.bincount(group_id_random, weights=w_i_R * np.asarray(beta, dtype='float64')[row_random], minlength=n_group)
+    sum_w_i_R = np.bincount(group_id_random, weights=w_i_R, minlength=n_group)
+    
+    beta_random = np.full(n_group, np.nan)
+    std_beta_random = np.full(n_group, np.nan)
+    beta_random[random] = sum_w_i_R_beta_i[random] / sum_w_i_R[random]
+    std_beta_random[random] = sum_w_i_R[random]**-0.5
+    
+    return beta_random, std_beta_random
+
+def CalculateIntegratedPvalueArray(beta_meta, std_beta_meta, processed, p_val, first_row):
+    """
+    Calculate the Z score & the two-sided integrated p-value of all groups at once
+    
+        Args:
+            beta_meta (np.ndarray): Weighted average of the effect sizes of each group
+            std_beta_meta (np.ndarray): Standard error of beta_meta
+            processed (np.ndarray): Whether the heterogeneity metric of each group is processed
+            p_val (np.ndarray): P-value of each study row
+            first_row (np.ndarray): Position of the first study row of each group
+        
+        Returns:
+            z (np.ndarray): Z score of each group
+            p_value (np.ndarray): Integrated p-value of each group (the p-value of the first study if not processed)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.asarray(beta_meta, dtype='float64') / np.asarray(std_beta_meta, dtype='float64')
+    
+    p_value = 2 * norm.cdf(-np.abs(z))
+    unprocessed = ~np.asarray(processed, dtype='bool') & (first_row >= 0)
+    p_value[unprocessed] = np.asarray(p_val, dtype='float64')[first_row[unprocessed]]
+    
+    return z, p_value
+
+def AdjustPvalue(group_id, p_val, li_method=['BH']):
+    """
+    Adjust the p-values within each group (e.g. PHENOTYPE) with one sort
+    
+        Args:
+            group_id (np.ndarray): Group index of each p-value
+            p_val (np.ndarray): P-values (NaN values are not counted and stay NaN)
+            li_method (list): Adjustment methods - 'BH' (Benjamini-Hochberg), 'BY' (Benjamini-Yekutieli), 'BONFERRONI'
+        
+        Returns:
+            dict_adjusted (dict): Adjusted p-values of each method
+    """
+    for method in li_method:
+        if method not in ('BH', 'BY', 'BONFERRONI'):
+            raise ValueError(f"Unknown p-value adjustment method: {method}")
+    
+    group_id = np.asarray(group_id, dtype='int64')
+    p_val = np.asarray(p_val, dtype='float64')
+    valid = ~np.isnan(p_val)
+    
+    # Sort by (group, p-value) & rank within the group
+    order = np.flatnonzero(valid)[np.lexsort((p_val[valid], group_id[valid]))]
+    group_sorted = group_id[order]
+    p_sorted = p_val[order]
+    
+    n = np.bincount(group_sorted, minlength=group_id.max() + 1 if len(group_id) else 0)
+    start = np.cumsum(n) - n
+    rank = np.arange(len(order)) - start[group_sorted] + 1
+    n_sorted = n[group_sorted]
+    
+    dict_adjusted = {}
+    
+    for method in li_method:
+        if method == 'BONFERRONI':
+            adjusted_sorted = np.minimum(p_sorted * n_sorted, 1)
+        
+        else:
+            adjusted_sorted = p_sorted * n_sorted / rank
+            
+            if method == 'BY':
+                # c(n) = 1 + 1/2 + ... + 1/n 
+                harmonic = np.cumsum(1 / np.arange(1, max(n.max(initial=0), 1) + 1))
+                adjusted_sorted = adjusted_sorted * harmonic[n_sorted - 1]
+            
+            # Step-up : Reverse cumulative minimum within each group
+            adjusted_sorted = pd.Series(adjusted_sorted[::-1]).groupby(group_sorted[::-1]).cummin().to_numpy()[::-1]
+            adjusted_sorted = np.minimum(adjusted_sorted, 1)
+        
+        adjusted = np.full(len(p_val), np.nan)
+        adjusted[order] = adjusted_sorted
+        dict_adjusted[method] = adjusted
+    
+    return dict_adjusted
+
+#-------------------------------------------------------
+# Input Reader
+#-------------------------------------------------------
+# li_INPUT_COLUMN : List of column name in the Input File
+li_INPUT_COLUMN = ['PHENOTYPE', 'SNP', 'EFFECT_ALLELE', 'NON_EFFECT_ALLELE', 'BETA', 'BETA_SE', 'OR', 'OR_95%CI_LOWER', 'OR_95%CI_UPPER', 'P_VAL']
+
+# dict_INPUT_DTYPE : Explicit dtypes of the input columns for the text reader
+dict_INPUT_DTYPE = {'PHENOTYPE': 'object', 'SNP': 'object', 'EFFECT_ALLELE': 'object', 'NON_EFFECT_ALLELE': 'object', 
+                    'BETA': 'float64', 'BETA_SE': 'float64', 'OR': 'float64', 'OR_95%CI_LOWER': 'float64', 'OR_95%CI_UPPER': 'float64', 'P_VAL': 'float64'}
+
+def EncodeInputData(df_meta_input_data, float_dtype='float64'):
+    """
+    Compact in-memory representation of the study rows
+    - PHENOTYPE, SNP & STUDY : Categorical (dictionary-encoded) without the spaces around the values
+    - EFFECT_ALLELE, NON_EFFECT_ALLELE : uint8 codes (See EncodeAllele) - the rows without alleles are removed as in CalculateBeta
+    - BETA, BETA_SE, OR, OR_95%CI_LOWER, OR_95%CI_UPPER : float_dtype
+    - P_VAL : float64 (The small p-values underflow in float32.)
+    
+        Args:
+            df_meta_input_data (DataFrame): Data frame of the li_column columns (& STUDY)
+            float_dtype (str): 'float64' or 'float32'
+        
+        Returns:
+            df_meta_input_data (DataFrame): Encoded data frame
+    """
+    df_meta_input_data = df_meta_input_data[df_meta_input_data['EFFECT_ALLELE'].notna() & df_meta_input_data['NON_EFFECT_ALLELE'].notna()]
+    dict_column = {}
+    
+    for column in df_meta_input_data.columns:
+        value = df_meta_input_data[column]
+        
+        if column in ['PHENOTYPE', 'SNP', 'STUDY']:
+            if isinstance(value.dtype, pd.CategoricalDtype):
+                value = StripCategorical(value)
+            
+            else:
+                value = value.astype('object').str.strip().astype('category')
+        
+        elif column in ['EFFECT_ALLELE', 'NON_EFFECT_ALLELE']:
+            if isinstance(value.dtype, pd.CategoricalDtype):
+                # Only the categories are encoded (e.g. the string columns of a cache entry). 
+                value = EncodeAllele(value.cat.categories.to_series().astype('object').str.strip().to_numpy(dtype='object'))[value.cat.codes.to_numpy()]
+            
+            else:
+                value = EncodeAllele(value.astype('object').str.strip().to_numpy(dtype='object') if value.dtype == 'object' else value.to_numpy())
+        
+        elif column in ['BETA', 'BETA_SE', 'OR', 'OR_95%CI_LOWER', 'OR_95%CI_UPPER']:
+            value = value.to_numpy(dtype=float_dtype)
+        
+        elif column == 'P_VAL':
+            value = value.to_numpy(dtype='float64')
+        
+        dict_column[column] = value
+    
+    return pd.DataFrame(dict_column, index=df_meta_input_data.index)
+
+def StripCategorical(value):
+    """
+    Remove the spaces around the categories of a categorical Series - the categories which become equal are merged
+    """
+    categories = value.cat.categories.to_series().astype('object').str.strip()
+    
+    if categories.isna().sum() == 0 and categories.is_unique and (categories.to_numpy() == value.cat.categories.to_numpy(dtype='object')).all():
+        return value
+    
+    # new_codes : Code of each old category in the stripped categories (-1 for the values which are not strings)
+    new_codes, new_categories = pd.factorize(categories.to_numpy(dtype='object'))
+    codes = value.cat.codes.to_numpy()
+    
+    return pd.Series(pd.Categorical.from_codes(np.where(codes >= 0, new_codes[codes], -1), pd.Index(new_categories, dtype='object')), index=value.index)
+
+def ConcatInputData(li_df_meta_input_data):
+    """
+    Concat the data frames of EncodeInputData - the categories are unified, so the columns stay categorical
+    """
+    li_df_meta_input_data = list(li_df_meta_input_data)
+    
+    for column in li_df_meta_input_data[0].columns:
+        if isinstance(li_df_meta_input_data[0][column].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([df_meta_input_data[column] for df_meta_input_data in li_df_meta_input_data]).categories
+            li_df_meta_input_data = [df_meta_input_data.assign(**{column: df_meta_input_data[column].cat.set_categories(categories)}) 
+                                     for df_meta_input_data in li_df_meta_input_data]
+    
+    return pd.concat(li_df_meta_input_data, ignore_index=True)
+
+def DetectInputFormat(path):
+    """
+    Detect the format of an input file from its extension & its first bytes
+    
+        Args:
+            path (str): Path of the input file
+        
+        Returns:
+            input_format (str): 'text' (TSV/CSV, optionally gzip/bgzip compressed) or 'excel'
+            sep (str): Column separator of the text file (None for excel)
+            compression (str): 'gzip' or None
+    """
+    with open(path, 'rb') as fp:
+        magic = fp.read(2)
+    
+    # bgzip files are gzip files made of several members, so both are read by the gzip module.
+    compression = 'gzip' if magic == b'\x1f\x8b' else None
+    
+    name = os.path.basename(path).lower()
+    for ext in ('.gz', '.bgz', '.gzip'):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    
+    if (compression is None) and name.endswith(('.xlsx', '.xlsm', '.xls')):
+        return 'excel', None, None
+    
+    if name.endswith('.csv'):
+        return 'text', ',', compression
+    
+    if name.endswith(('.tsv', '.txt', '.tab')):
+        return 'text', '\t', compression
+    
+    if compression == 'gzip':
+        with gzip.open(path, 'rt') as fp:
+            header = fp.readline()
+        
+        return 'text', ('\t' if '\t' in header else ','), compression
+    
+    return 'excel', None, None
+
+def NormalizeInputData(df_meta_input_data, li_column):
+    """
+    Project the input columns & Normalize the lower-case alleles
+    
+        Args:
+            df_meta_input_data (DataFrame): Data frame read from an input file
+            li_column (list): List of the required column names
+        
+        Returns:
+            df_meta_input_data (DataFrame): Data frame of the li_column columns
+    """
+    df_meta_input_data = df_meta_input_data.loc[:, li_column]
+    df_meta_input_data = df_meta_input_data.replace({'EFFECT_ALLELE':{'a':'A', 'c':'C', 'g':'G', 't':'T'},'NON_EFFECT_ALLELE':{'a':'A', 'c':'C', 'g':'G', 't':'T'}})
+    
+    return df_meta_input_data
+
+def IterTextInputFile(path, li_column, sep='\t', compression=None, chunksize=1000000):
+    """
+    Read a TSV/CSV (optionally gzip/bgzip compressed) summary-statistics file in chunks
+    
+    Only the li_column columns are parsed, with the dtypes of dict_INPUT_DTYPE, so the parser memory is bounded by chunksize.
+    
+        Args:
+            path (str): Path of the input file
+            li_column (list): List of the required column names
+            sep (str): Column separator
+            compression (str): 'gzip' or None
+            chunksize (int): Number of rows parsed at once
+        
+        Returns:
+            iter_chunk (iterator): Data frames of the li_column columns of every chunk (None if a required column is missing)
+    """
+    header = pd.read_csv(path, sep=sep, compression=compression, nrows=0).columns
+    
+    if not set(li_column).issubset(set(header)):
+        return None
+    
+    reader = pd.read_csv(path, sep=sep, compression=compression, usecols=li_column, 
+                         dtype={column: dict_INPUT_DTYPE[column] for column in li_column}, chunksize=chunksize)
+    
+    return (NormalizeInputData(df_chunk, li_column) for df_chunk in reader)
+
+def ConvertExcelRows(li_row, li_column):
+    """
+    Convert a batch of worksheet rows into typed column arrays
+    
+        Args:
+            li_row (list): Tuples of the cell values in the order of li_column
+            li_column (list): List of the required column names
+        
+        Returns:
+            df_batch (DataFrame): Data frame of the batch with the dtypes of dict_INPUT_DTYPE
+    """
+    dict_column = {}
+    
+    for i, column in enumerate(li_column):
+        values = [row[i] for row in li_row]
+        
+        if dict_INPUT_DTYPE[column] == 'float64':
+            # Text cells such as 'NA' become NaN as in pd.read_excel.
+            dict_column[column] = pd.to_numeric(pd.Series(values, dtype='object'), errors='coerce').to_numpy(dtype='float64')
+        
+        else:
+            dict_column[column] = np.array([np.nan if value is None else value for value in values], dtype='object')
+    
+    return pd.DataFrame(dict_column)
+
+def IterExcelInputFile(path, li_column, chunksize=1000000):
+    """
+    Read an Excel workbook row by row in the read-only mode of openpyxl
+    
+    The header (first row) of every worksheet is searched for li_column once; the worksheets without them are skipped.
+    The cells are converted into typed arrays every chunksize rows, so the memory does not grow with the worksheet size.
+    
+        Args:
+            path (str): Path of the Excel workbook
+            li_column (list): List of the required column names
+            chunksize (int): Number of rows converted at once
+        
+        Returns:
+            iter_chunk (iterator): Data frames of the li_column columns of every batch of all worksheets (None if no worksheet has the required columns)
+    """
+    # dict_position : Positions of li_column in the header of each worksheet
+    dict_position = {}
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    
+    try:
+        for worksheet in workbook.worksheets:
+            header = next(worksheet.iter_rows(max_row=1, values_only=True), None)
+            
+            if header is None:
+                continue
+            
+            li_header = [None if value is None else str(value) for value in header]
+            
+            if set(li_column).issubset(set(li_header)):
+                dict_position[worksheet.title] = [li_header.index(column) for column in li_column]
+    
+    finally:
+        workbook.close()
+    
+    if len(dict_position) == 0:
+        return None
+    
+    def IterBatch():
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        
+        try:
+            for title, li_position in dict_position.items():
+                li_row = []
+                
+                for row in workbook[title].iter_rows(min_row=2, values_only=True):
+                    row = tuple(row[position] if position < len(row) else None for position in li_position)
+                    
+                    if all(value is None for value in row):
+                        continue
+                    
+                    li_row.append(row)
+                    
+                    if len(li_row) >= chunksize:
+                        yield NormalizeInputData(ConvertExcelRows(li_row, li_column), li_column)
+                        li_row = []
+                
+                if len(li_row) > 0:
+                    yield NormalizeInputData(ConvertExcelRows(li_row, li_column), li_column)
+        
+        finally:
+            workbook.close()
+    
+    return IterBatch()
+
+def IterInputFile(path, li_column, chunksize=1000000, excel_reader='pandas'):
+    """
+    Read an input file (Excel workbook or TSV/CSV/gzip summary statistics) in chunks
+    
+        Args:
+            path (str): Path of the input file
+            li_column (list): List of the required column names
+            chunksize (int): Number of rows parsed at once for the text files & the streamed Excel workbooks
+            excel_reader (str): 'pandas' (pd.read_excel of the first worksheet, one chunk) or 'stream' (IterExcelInputFile of all worksheets)
+        
+        Returns:
+            iter_chunk (iterator): Data frames of the li_column columns (None if a required column is missing)
+    """
+    input_format, sep, compression = DetectInputFormat(path)
+    
+    if input_format == 'text':
+        return IterTextInputFile(path, li_column, sep=sep, compression=compression, chunksize=chunksize)
+    
+    # openpyxl does not read the old .xls format.
+    if (excel_reader == 'stream') and not path.lower().endswith('.xls'):
+        return IterExcelInputFile(path, li_column, chunksize=chunksize)
+    
+    df_meta_input_data = pd.read_excel(path)
+    
+    if not set(li_column).issubset(set(list(df_meta_input_data.columns))):
+        return None
+    
+    return iter([NormalizeInputData(df_meta_input_data, li_column)])
+
+def ReadInputFile(path, li_column, chunksize=1000000, excel_reader='pandas'):
+    """
+    Read an input file (Excel workbook or TSV/CSV/gzip summary statistics)
+    
+    Each chunk is encoded (See EncodeInputData) as it is read, so only one chunk of the file is held as strings at once.
+    
+        Args:
+            path (str): Path of the input file
+            li_column (list): List of the required column names
+            chunksize (int): Number of rows parsed at once for the text files & the streamed Excel workbooks
+            excel_reader (str): 'pandas' or 'stream' (See IterInputFile)
+        
+        Returns:
+            df_meta_input_data (DataFrame): Encoded data frame of the li_column columns in float64 (None if a required column is missing)
+    """
+    iter_chunk = IterInputFile(path, li_column, chunksize=chunksize, excel_reader=excel_reader)
+    
+    if iter_chunk is None:
+        return None
+    
+    li_chunk = [EncodeInputData(df_chunk) for df_chunk in iter_chunk]
+    
+    if len(li_chunk) == 0:
+        return EncodeInputData(pd.DataFrame({column: pd.Series(dtype=dict_INPUT_DTYPE[column]) for column in li_column}))
+    
+    return ConcatInputData(li_chunk)
+
+#-------------------------------------------------------
+# Input Cache
+#-------------------------------------------------------
+# PARSER_VERSION : Version of ReadInputFile & NormalizeInputData - Change it when their output changes, so the old cache entries are not used.
+PARSER_VERSION = '1'
+
+def GetCacheKey(path, variant='', blocksize=1<<20):
+    """
+    Calculate the cache key of an input file from its content & PARSER_VERSION
+    
+        Args:
+            path (str): Path of the input file
+            variant (str): Reader option changing the parsed result (e.g. the Excel reader)
+            blocksize (int): Number of bytes hashed at once
+        
+        Returns:
+            key (str): '{sha256 of the file content}-v{PARSER_VERSION}{variant}'
+    """
+    sha = hashlib.sha256()
+    
+    with open(path, 'rb') as fp:
+        for block in iter(lambda: fp.read(blocksize), b''):
+            sha.update(block)
+    
+    return f"{sha.hexdigest()}-v{PARSER_VERSION}{variant}"
+
+def SaveCacheEntry(df_meta_input_data, path_entry):
+    """
+    Save a parsed input data frame as a cache entry - a directory of .npy files which can be memory-mapped
+    
+    Numeric columns are saved as they are and string (or categorical) columns as integer codes & unique values.
+    
+        Args:
+            df_meta_input_data (DataFrame): Parsed, normalized & projected data frame of an input file
+            path_entry (str): Path of the cache entry directory
+        
+        Returns:
+            result (bool): Whether the entry is saved (False if a column holds values which are neither numbers nor strings)
+    """
+    path_tmp = f"{path_entry}.tmp{os.getpid()}"
+    os.makedirs(path_tmp, exist_ok=True)
+    
+    li_column_info = []
+    
+    for i, column in enumerate(df_meta_input_data.columns):
+        value = df_meta_input_data[column]
+        
+        if isinstance(value.dtype, pd.CategoricalDtype):
+            codes, uniques = value.cat.codes.to_numpy(), value.cat.categories.to_numpy(dtype='object')
+        
+        elif value.dtype.kind in 'biuf':
+            np.save(os.path.join(path_tmp, f"{i}.npy"), value.to_numpy())
+            li_column_info.append([column, 'numeric'])
+            continue
+        
+        else:
+            codes, uniques = pd.factorize(value.to_numpy(dtype='object'))
+        
+        if not all(isinstance(unique, str) for unique in uniques):
+            shutil.rmtree(path_tmp, ignore_errors=True)
+            return False
+        
+        # The codes are saved in the dtype of the categorical codes, so LoadCacheEntry keeps them memory-mapped.
+        np.save(os.path.join(path_tmp, f"{i}.codes.npy"), codes.astype(GetCategoryCodeDtype(len(uniques))))
+        np.save(os.path.join(path_tmp, f"{i}.uniques.npy"), np.array(list(uniques), dtype='str') if len(uniques) > 0 else np.array([], dtype='<U1'))
+        li_column_info.append([column, 'string'])
+    
+    with open(os.path.join(path_tmp, 'columns.json'), 'w') as fp:
+        json.dump(li_column_info, fp)
+    
+    # The entry appears at once, so another process never reads a partial entry.
+    try:
+        os.rename(path_tmp, path_entry)
+    
+    except OSError:
+        shutil.rmtree(path_tmp, ignore_errors=True)
+    
+    return True
+
+def GetCategoryCodeDtype(n_category):
+    """
+    dtype of the codes of a categorical of n_category categories (the smallest one, as pandas chooses it)
+    """
+    for dtype in ['int8', 'int16', 'int32']:
+        if n_category < np.iinfo(dtype).max:
+            return dtype
+    
+    return 'int64'
+
+def LoadCacheEntry(path_entry):
+    """
+    Load a cache entry - the numeric columns & the codes of the string columns are memory-mapped
+    
+        Args:
+            path_entry (str): Path of the cache entry directory
+        
+        Returns:
+            df_meta_input_data (DataFrame): Data frame saved by SaveCacheEntry (the string columns are categorical)
+    """
+    with open(os.path.join(path_entry, 'columns.json')) as fp:
+        li_column_info = json.load(fp)
+    
+    dict_column = {}
+    
+    for i, (column, kind) in enumerate(li_column_info):
+        if kind == 'numeric':
+            dict_column[column] = np.load(os.path.join(path_entry, f"{i}.npy"), mmap_mode='r')
+        
+        else:
+            codes = np.load(os.path.join(path_entry, f"{i}.codes.npy"), mmap_mode='r')
+            uniques = np.load(os.path.join(path_entry, f"{i}.uniques.npy")).astype('object')
+            dict_column[column] = pd.Categorical.from_codes(codes, pd.Index(uniques, dtype='object'))
+    
+    # The modification time of the entry is its last use for the LRU eviction.
+    os.utime(path_entry)
+    
+    return pd.DataFrame(dict_column, copy=False)
+
+# CACHE_TMP_MAX_AGE : Age in seconds after which a temporary entry (of a process which was stopped while saving it) is removed
+CACHE_TMP_MAX_AGE = 3600
+
+def EvictCache(cache_dir, max_bytes):
+    """
+    Remove the least recently used cache entries until the cache is not larger than max_bytes & the stale temporary entries
+    
+        Args:
+            cache_dir (str): Path of the cache directory
+            max_bytes (int): Maximum size of the cache in bytes
+        
+        Returns:
+            li_removed (list): Names of the removed entries
+    """
+    li_entry = []
+    li_removed = []
+    
+    for name in os.listdir(cache_dir):
+        path_entry = os.path.join(cache_dir, name)
+        
+        if os.path.isdir(path_entry) and ('.tmp' in name):
+            if time.time() - os.path.getmtime(path_entry) > CACHE_TMP_MAX_AGE:
+                shutil.rmtree(path_entry, ignore_errors=True)
+                li_removed.append(name)
+        
+        elif os.path.isdir(path_entry):
+            size = sum(os.path.getsize(os.path.join(path_entry, file)) for file in os.listdir(path_entry))
+            li_entry.append((os.path.getmtime(path_entry), size, name))
+    
+    li_entry.sort()
+    total = sum(size for _, size, _ in li_entry)
+    
+    for _, size, name in li_entry:
+        if total <= max_bytes:
+            break
+        
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+        li_removed.append(name)
+    
+    return li_removed
+
+def ReadStudyFile(path, li_column, chunksize=1000000, cache_dir=None, excel_reader='pandas'):
+    """
+    Read, normalize & project the input file of a study - Runs in a worker process of ConcatData
+    
+    With cache_dir, an unchanged file is not parsed again; the path of its cache entry is returned instead, 
+    so that the calling process memory-maps it (See LoadStudyFile).
+    
+        Args:
+            path (str): Path of the input file
+            li_column (list): List of the required column names
+            chunksize (int): Number of rows parsed at once for the text files
+            cache_dir (str): Path of the cache directory (None: no cache)
+            excel_reader (str): 'pandas' or 'stream' (See ReadInputFile)
+        
+        Returns:
+            result (DataFrame or str): Data frame of the li_column columns or the path of its cache entry - None if a required column is missing
+    """
+    if cache_dir is not None:
+        variant = f"-{excel_reader}" if DetectInputFormat(path)[0] == 'excel' else ''
+        path_entry = os.path.join(cache_dir, GetCacheKey(path, variant))
+        
+        if os.path.isdir(path_entry):
+            return path_entry
+    
+    df_meta_input_data = ReadInputFile(path, li_column, chunksize=chunksize, excel_reader=excel_reader)
+    
+    if (df_meta_input_data is not None) and (cache_dir is not None):
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        if SaveCacheEntry(df_meta_input_data, path_entry):
+            return path_entry
+    
+    return df_meta_input_data
+
+def LoadStudyFile(result, path, float_dtype='float64'):
+    """
+    Complete the result of ReadStudyFile - Load the cache entry, Add the STUDY column & Encode the rows (See EncodeInputData)
+    
+        Args:
+            result (DataFrame or str): Result of ReadStudyFile
+            path (str): Path of the input file
+            float_dtype (str): dtype of the effect sizes
+        
+        Returns:
+            df_meta_input_data (DataFrame): Data frame of the li_column columns & the STUDY column (file name of the study) - None if a required column is missing
+    """
+    if result is None:
+        return None
+    
+    df_meta_input_data = LoadCacheEntry(result) if isinstance(result, str) else result
+    df_meta_input_data['STUDY'] = pd.Categorical.from_codes(np.zeros(len(df_meta_input_data), dtype='int8'), [os.path.basename(path)])
+    
+    return EncodeInputData(df_meta_input_data, float_dtype)
+
+###################################
+# GroupIndex
+###################################
+
+class GroupIndex:
+    def __init__(self, phenotype, snp):
+        """
+        Initializes a GroupIndex object - Integer index of the (PHENOTYPE, SNP) groups of the study rows
+
+        Args:
+        phenotype (array-like): PHENOTYPE of each study row
+        snp (array-like): SNP of each study row
+
+        Attributes:
+        group_id (np.ndarray): Group index of each study row (Groups are numbered in the order of their first study row)
+        phenotype, snp (np.ndarray): PHENOTYPE & SNP of each group
+        order (np.ndarray): Positions of the study rows sorted by group (stable)
+        offsets (np.ndarray): CSR offsets - the study rows of the group j are order[offsets[j]:offsets[j+1]]
+        """
+        # The categorical columns (See EncodeInputData) are factorized from their codes.
+        phenotype_code, phenotype_unique = pd.factorize(phenotype if isinstance(getattr(phenotype, 'dtype', None), pd.CategoricalDtype) else np.asarray(phenotype, dtype='object'))
+        snp_code, snp_unique = pd.factorize(snp if isinstance(getattr(snp, 'dtype', None), pd.CategoricalDtype) else np.asarray(snp, dtype='object'))
+
+        # The pair is hashed as a single int64 key instead of comparing the strings.
+        key = phenotype_code.astype('int64') * max(len(snp_unique), 1) + snp_code
+        group_id, key_unique = pd.factorize(key)
+
+        self.group_id = group_id.astype('int64')
+        self.phenotype = np.asarray(phenotype_unique, dtype='object')[key_unique // max(len(snp_unique), 1)]
+        self.snp = np.asarray(snp_unique, dtype='object')[key_unique % max(len(snp_unique), 1)]
+        self.CreateOffsets()
+
+    @classmethod
+    def FromGroupId(cls, group_id, phenotype, snp):
+        """
+        Create a GroupIndex from the group index of each study row & the PHENOTYPE, SNP of each group (e.g. loaded from the statistics store)
+
+        Args:
+        group_id (np.ndarray): Group index of each study row
+        phenotype, snp (np.ndarray): PHENOTYPE & SNP of each group
+        """
+        group_index = cls.__new__(cls)
+        group_index.group_id = np.asarray(group_id, dtype='int64')
+        group_index.phenotype = np.asarray(phenotype, dtype='object')
+        group_index.snp = np.asarray(snp, dtype='object')
+        group_index.CreateOffsets()
+
+        return group_index
+
+    def __len__(self):
+        return len(self.phenotype)
+
+    def CreateOffsets(self):
+        """
+        Create the sort order & the CSR offsets from group_id
+        """
+        self.order = np.argsort(self.group_id, kind='stable')
+        self.offsets = np.zeros(len(self.phenotype) + 1, dtype='int64')
+        np.cumsum(np.bincount(self.group_id, minlength=len(self.phenotype)), out=self.offsets[1:])
+
+    def Filter(self, keep):
+        """
+        Keep the study rows selected by the mask & remove the groups of which no study row is left
+
+        Args:
+        keep (np.ndarray): Whether each study row is kept
+
+        Returns:
+        remain (np.ndarray): Whether each (previous) group is left
+        """
+        keep = np.asarray(keep, dtype='bool')
+        remain = np.bincount(self.group_id[keep], minlength=len(self.phenotype)) > 0
+
+        # The remaining groups keep their relative order.
+        relocal = np.cumsum(remain) - 1
+        self.group_id = relocal[self.group_id[keep]]
+        self.phenotype = self.phenotype[remain]
+        self.snp = self.snp[remain]
+        self.CreateOffsets()
+
+        return remain
+
+###################################
+# MetaResult
+###################################
+
+# li_RESULT_FIELD : Fields of the meta-analysis result of each (PHENOTYPE, SNP) - in the column order of the output file
+li_RESULT_FIELD = ['BETA', 'BETA_SE', 'P_VAL', 'BH_P_VAL', 'I_SQUARE', 'Q_HET', 'TAU_CONVERGED', 'TAU_ITERATION']
+
+class MetaResult:
+    def __init__(self, n_group, li_field=li_RESULT_FIELD, path=None):
+        """
+        Initializes a MetaResult object - Contiguous result store of the (PHENOTYPE, SNP) groups, written in place by the stages
+
+        Args:
+        n_group (int): Number of (PHENOTYPE, SNP) groups
+        li_field (list): Names of the fields
+        path (str): Directory of the memory-mapped store (value.npy, valid.npy, field.json), which other processes can open with MetaResult.Open (None: in memory)
+
+        Attributes:
+        value (np.ndarray): float64 array (n_field, n_group) - the values of each field are contiguous (NaN if not valid)
+        valid (np.ndarray): bool array (n_field, n_group) - whether each value is processed (False : 'Unprocessed' in the output file)
+        """
+        self.li_field = list(li_field)
+        self.dict_field = {field: i for i, field in enumerate(self.li_field)}
+        shape = (len(self.li_field), n_group)
+
+        if path is None:
+            self.value = np.full(shape, np.nan)
+            self.valid = np.zeros(shape, dtype='bool')
+
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.value = np.lib.format.open_memmap(os.path.join(path, 'value.npy'), mode='w+', dtype='float64', shape=shape)
+            self.valid = np.lib.format.open_memmap(os.path.join(path, 'valid.npy'), mode='w+', dtype='bool', shape=shape)
+            self.value[:] = np.nan
+
+            with open(os.path.join(path, 'field.json'), 'w') as fp:
+                json.dump(self.li_field, fp)
+
+    @classmethod
+    def Open(cls, path, mode='r'):
+        """
+        Open a memory-mapped store written by another process
+        """
+        result = cls.__new__(cls)
+
+        with open(os.path.join(path, 'field.json')) as fp:
+            result.li_field = json.load(fp)
+
+        result.dict_field = {field: i for i, field in enumerate(result.li_field)}
+        result.value = np.load(os.path.join(path, 'value.npy'), mmap_mode=mode)
+        result.valid = np.load(os.path.join(path, 'valid.npy'), mmap_mode=mode)
+
+        return result
+
+    def __len__(self):
+        return self.value.shape[1]
+
+    def __getitem__(self, field):
+        """
+        Returns:
+        value (np.ndarray): View of the values of the field
+        """
+        return self.value[self.dict_field[field]]
+
+    def SetValue(self, field, value, valid=None):
+        """
+        Write the values of a field in place
+
+        Args:
+        field (str): Name of the field
+        value (np.ndarray): Value of each group
+        valid (np.ndarray): Whether each value is processed (None: every value) - the other values are NaN
+        """
+        i = self.dict_field[field]
+        self.valid[i] = True if valid is None else valid
+        self.value[i] = value
+        self.value[i][~self.valid[i]] = np.nan
+
+    def CreateDataFrame(self, li_field=None):
+        """
+        Wrap the values of the fields (consecutive in li_field) as a data frame without copying them
+
+        Returns:
+        df_result (DataFrame): Columns of the fields
+        """
+        li_field = self.li_field if li_field is None else li_field
+        start = self.dict_field[li_field[0]]
+        assert self.li_field[start:start + len(li_field)] == list(li_field)
+
+        return pd.DataFrame(self.value[start:start + len(li_field)].T, columns=li_field, copy=False)
+
+def CreateMetaResult(df_meta_output, path=None):
+    """
+    Create the result store from the result columns of a merged output data frame - the shard & per-phenotype modes, 
+    of which the workers return data frames
+    
+        Args:
+            df_meta_output (DataFrame): Output data frame (NaN : not processed)
+            path (str): Directory of the memory-mapped store (See MetaResult)
+        
+        Returns:
+            meta_result (MetaResult): Result store in the row order of df_meta_output
+    """
+    meta_result = MetaResult(len(df_meta_output), path=path)
+    
+    for field in li_RESULT_FIELD:
+        if field in df_meta_output.columns:
+            value = df_meta_output[field].to_numpy(dtype='float64')
+            meta_result.SetValue(field, value, ~np.isnan(value))
+    
+    return meta_result
+
+def FormatOutputDataFrame(df_meta_output):
+    """
+    Write 'Unprocessed' for the values which are not processed (NaN) - only when the output file is written
+    
+        Args:
+            df_meta_output (DataFrame): Output data frame
+        
+        Returns:
+            df_meta_output (DataFrame): Copy of the output data frame with Q_HET, I_SQUARE, TAU_CONVERGED & TAU_ITERATION in the format of the output file
+    """
+    df_meta_output = df_meta_output.copy()
+    dict_type = {'I_SQUARE': 'float64', 'Q_HET': 'float64', 'TAU_CONVERGED': 'bool', 'TAU_ITERATION': 'int64'}
+    
+    for column, to_type in dict_type.items():
+        if column in df_meta_output.columns:
+            value = df_meta_output[column].to_numpy(dtype='float64')
+            valid = ~np.isnan(value)
+            formatted = np.full(len(value), 'Unprocessed', dtype='object')
+            formatted[valid] = value[valid].astype(to_type).tolist()
+            df_meta_output[column] = pd.Series(formatted, index=df_meta_output.index, dtype='object')
+    
+    return df_meta_output
+
+###################################
+# Output Writer
+###################################
+
+# dict_OUTPUT_EXTENSION : Extension of each output format
+dict_OUTPUT_EXTENSION = {'excel': '.xlsx', 'tsv': '.tsv', 'tsv.gz': '.tsv.gz', 'csv': '.csv', 'csv.gz': '.csv.gz', 'parquet': '.parquet'}
+
+# EXCEL_MAX_ROW : Maximum number of rows of an Excel worksheet (with the header)
+EXCEL_MAX_ROW = 1048576
+
+def DetectOutputFormat(path):
+    """
+    Detect the output format from the extension of the output file (TSV if unknown)
+    """
+    path = path.lower()
+    
+    for output_format, extension in sorted(dict_OUTPUT_EXTENSION.items(), key=lambda item: -len(item[1])):
+        if path.endswith(extension):
+            return output_format
+    
+    if path.endswith('.xls'):
+        return 'excel'
+    
+    return 'tsv.gz' if path.endswith('.gz') else 'tsv'
+
+def FormatParquetDataFrame(df_meta_output):
+    """
+    Parquet keeps the values which are not processed as null - TAU_CONVERGED & TAU_ITERATION become nullable boolean & integer columns
+    """
+    df_meta_output = df_meta_output.copy()
+    
+    if 'TAU_CONVERGED' in df_meta_output.columns:
+        df_meta_output['TAU_CONVERGED'] = df_meta_output['TAU_CONVERGED'].astype('boolean')
+    
+    if 'TAU_ITERATION' in df_meta_output.columns:
+        df_meta_output['TAU_ITERATION'] = df_meta_output['TAU_ITERATION'].astype('Int64')
+    
+    return df_meta_output
+
+def CreateParquetSchema(df_meta_output):
+    """
+    Arrow schema of the Parquet output from the dtypes of the columns - the object (& string) columns are always strings
+    (so that a column which is all null in the first chunk, e.g. CLUMP, does not become the null type)
+    """
+    import pyarrow as pa
+    
+    schema = pa.Schema.from_pandas(df_meta_output, preserve_index=False)
+    
+    for i, column in enumerate(schema.names):
+        dtype = df_meta_output[column].dtype
+        
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            schema = schema.set(i, pa.field(column, pa.string()))
+    
+    return schema
+
+class OutputWriter:
+    def __init__(self, path, output_format=None):
+        """
+        Initializes an OutputWriter object - Chunked writer of the output file (TSV/CSV, optionally gzip, or Parquet)
+
+        Args:
+        path (str): Path of the output file
+        output_format (str): One of dict_OUTPUT_EXTENSION except 'excel' (None: detected from the extension)
+        """
+        self.path = path
+        self.output_format = DetectOutputFormat(path) if output_format is None else output_format
+        self.fp = None
+        self.parquet_writer = None
+        self.parquet_schema = None
+        self.n_row = 0
+
+        if self.output_format == 'excel':
+            raise ValueError(f"The Excel output is not written in chunks (Please use one of {', '.join(list(dict_OUTPUT_EXTENSION)[1:])})")
+
+    def Write(self, df_chunk):
+        """
+        Append the rows of a chunk of the output data frame (the header is written with the first chunk)
+        """
+        if self.output_format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+            except ImportError:
+                raise ImportError("The Parquet output requires pyarrow (pip install pyarrow)")
+
+            df_chunk = FormatParquetDataFrame(df_chunk)
+
+            # The schema is built once from the dtypes, so every chunk is converted to the same column types.
+            if self.parquet_writer is None:
+                self.parquet_schema = CreateParquetSchema(df_chunk)
+                self.parquet_writer = pq.ParquetWriter(self.path, self.parquet_schema)
+
+            self.parquet_writer.write_table(pa.Table.from_pandas(df_chunk, schema=self.parquet_schema, preserve_index=False))
+
+        else:
+            if self.fp is None:
+                # The fast compression level keeps the gzip output close to the speed of the plain text.
+                self.fp = gzip.open(self.path, 'wt', compresslevel=1, newline='') if self.output_format.endswith('.gz') else open(self.path, 'w', newline='')
+
+            sep = ',' if self.output_format.startswith('csv') else '\t'
+            FormatOutputDataFrame(df_chunk).to_csv(self.fp, sep=sep, index=False, header=(self.n_row == 0))
+
+        self.n_row += len(df_chunk)
+
+    def Close(self):
+        if self.fp is not None:
+            self.fp.close()
+
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+def WriteOutputFile(df_meta_output, path, output_format=None, chunksize=1000000):
+    """
+    Write the output data frame - Excel at once, the other formats in chunks of rows (slices without a copy of the whole data frame)
+    
+        Args:
+            df_meta_output (DataFrame): Output data frame
+            path (str): Path of the output file
+            output_format (str): One of dict_OUTPUT_EXTENSION (None: detected from the extension)
+            chunksize (int): Number of rows written at once
+    """
+    output_format = DetectOutputFormat(path) if output_format is None else output_format
+    
+    if output_format == 'excel':
+        FormatOutputDataFrame(df_meta_output).to_excel(path)
+        return
+    
+    writer = OutputWriter(path, output_format)
+    
+    try:
+        for start in range(0, max(len(df_meta_output), 1), chunksize):
+            writer.Write(df_meta_output.iloc[start:start + chunksize])
+    
+    finally:
+        writer.Close()
+
+###################################
+# Stages
+###################################
+
+# Meta-analysis stages (method names of BetaMeta) in the order of the run - every mode runs them through these lists
+# li_INPUT_STAGE : Deduplication & BETA of the study rows
+# li_HARMONIZE_STAGE : Effect direction correction & index of the (PHENOTYPE, SNP) pairs
+# li_COMBINE_STAGE : Sufficient statistics of each pair (AddStudyData & ReduceData enter after it)
+# li_RESULT_STAGE : Heterogeneity, random effect model, p-value & output data frame
+li_INPUT_STAGE = ['DeduplicateData', 'CalculateBeta']
+li_HARMONIZE_STAGE = ['CorrectEffectDirection']
+li_COMBINE_STAGE = ['CalculateWeightedAverageEffectSize']
+li_RESULT_STAGE = ['CalculateQstatistic', 'CalculateHeterogeneityMetric', 'CalculateRandomEffectModel', 'CalculateIntegratedPvalue', 'CreateOutputDataFrame']
+li_META_STAGE = li_INPUT_STAGE + li_HARMONIZE_STAGE + li_COMBINE_STAGE + li_RESULT_STAGE
+
 ###################################
 # MainClass
 ###################################
 
-class BetaMeta:
-    def __init__(self, fplog=None):
+class BetaMeta:
+    def __init__(self, fplog=None, tau_method='DL', li_p_adjust=None, chunksize=1000000, n_worker=None, cache_dir=None, cache_max_bytes=10*1024**3, excel_reader='pandas', 
+                 n_shard=None, shard_dir=None, stats_dir=None, float32=False, result_dir=None, output_path=None, output_format=None, 
+                 forest_plot=True, li_forest_phenotype=None, forest_p_threshold=None, forest_top_n=None, forest_page_rows=50, forest_max_page=20, 
+                 manhattan_qq_plot=True, plot_exact_p=1e-3, clump_ld_dir=None, clump_ld_file=None, clump_r2=0.0, clump_p1=1.0, clump_p2=1.0):
+        """
+        Initializes a BetaMeta object.
+
+        Args:
+        fplog: Log file object (None: print only)
+        chunksize (int): Number of rows parsed at once from the TSV/CSV/gzip input files
+        n_worker (int): Number of worker processes reading the input files, calculating the shards or the phenotypes (None: number of CPUs)
+        cache_dir (str): Directory of the parsed input cache (None: no cache)
+        cache_max_bytes (int): Maximum size of the cache directory - the least recently used entries are removed beyond it
+        excel_reader (str): 'pandas' (pd.read_excel of the first worksheet) or 'stream' (row-by-row read-only openpyxl of all worksheets)
+        n_shard (int): Number of on-disk shards of the out-of-core mode (See ShardData & CalculateShardData)
+        shard_dir (str): Directory of the on-disk shards (None: {current directory}/shard/)
+        stats_dir (str): Directory of the sufficient statistics store (See SaveStatistics & AddStudyData)
+        float32 (bool): Keep BETA & BETA_SE of the study rows in float32 (See EncodeInputData)
+        result_dir (str): Directory of the memory-mapped result store (None: in memory, See MetaResult)
+        output_path (str): Path of the output file (None: {current directory}/output/meta_output + the extension of output_format)
+        output_format (str): One of dict_OUTPUT_EXTENSION (None: detected from output_path, Excel by default)
+        forest_plot (bool): Draw the forest plot (See SelectForestPlotRow & DrawForestPlot)
+        li_forest_phenotype (list): Phenotypes of the forest plot (None: all)
+        forest_p_threshold (float): Only the pairs with P_VAL <= forest_p_threshold in the forest plot (None: all)
+        forest_top_n (int): Only the forest_top_n pairs of the smallest P_VAL in the forest plot (None: all)
+        forest_page_rows (int): Number of pairs in each image of the forest plot
+        forest_max_page (int): Maximum number of the images of the forest plot - only the pairs of the smallest P_VAL beyond it (None: all)
+        manhattan_qq_plot (bool): Draw the Manhattan plot & the QQ plot of P_VAL (See SaveManhattanQQPlot)
+        plot_exact_p (float): The pairs with P_VAL <= plot_exact_p are drawn exactly, the others are binned
+        clump_ld_dir (str): Directory of the correlated_with_{rsID}.txt files of Beta_Meta_LD for the clumping (See ClumpData)
+        clump_ld_file (str): File of the LD pairs (SNP_A & SNP_B columns, e.g. the .ld file of plink --r2) for the clumping (See ReadLDPairFile)
+        clump_r2 (float): Minimum R2 of the LD pairs of clump_ld_file (if it has the R2 column)
+        clump_p1 (float): Maximum P_VAL of the lead SNPs
+        clump_p2 (float): Maximum P_VAL of the clumped SNPs
+        tau_method (str): Estimator of the between-study variance of the Random Effect Model - 'DL' (DerSimonian-Laird), 'REML' or 'PM' (Paule-Mandel)
+        li_p_adjust (list): P-value adjustments written in addition to BH - 'BONFERRONI', 'BY' (Benjamini-Yekutieli)
+        """                
+        
+        self.__fplog=fplog
+        self.tau_method = tau_method
+        self.li_p_adjust = [] if li_p_adjust is None else list(li_p_adjust)
+        self.chunksize = chunksize
+        self.n_worker = os.cpu_count() if n_worker is None else n_worker
+        self.path_meta_cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.excel_reader = excel_reader
+        self.n_shard = n_shard
+        curdir = os.path.abspath('')
+        
+        ###input
+        self.path_meta_data_dir = f"{curdir}/input/"   
+        self.df_meta_input = None
+                      
+        ###output
+        self.output_format = output_format
+        
+        if output_path is None:
+            output_path = f"{curdir}/output/meta_output" + dict_OUTPUT_EXTENSION['excel' if output_format is None else output_format]
+        
+        if self.output_format is None:
+            self.output_format = DetectOutputFormat(output_path)
+        
+        self.path_meta_output = output_path
+        self.path_meta_forestplot_output = f"{curdir}/output/meta_forestplot.png" 
+        self.forest_plot = forest_plot
+        self.li_forest_phenotype = li_forest_phenotype
+        self.forest_p_threshold = forest_p_threshold
+        self.forest_top_n = forest_top_n
+        self.forest_page_rows = forest_page_rows
+        self.forest_max_page = forest_max_page
+        self.path_meta_manhattan_output = f"{curdir}/output/meta_manhattan.png" 
+        self.path_meta_qq_output = f"{curdir}/output/meta_qq.png" 
+        self.manhattan_qq_plot = manhattan_qq_plot
+        self.plot_exact_p = plot_exact_p
+
+        ###clumping
+        self.path_clump_ld_dir = clump_ld_dir
+        self.path_clump_ld_file = clump_ld_file
+        self.clump_r2 = clump_r2
+        self.clump_p1 = clump_p1
+        self.clump_p2 = clump_p2
+        
+        # The streaming mode writes the output in chunks, which an Excel worksheet does not allow.
+        self.path_meta_stream_output = output_path if self.output_format != 'excel' else f"{curdir}/output/meta_output.tsv.gz" 
+
+        ###shard
+        self.path_meta_shard_dir = f"{curdir}/shard/" if shard_dir is None else shard_dir
+        self.path_meta_shard_run_dir = None
+        self.li_shard_dir_created = []
+
+        ###in-memory representation
+        self.float_dtype = 'float32' if float32 else 'float64'
+
+        ###statistics store
+        self.path_meta_stats_dir = stats_dir
+        self.li_study = None
+        # df_partial_group, df_partial_study : Merged partial files of ReduceData (stored by SaveStatistics)
+        self.df_partial_group = None
+        self.df_partial_study = None
+        
+        ## Dataframe to calculate
+        self.df_meta_output = None
+        
+        ## Lists used for calculation
+        self.file_list = None
+        self.li_column = None
+        self.group_index = None
+        self.li_EFFECT_ALLELE = None
+        self.li_NON_EFFECT_ALLELE = None
+        self.meta_result = None
+        self.path_meta_result = result_dir
+        
+        ## Arrays used for calculation
+        self.dict_meta_stat = None
+        
+    def RunStage(self, li_stage):
+        """
+        Run the stages (See li_META_STAGE) in order
+        """
+        for stage in li_stage:
+            getattr(self, stage)()
+
+    def ConcatData(self, li_path_study=None): 
+        """
+        Column Extraction & Concat the Dataframes 
+
+        Args:
+        li_path_study (list): Paths of the input files (None: every file in the Input Folder)
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # file_list : List of File name in the Input Folder   
+            if li_path_study is None:
+                self.file_list = os.listdir(self.path_meta_data_dir)           
+                li_path = [self.path_meta_data_dir + file for file in self.file_list]
+
+            else:
+                self.file_list = [os.path.basename(path) for path in li_path_study]
+                li_path = list(li_path_study)
+            
+            # li_column : List of column name in the Input File
+            self.li_column = list(li_INPUT_COLUMN)
+            # Excel workbooks & TSV/CSV (gzip/bgzip) summary statistics are read in the same columns - in parallel over the studies
+            # Unchanged studies are loaded from the cache (path_meta_cache_dir) without being parsed again
+            n_worker = max(1, min(self.n_worker, len(li_path)))
+            li_argument = [li_path, [self.li_column]*len(li_path), [self.chunksize]*len(li_path), [self.path_meta_cache_dir]*len(li_path), [self.excel_reader]*len(li_path)]
+
+            if n_worker > 1:
+                with ProcessPoolExecutor(max_workers=n_worker) as executor:
+                    li_result = list(executor.map(ReadStudyFile, *li_argument))
+
+            else:
+                li_result = list(map(ReadStudyFile, *li_argument))
+
+            li_df_meta_input_data = [LoadStudyFile(result, path, self.float_dtype) for result, path in zip(li_result, li_path)]
+
+            if (self.path_meta_cache_dir is not None) and os.path.isdir(self.path_meta_cache_dir):
+                li_removed = EvictCache(self.path_meta_cache_dir, self.cache_max_bytes)
+
+                if len(li_removed) > 0:
+                    WriteLog(myNAME, f"{len(li_removed)} cache entries are removed", type='INFO', fplog=self.__fplog)
+
+            for df_meta_input_data in li_df_meta_input_data:
+                if df_meta_input_data is None:
+                    print('Please check the columns of the input file! (Ex, PHENOTYPE, SNP, EFFECT_ALLELE, NON_EFFECT_ALLELE, BETA, BETA_SE, OR, OR_95%CI_LOWER, OR_95%CI_UPPER, P_VAL)')  
+                    sys.exit()  
+
+            # df_meta_input : Data frame of Input Files to be Meta-Analyzed (STUDY : File name of the study)
+            if len(li_df_meta_input_data) > 0:
+                self.df_meta_input = ConcatInputData(li_df_meta_input_data)
+
+            else:
+                self.df_meta_input = pd.DataFrame(columns = self.li_column + ['STUDY'])
+        
+        
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg        
+        
+    def DeduplicateData(self): 
+        """
+        Deduplication - df_meta_input (The spaces are removed by EncodeInputData.)
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            self.df_meta_input = self.df_meta_input.drop_duplicates(self.li_column)
+
+            if (EncodeAllele(self.df_meta_input['EFFECT_ALLELE']) >= len(li_ALLELE)).any() | (EncodeAllele(self.df_meta_input['NON_EFFECT_ALLELE']) >= len(li_ALLELE)).any():
+                print('Check the values of EFFECT_ALLELE and NON_EFFECT_ALLELE. The values should be in the form of (A, G, T, C)!')
+        
+        
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg           
+
+    def CalculateBeta(self): 
+        """
+        Calculate BETA & BETA_SE from Odds ratio & 95% CI
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # or_ok : Whether (OR, OR_95%CI_LOWER, OR_95%CI_UPPER) are all written - BETA & BETA_SE are calculated from them
+            # The other rows keep (BETA, BETA_SE) of the input.
+
+            odds_ratio = self.df_meta_input['OR'].to_numpy(dtype='float64')
+            or_lower = self.df_meta_input['OR_95%CI_LOWER'].to_numpy(dtype='float64')
+            or_upper = self.df_meta_input['OR_95%CI_UPPER'].to_numpy(dtype='float64')
+            or_ok = ~(np.isnan(odds_ratio) | np.isnan(or_lower) | np.isnan(or_upper))
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                beta = np.where(or_ok, np.log(odds_ratio), self.df_meta_input['BETA'].to_numpy(dtype='float64'))
+                beta_se = np.where(or_ok, (np.log(or_upper) - np.log(or_lower))/3.92, self.df_meta_input['BETA_SE'].to_numpy(dtype='float64'))
+
+            self.df_meta_input['BETA'] = beta.astype(self.float_dtype)
+            self.df_meta_input['BETA_SE'] = beta_se.astype(self.float_dtype)
+        
+            # Remove the NaN Data & Unnecessary Columns - df_meta_input
+            self.df_meta_input = self.df_meta_input.drop(['OR', 'OR_95%CI_LOWER', 'OR_95%CI_UPPER'], axis=1)
+            self.df_meta_input = self.df_meta_input.dropna()      
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg   
+
+    def CorrectEffectDirection(self): 
+        """
+        Correct the Effect Direction 
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # Create the index of the (PHENOTYPE, SNP) groups - shared by the following stages
+            # group_index : GroupIndex of Phenotype & SNP 
+
+            self.group_index = GroupIndex(self.df_meta_input['PHENOTYPE'], self.df_meta_input['SNP'])
+
+            # Effect Direction Correction
+            # li_EFFECT_ALLELE : List of Effect Allele corresponding to group_index
+            # li_NON_EFFECT_ALLELE : List of Non-Effect Allele corresponding to group_index
+
+            self.df_meta_input['P_VAL'] = self.df_meta_input['P_VAL'].astype('float64')
+
+            group_id = self.group_index.group_id
+            effect_allele = EncodeAllele(self.df_meta_input['EFFECT_ALLELE'])
+            non_effect_allele = EncodeAllele(self.df_meta_input['NON_EFFECT_ALLELE'])
+
+            # For EA and NEA, the smallest p-value is the standard.
+            ref_row, sign = HarmonizeEffectDirection(group_id, effect_allele, non_effect_allele, 
+                                                     self.df_meta_input['P_VAL'].to_numpy(dtype='float64'), len(self.group_index))
+
+            self.li_EFFECT_ALLELE = DecodeAllele(effect_allele[ref_row]).tolist()
+            self.li_NON_EFFECT_ALLELE = DecodeAllele(non_effect_allele[ref_row]).tolist()
+
+            # Flip the sign of the opposite studies & Remove the studies which are not combined - in a single masked operation
+            keep = sign != 0
+            group_id = group_id[keep]
+
+            self.df_meta_input = self.df_meta_input[keep].copy()
+            self.df_meta_input['EFFECT_ALLELE'] = effect_allele[ref_row][group_id]
+            self.df_meta_input['NON_EFFECT_ALLELE'] = non_effect_allele[ref_row][group_id]
+            self.df_meta_input['BETA'] = self.df_meta_input['BETA'].to_numpy() * sign[keep]
+
+            # Remove the (PHENOTYPE, SNP) pairs of which no study is left (e.g. the alleles of the reference study are not one of "A, G, T, C")
+            remain = self.group_index.Filter(keep)
+
+            if not remain.all():
+                self.li_EFFECT_ALLELE = [allele for allele, flag in zip(self.li_EFFECT_ALLELE, remain.tolist()) if flag]
+                self.li_NON_EFFECT_ALLELE = [allele for allele, flag in zip(self.li_NON_EFFECT_ALLELE, remain.tolist()) if flag]
+    
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg  
+
+    def CalculateWeightedAverageEffectSize(self): 
+        """
+        Calculate the Weighted average of the effect sizes 
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # Calculation - Group statistics of all (PHENOTYPE, SNP) pairs at once
+            # dict_meta_stat : Dictionary of arrays corresponding to group_index (See CalculateGroupStatistics)
+
+            self.dict_meta_stat = CalculateGroupStatistics(self.group_index.group_id, 
+                                                           self.df_meta_input['BETA'].to_numpy(dtype='float64'), 
+                                                           self.df_meta_input['BETA_SE'].to_numpy(dtype='float64'), 
+                                                           self.df_meta_input['P_VAL'].to_numpy(dtype='float64'), 
+                                                           len(self.group_index))
+
+            # Calculation - Weighted average of the effect sizes 
+            # meta_result : Result store corresponding to group_index - BETA : Weighted average of the effect sizes, BETA_SE : its Standard Error
+
+            self.meta_result = MetaResult(len(self.group_index), path=self.path_meta_result)
+            self.meta_result.SetValue('BETA', self.dict_meta_stat['BETA_META'])
+            self.meta_result.SetValue('BETA_SE', self.dict_meta_stat['STD_BETA_META'])
+    
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg  
+
+    def CalculateQstatistic(self): 
+        """
+        Heterogeniety Test - Calculate the Cochran's Q statistic
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # Heterogeniety Test 
+            # Calculation - Cochran's Q statistic
+            # Q_HET : Cochran's Q statistic (not valid for the groups of a single study)
+
+            self.meta_result.SetValue('Q_HET', self.dict_meta_stat['Q'], self.dict_meta_stat['Q_PROCESSED'])
+    
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg  
+
+    def CalculateHeterogeneityMetric(self): 
+        """
+        Heterogeniety Test - Calculate the Higgin's heterogeneity metric
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # Calculation - Higgin's heterogeneity metric
+            # I_SQUARE : Higgin's heterogeneity metric (not valid for the groups of a single study or Q = 0)
+
+            self.meta_result.SetValue('I_SQUARE', self.dict_meta_stat['I_SQUARE'], self.dict_meta_stat['I_SQUARE_PROCESSED'])
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg  
+
+    def CalculateRandomEffectModel(self): 
+        """
+        Random Effect Model - Calculate the Weighted average of the effect sizes 
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # Calculation - Weighted average of the effect sizes Modification - Random Effect Model
+            # BETA, BETA_SE : Weighted average of the effect sizes & its Standard Error corrected by a Random Effect Model (in place)
+
+            # The Random Effect Model is applied to the groups with I_SQUARE >= 50.
+
+            random = self.dict_meta_stat['I_SQUARE_PROCESSED'].copy()
+            random[random] = self.dict_meta_stat['I_SQUARE'][random] >= 50
+
+            group_id = self.group_index.group_id
+
+            beta = self.df_meta_input['BETA'].to_numpy(dtype='float64')
+            beta_se = self.df_meta_input['BETA_SE'].to_numpy(dtype='float64')
+
+            # Calculation - Between-study variance (tau^2)
+            # TAU_CONVERGED : Whether the iterative tau^2 estimator converged (valid for the groups of the Random Effect Model)
+            # TAU_ITERATION : Number of iterations of the tau^2 estimator
+
+            tau_square = CalculateTauSquareDL(self.dict_meta_stat['SUM_W'], self.dict_meta_stat['SUM_W_SQUARE'], 
+                                              self.dict_meta_stat['Q'], self.dict_meta_stat['COUNT'], random)
+            converged = random.copy()
+            n_iter = np.zeros(len(random), dtype='int64')
+
+            if self.tau_method != 'DL':
+                tau_square, converged, n_iter = CalculateTauSquareIterative(group_id, beta, beta_se, random, 
+                                                                            method=self.tau_method, tau_square_init=tau_square)
+
+                if not converged[random].all():
+                    WriteLog(myNAME, f"tau^2 did not converge for {(~converged[random]).sum()} groups", type='WARNING', fplog=self.__fplog)
+
+            beta_random, std_beta_random = CalculateRandomEffectArray(group_id, beta, beta_se, tau_square, random)
+
+            self.dict_meta_stat['RANDOM'] = random
+            self.dict_meta_stat['TAU_SQUARE'] = tau_square
+            self.dict_meta_stat['TAU_CONVERGED'] = converged
+            self.dict_meta_stat['TAU_ITERATION'] = n_iter
+
+            self.meta_result.SetValue('TAU_CONVERGED', converged, random)
+            self.meta_result.SetValue('TAU_ITERATION', n_iter, random)
+
+            np.copyto(self.meta_result['BETA'], beta_random, where=random)
+            np.copyto(self.meta_result['BETA_SE'], std_beta_random, where=random)
+
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg  
+
+    def CalculateIntegratedPvalue(self): 
         """
-        Initializes a BetaMeta object.
-        """                
+        Calculate the Integrated P-value 
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
         
-        self.__fplog=fplog
-        curdir = os.path.abspath('')
+        rv = True
+        rvmsg = "Success"
         
-        ###input
-        self.path_meta_data_dir = f"{curdir}/input/"   
-        self.df_meta_input = None
-                      
-        ###output
-        self.path_meta_output = f"{curdir}/output/meta_output.xlsx" 
-        self.path_meta_forestplot_output = f"{curdir}/output/meta_forestplot.png" 
+        try: 
+            # Calculation - Integrated P-value 
+            # P_VAL : P-value corresponding to group_index
+
+            # The Z score is recalculated since BETA & BETA_SE may be corrected by a Random Effect Model.
+
+            z, p_value = CalculateIntegratedPvalueArray(self.meta_result['BETA'], self.meta_result['BETA_SE'], 
+                                                        self.dict_meta_stat['I_SQUARE_PROCESSED'], 
+                                                        self.df_meta_input['P_VAL'].to_numpy(dtype='float64'), 
+                                                        self.dict_meta_stat['FIRST_ROW'])
+
+            self.dict_meta_stat['Z'] = z
+            self.dict_meta_stat['P_VALUE'] = p_value
+            self.meta_result.SetValue('P_VAL', p_value)
+
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg  
+
+    def CreateOutputDataFrame(self): 
+        """
+        Create an Output DataFrame - df_meta_output
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
         
-        ## Dataframe to calculate
-        self.df_meta_output = None
+        rv = True
+        rvmsg = "Success"
         
-        ## Lists used for calculation
-        self.file_list = None
-        self.li_column = None
-        self.li_PHENOTYPE_SNP = None
-        self.li_EFFECT_ALLELE = None
-        self.li_NON_EFFECT_ALLELE = None
-        self.li_BETA_META = None
-        self.li_STD_BETA_META = None
-        self.li_Q = None
-        self.li_I_SQUARE = None
-        self.li_P_VALUE = None
+        try: 
+            # Output file - Meta Analysis
+            # df_meta_output : Data Frame of Meta-analysis Result Ouput File
+
+            # The result columns wrap meta_result without a copy (The values which are not processed are NaN.)
+            # The convergence of the iterative tau^2 estimators is reported next to I_SQUARE & Q_HET.
+            li_field = li_RESULT_FIELD if self.tau_method != 'DL' else li_RESULT_FIELD[:li_RESULT_FIELD.index('TAU_CONVERGED')]
+
+            self.df_meta_output = self.meta_result.CreateDataFrame(li_field)
+            self.df_meta_output.insert(0, 'PHENOTYPE', self.group_index.phenotype)
+            self.df_meta_output.insert(1, 'SNP', self.group_index.snp)
+            self.df_meta_output.insert(2, 'EFFECT_ALLELE', self.li_EFFECT_ALLELE)
+            self.df_meta_output.insert(3, 'NON_EFFECT_ALLELE', self.li_NON_EFFECT_ALLELE)
+
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg 
+
+    def CorrectPvalue(self): 
+        """
+        BH adjustment - Correct the P-value
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            # P-value Correction - BH adjustment (+ li_p_adjust) within each phenotype
+            # df_meta_output : Data Frame of Meta-analysis Result Ouput File
+
+            phenotype_id = pd.factorize(self.df_meta_output['PHENOTYPE'])[0]
+            li_method = ['BH'] + [method for method in self.li_p_adjust if method != 'BH']
+
+            dict_adjusted = AdjustPvalue(phenotype_id, self.df_meta_output['P_VAL'].to_numpy(dtype='float64'), li_method)
+
+            self.df_meta_output['BH_P_VAL'] = dict_adjusted['BH']
+
+            if self.meta_result is not None:
+                self.meta_result.SetValue('BH_P_VAL', dict_adjusted['BH'])
+
+            for i, method in enumerate(li_method[1:]):
+                self.df_meta_output.insert(self.df_meta_output.columns.get_loc('BH_P_VAL') + 1 + i, f"{method}_P_VAL", dict_adjusted[method])
+
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg 
+
+    def ClumpData(self): 
+        """
+        LD-based clumping - mark the independent lead SNPs & the SNPs clumped with them within each phenotype (See CalculateClump)
+
+        The LD partners are read from the correlated_with_{rsID}.txt files of path_clump_ld_dir (written by Beta_Meta_LD), 
+        or from the LD pair file path_clump_ld_file.
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
         
-    def ConcatData(self): 
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            p_val = self.df_meta_output['P_VAL'].to_numpy(dtype='float64')
+            phenotype_id = pd.factorize(self.df_meta_output['PHENOTYPE'])[0]
+            snp_id, li_snp = pd.factorize(self.df_meta_output['SNP'].astype('str'))
+
+            if self.path_clump_ld_dir is not None:
+                ld_snp_a, ld_snp_b = ReadLDIndex(self.path_clump_ld_dir)
+
+            else:
+                ld_snp_a, ld_snp_b = ReadLDPairFile(self.path_clump_ld_file, self.clump_r2)
+
+            # The LD pairs of the SNPs which are not in the output are dropped.
+            ld_id_a = pd.Index(li_snp).get_indexer(ld_snp_a)
+            ld_id_b = pd.Index(li_snp).get_indexer(ld_snp_b)
+            select = (ld_id_a >= 0) & (ld_id_b >= 0)
+
+            clump, lead_row = CalculateClump(phenotype_id, snp_id, p_val, ld_id_a[select], ld_id_b[select], len(li_snp), self.clump_p1, self.clump_p2)
+
+            self.df_meta_output['CLUMP'] = pd.Series(np.array([np.nan, 'LEAD', 'CLUMPED'], dtype='object')[clump], index=self.df_meta_output.index, dtype='object')
+            lead_snp = np.full(len(clump), np.nan, dtype='object')
+            lead_snp[lead_row >= 0] = li_snp.to_numpy()[snp_id[lead_row[lead_row >= 0]]]
+            self.df_meta_output['LEAD_SNP'] = lead_snp
+
+            WriteLog(myNAME, f"{(clump == 1).sum()} lead SNPs & {(clump == 2).sum()} clumped SNPs from {select.sum()} LD pairs", type='INFO', fplog=self.__fplog)
+            
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg 
+
+    def SaveStatistics(self): 
         """
-        Column Extraction & Concat the Dataframes 
+        Persist the sufficient statistics of each (PHENOTYPE, SNP, allele class) of the studies into path_meta_stats_dir 
+        as a new statistics store - used by AddStudyData
+        Runs after DeduplicateData & CalculateBeta, or after ReduceData (the merged partial files are stored).
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            if self.df_partial_group is not None:
+                df_group, df_study = self.df_partial_group, self.df_partial_study
+
+            else:
+                df_group, df_study = CreatePartial(self.df_meta_input)
+
+            li_study = list(dict.fromkeys(self.li_study if self.li_study is not None else self.file_list))
+
+            WriteStatisticsStore(self.path_meta_stats_dir, df_group, df_study, li_study)
+        
+        
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg        
+
+    def AddStudyData(self, li_path_study): 
+        """
+        Incremental mode - Add new studies to the sufficient statistics of path_meta_stats_dir without reading the previous studies again
+        
+        Only the partial of the new studies (See CreatePartial) is written into the store as a new segment. It is merged with the stored 
+        allele classes, which keep their own reference alleles, and the reference of each pair is selected as in ReduceData - so a new study 
+        with a smaller p-value becomes the reference as in the full meta-analysis. The following stages (CalculateQstatistic ~ CorrectPvalue) 
+        then run as in the full meta-analysis.
+        The files which are already in the store are skipped. Duplicated rows between the new and the stored studies are not removed, 
+        since the raw rows of the stored studies are not kept.
+
+        Args:
+        li_path_study (list): Paths of the new input files
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            df_group, df_study, self.li_study = ReadStatisticsStore(self.path_meta_stats_dir)
+
+            # A file of the store (or given twice) would be summed twice.
+            li_path_new = []
+
+            for path in li_path_study:
+                if os.path.basename(path) in self.li_study + [os.path.basename(path_new) for path_new in li_path_new]:
+                    WriteLog(myNAME, f"{os.path.basename(path)} is already in the statistics store - skipped", type='WARNING', fplog=self.__fplog)
+
+                else:
+                    li_path_new.append(path)
+
+            # Read, Deduplicate & Calculate BETA of the new studies only
+            if len(li_path_new) > 0:
+                self.ConcatData(li_path_new)
+                self.RunStage(li_INPUT_STAGE)
+
+                df_group_new, df_study_new = CreatePartial(self.df_meta_input)
+                AppendStatisticsStore(self.path_meta_stats_dir, df_group_new, df_study_new, self.file_list)
+
+                df_group, df_study = MergePartial([df_group, df_group_new], [df_study, df_study_new])
+                self.li_study = self.li_study + self.file_list
+
+            df_group, df_study = SelectPartialReference(df_group, df_study)
+            self.LoadStatistics(df_group, df_study)
+        
+        
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg        
+
+    def LoadStatistics(self, df_group, df_study): 
+        """
+        Set the pairs, the harmonized studies & the fixed-effect statistics from the sufficient statistics (See WriteStatisticsStore)
+        - The following stages (CalculateQstatistic ~ CorrectPvalue) then run as in the full meta-analysis.
+
+        Args:
+        df_group (DataFrame): One row per (PHENOTYPE, SNP) with at least one study
+        df_study (DataFrame): Harmonized studies (GROUP : row of df_group)
+
+        Returns:
+        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
+        and message is a string containing a success or error message.
+        """          
+        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
+        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+        
+        rv = True
+        rvmsg = "Success"
+        
+        try: 
+            self.group_index = GroupIndex.FromGroupId(df_study['GROUP'].to_numpy(dtype='int64'), 
+                                                      df_group['PHENOTYPE'].to_numpy(dtype='object'), df_group['SNP'].to_numpy(dtype='object'))
+            self.li_EFFECT_ALLELE = df_group['EFFECT_ALLELE'].tolist()
+            self.li_NON_EFFECT_ALLELE = df_group['NON_EFFECT_ALLELE'].tolist()
+            group_id = self.group_index.group_id
+
+            self.df_meta_input = pd.DataFrame({'PHENOTYPE': self.group_index.phenotype[group_id], 
+                                               'SNP': self.group_index.snp[group_id], 
+                                               'EFFECT_ALLELE': np.asarray(self.li_EFFECT_ALLELE, dtype='object')[group_id], 
+                                               'NON_EFFECT_ALLELE': np.asarray(self.li_NON_EFFECT_ALLELE, dtype='object')[group_id], 
+                                               'BETA': df_study['BETA'].to_numpy(dtype='float64'), 
+                                               'BETA_SE': df_study['BETA_SE'].to_numpy(dtype='float64'), 
+                                               'P_VAL': df_study['P_VAL'].to_numpy(dtype='float64'), 
+                                               'STUDY': df_study['STUDY'].to_numpy(dtype='object')})
+
+            # Calculation - Weighted average of the effect sizes & Q from the sufficient statistics
+            first_row = self.group_index.order[self.group_index.offsets[:-1]]
+
+            self.dict_meta_stat = CalculateGroupStatisticsFromSums(df_group['SUM_W'].to_numpy(), df_group['SUM_W_BETA'].to_numpy(), 
+                                                                   df_group['SUM_W_BETA_SQUARE'].to_numpy(), df_group['SUM_W_SQUARE'].to_numpy(), 
+                                                                   df_group['COUNT'].to_numpy(), self.df_meta_input['P_VAL'].to_numpy(dtype='float64'), first_row)
+
+            self.meta_result = MetaResult(len(self.group_index), path=self.path_meta_result)
+            self.meta_result.SetValue('BETA', self.dict_meta_stat['BETA_META'])
+            self.meta_result.SetValue('BETA_SE', self.dict_meta_stat['STD_BETA_META'])
+        
+        
+        except Exception as e:
+            print(str(e))
+            rv = False
+            rvmsg = str(e)
+            print(f"Error has occurred in the {myNAME} process") 
+            sys.exit()
+    
+        return rv, rvmsg        
+
+    def MapData(self, path_partial, li_path_study=None, part=None): 
+        """
+        Map/Reduce mode - Save the harmonized sufficient statistics of a subset of the studies and/or of the (PHENOTYPE, SNP) pairs 
+        into a partial file (See CreatePartial)
+
+        Args:
+        path_partial (str): Directory of the partial file
+        li_path_study (list): Paths of the input files (None: every file in the Input Folder)
+        part (tuple): (k, n) - Only the pairs of the k-th (0 ~ n-1) of n hash partitions (None: every pair)
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -145,27 +2414,15 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            # file_list : List of File name in the Input Folder   
-            self.file_list = os.listdir(self.path_meta_data_dir)           
-            
-            # li_column : List of column name in the Input File
-            self.li_column = ['PHENOTYPE', 'SNP', 'EFFECT_ALLELE', 'NON_EFFECT_ALLELE', 'BETA', 'BETA_SE', 'OR', 'OR_95%CI_LOWER', 'OR_95%CI_UPPER', 'P_VAL']
-            # df_meta_input : Data frame of Input Files to be Meta-Analyzed
-            self.df_meta_input = pd.DataFrame(columns = self.li_column)
-            
-            for file in self.file_list:
-                path_meta_data = self.path_meta_data_dir + file
-                df_meta_input_data = pd.read_excel(path_meta_data)
+            self.ConcatData(li_path_study)
 
-                if set(self.li_column).issubset(set(list(df_meta_input_data.columns))):
-                    df_meta_input_data = df_meta_input_data.loc[:, self.li_column]
-                    df_meta_input_data = df_meta_input_data.replace({'EFFECT_ALLELE':{'a':'A', 'c':'C', 'g':'G', 't':'T'},'NON_EFFECT_ALLELE':{'a':'A', 'c':'C', 'g':'G', 't':'T'}})
+            if part is not None:
+                self.df_meta_input = self.df_meta_input[GetShardId(self.df_meta_input, part[1]) == part[0]].reset_index(drop=True)
 
-                    self.df_meta_input = pd.concat([self.df_meta_input, df_meta_input_data])
+            self.RunStage(li_INPUT_STAGE)
 
-                else:
-                    print('Please check the columns of the input file! (Ex, PHENOTYPE, SNP, EFFECT_ALLELE, NON_EFFECT_ALLELE, BETA, BETA_SE, OR, OR_95%CI_LOWER, OR_95%CI_UPPER, P_VAL)')  
-                    sys.exit()  
+            df_group, df_study = CreatePartial(self.df_meta_input)
+            WriteStatisticsStore(path_partial, df_group, df_study, self.file_list)
         
         
         except Exception as e:
@@ -176,10 +2433,14 @@ class BetaMeta:
             sys.exit()
     
         return rv, rvmsg        
-        
-    def DeduplicateData(self): 
+
+    def ReduceData(self, li_path_partial): 
         """
-        Remove Spaces & Deduplication - df_meta_input
+        Map/Reduce mode - Merge the partial files saved by MapData (or statistics stores) & Select the reference alleles of each pair
+        The result does not depend on the order of the partial files.
+
+        Args:
+        li_path_partial (list): Directories of the partial files
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -192,15 +2453,13 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            self.df_meta_input['PHENOTYPE'] = self.df_meta_input['PHENOTYPE'].str.strip()
-            self.df_meta_input['SNP'] = self.df_meta_input['SNP'].str.strip()
-            self.df_meta_input['EFFECT_ALLELE'] = self.df_meta_input['EFFECT_ALLELE'].str.strip()
-            self.df_meta_input['NON_EFFECT_ALLELE'] = self.df_meta_input['NON_EFFECT_ALLELE'].str.strip()
+            li_partial = [ReadStatisticsStore(path_partial) for path_partial in sorted(li_path_partial, key=os.path.abspath)]
 
-            self.df_meta_input = self.df_meta_input.drop_duplicates(self.li_column)
+            self.df_partial_group, self.df_partial_study = MergePartial([partial[0] for partial in li_partial], [partial[1] for partial in li_partial])
+            df_group, df_study = SelectPartialReference(self.df_partial_group, self.df_partial_study)
 
-            if not (set(list(self.df_meta_input['EFFECT_ALLELE'])).issubset(set(['A', 'G', 'T', 'C'])) & set(list(self.df_meta_input['NON_EFFECT_ALLELE'])).issubset(set(['A', 'G', 'T', 'C']))):
-                print('Check the values of EFFECT_ALLELE and NON_EFFECT_ALLELE. The values should be in the form of (A, G, T, C)!')
+            self.li_study = list(dict.fromkeys(study for partial in li_partial for study in partial[2]))
+            self.LoadStatistics(df_group, df_study)
         
         
         except Exception as e:
@@ -210,11 +2469,11 @@ class BetaMeta:
             print(f"Error has occurred in the {myNAME} process") 
             sys.exit()
     
-        return rv, rvmsg           
+        return rv, rvmsg        
 
-    def CalculateBeta(self): 
+    def ShardData(self): 
         """
-        Calculate BETA & BETA_SE from Odds ratio & 95% CI
+        Out-of-core mode - Hash-partition the input files by (PHENOTYPE, SNP) into the on-disk shards 
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -227,48 +2486,61 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            # li_BETA : List of Beta corresponding to df_meta_input
-            # li_BETA_SE : List of Beta Standard Error corresponding to df_meta_input
+            # file_list : List of File name in the Input Folder   
+            self.file_list = os.listdir(self.path_meta_data_dir)           
+            
+            # li_column : List of column name in the Input File
+            self.li_column = list(li_INPUT_COLUMN)
 
-            li_BETA = []
-            li_BETA_SE = []
+            # path_meta_shard_run_dir : Directory of the shards of this run (removed by CalculateShardData, or by ShardData if it fails)
+            # li_shard_dir_created : Directories of path_meta_shard_dir created by this run (removed with it if they are left empty)
+            path = os.path.abspath(self.path_meta_shard_dir)
 
-            for idx, row in self.df_meta_input.iterrows():
-                try:
-                    if (np.isnan(row['OR']) == False) & (np.isnan(row['OR_95%CI_LOWER']) == False) & (np.isnan(row['OR_95%CI_UPPER']) == False):
-                        Beta = np.log(row['OR'])
-                        Beta_SE = (np.log(row['OR_95%CI_UPPER']) - np.log(row['OR_95%CI_LOWER']))/3.92 
+            while not os.path.exists(path):
+                self.li_shard_dir_created.append(path)
+                path = os.path.dirname(path)
 
-                        li_BETA.append(Beta)
-                        li_BETA_SE.append(Beta_SE)
+            os.makedirs(self.path_meta_shard_dir, exist_ok=True)
+            self.path_meta_shard_run_dir = tempfile.mkdtemp(prefix='beta_meta_shard_', dir=self.path_meta_shard_dir)
 
-                    else:
-                        li_BETA.append(row['BETA'])
-                        li_BETA_SE.append(row['BETA_SE'])
+            # The input files are read chunk by chunk, so the memory is bounded by chunksize.
+            li_path = [self.path_meta_data_dir + file for file in self.file_list]
+            n_worker = max(1, min(self.n_worker, len(li_path)))
+            li_argument = [li_path, range(len(li_path)), [self.li_column]*len(li_path), [self.path_meta_shard_run_dir]*len(li_path), 
+                           [self.n_shard]*len(li_path), [self.chunksize]*len(li_path), [self.excel_reader]*len(li_path), [self.float_dtype]*len(li_path)]
 
-                except:
-                    print("Either (BETA, BETA_SE) or (OR, OR_95%CI_LOWER, OR_95%CI_UPPER) values must also be written as numbers!") 
-                    sys.exit()
+            if n_worker > 1:
+                with ProcessPoolExecutor(max_workers=n_worker) as executor:
+                    li_result = list(executor.map(ShardStudyFile, *li_argument))
+
+            else:
+                li_result = list(map(ShardStudyFile, *li_argument))
 
-            self.df_meta_input['BETA'] = li_BETA
-            self.df_meta_input['BETA_SE'] = li_BETA_SE
+            if not all(li_result):
+                rv = False
+                rvmsg = 'A required column is missing'
+                print('Please check the columns of the input file! (Ex, PHENOTYPE, SNP, EFFECT_ALLELE, NON_EFFECT_ALLELE, BETA, BETA_SE, OR, OR_95%CI_LOWER, OR_95%CI_UPPER, P_VAL)')  
+                sys.exit()  
+        
         
-            # Remove the NaN Data & Unnecessary Columns - df_meta_input
-            self.df_meta_input = self.df_meta_input.drop(['OR', 'OR_95%CI_LOWER', 'OR_95%CI_UPPER'], axis=1)
-            self.df_meta_input = self.df_meta_input.dropna()      
-            
         except Exception as e:
             print(str(e))
             rv = False
             rvmsg = str(e)
             print(f"Error has occurred in the {myNAME} process") 
             sys.exit()
+        
+        finally:
+            # The shards of a failed run are not left in path_meta_shard_dir.
+            if (not rv) and (self.path_meta_shard_run_dir is not None):
+                RemoveShardDir(self.path_meta_shard_run_dir, self.li_shard_dir_created)
     
-        return rv, rvmsg   
+        return rv, rvmsg        
 
-    def CorrectEffectDirection(self): 
+    def CalculateShardData(self): 
         """
-        Correct the Effect Direction 
+        Out-of-core mode - Run the meta-analysis of every shard in parallel & Merge the results into df_meta_output
+        (The p-values are adjusted after the merge by CorrectPvalue, since BH ranks all pairs of a phenotype.)
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -281,61 +2553,45 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            # Create the list [PHENOTYPE, SNP]
-            # li_PHENOTYPE_SNP : List of Phenotype & SNP 
-
-            self.li_PHENOTYPE_SNP = []
-
-            for idx, row in self.df_meta_input.iterrows(): 
-                if [row['PHENOTYPE'], row['SNP']] not in self.li_PHENOTYPE_SNP:
-                    self.li_PHENOTYPE_SNP.append([row['PHENOTYPE'], row['SNP']])
+            li_path_shard = [os.path.join(self.path_meta_shard_run_dir, shard) for shard in sorted(os.listdir(self.path_meta_shard_run_dir))]
+            n_worker = max(1, min(self.n_worker, len(li_path_shard)))
+            li_argument = [li_path_shard, [self.li_column]*len(li_path_shard), [self.tau_method]*len(li_path_shard), [self.float_dtype]*len(li_path_shard)]
 
-            # Effect Direction Correction
-            # li_EFFECT_ALLELE : List of Effect Allele corresponding to li_PHENOTYPE_SNP
-            # li_NON_EFFECT_ALLELE : List of Non-Effect Allele corresponding to li_PHENOTYPE_SNP
-
-            self.df_meta_input['P_VAL'] = self.df_meta_input['P_VAL'].astype('float64')
-
-            self.li_EFFECT_ALLELE = []
-            self.li_NON_EFFECT_ALLELE = []
+            if n_worker > 1:
+                with ProcessPoolExecutor(max_workers=n_worker) as executor:
+                    li_df_meta_output = list(executor.map(CalculateShard, *li_argument))
 
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                condition = (self.df_meta_input.SNP == self.li_PHENOTYPE_SNP[j][1]) & (self.df_meta_input.PHENOTYPE == self.li_PHENOTYPE_SNP[j][0]) 
-
-                idx_min = self.df_meta_input[condition]['P_VAL'].idxmin()                 # For EA and NEA, the smallest p-value is the standard.
-                EFFECT_ALLELE = self.df_meta_input.loc[idx_min]['EFFECT_ALLELE']    
-                NON_EFFECT_ALLELE = self.df_meta_input.loc[idx_min]['NON_EFFECT_ALLELE']
-
-                for idx, row in self.df_meta_input[condition].iterrows():
-                    if CalculateSignEffectDirection(EFFECT_ALLELE, NON_EFFECT_ALLELE, row['EFFECT_ALLELE'], row['NON_EFFECT_ALLELE']) == -1:
-                        self.df_meta_input.loc[idx, 'EFFECT_ALLELE'] = EFFECT_ALLELE
-                        self.df_meta_input.loc[idx, 'NON_EFFECT_ALLELE'] = NON_EFFECT_ALLELE
-                        self.df_meta_input.loc[idx, 'BETA'] *= -1
+            else:
+                li_df_meta_output = list(map(CalculateShard, *li_argument))
 
-                    elif CalculateSignEffectDirection(EFFECT_ALLELE, NON_EFFECT_ALLELE, row['EFFECT_ALLELE'], row['NON_EFFECT_ALLELE']) == 1:
-                        self.df_meta_input.loc[idx, 'EFFECT_ALLELE'] = EFFECT_ALLELE
-                        self.df_meta_input.loc[idx, 'NON_EFFECT_ALLELE'] = NON_EFFECT_ALLELE
-                        self.df_meta_input.loc[idx, 'BETA'] *= 1      
+            # df_meta_output : Data Frame of Meta-analysis Result Ouput File - in the order of the in-memory run
+            if len(li_df_meta_output) > 0:
+                self.df_meta_output = pd.concat(li_df_meta_output, ignore_index=True)
+                self.df_meta_output = self.df_meta_output.sort_values('ROW_ORDER', kind='stable', ignore_index=True).drop(columns=['ROW_ORDER'])
 
-                    elif CalculateSignEffectDirection(EFFECT_ALLELE, NON_EFFECT_ALLELE, row['EFFECT_ALLELE'], row['NON_EFFECT_ALLELE']) == 0:
-                        self.df_meta_input = self.df_meta_input.drop(idx)
+            else:
+                self.df_meta_output = pd.DataFrame(columns = ['PHENOTYPE', 'SNP', 'EFFECT_ALLELE', 'NON_EFFECT_ALLELE', 'BETA', 'BETA_SE', 'P_VAL', 'BH_P_VAL', 'I_SQUARE', 'Q_HET'])
 
-                self.li_EFFECT_ALLELE.append(EFFECT_ALLELE)
-                self.li_NON_EFFECT_ALLELE.append(NON_EFFECT_ALLELE)    
-    
-            
+            # meta_result : Result store of the merged pairs (memory-mapped in path_meta_result)
+            self.meta_result = CreateMetaResult(self.df_meta_output, self.path_meta_result)
+        
+        
         except Exception as e:
             print(str(e))
             rv = False
             rvmsg = str(e)
             print(f"Error has occurred in the {myNAME} process") 
             sys.exit()
+        
+        finally:
+            RemoveShardDir(self.path_meta_shard_run_dir, self.li_shard_dir_created)
     
-        return rv, rvmsg  
+        return rv, rvmsg        
 
-    def CalculateWeightedAverageEffectSize(self): 
+    def CalculatePhenotypeData(self): 
         """
-        Calculate the Weighted average of the effect sizes 
+        Per-phenotype mode - Run the stages after CorrectEffectDirection (CalculateWeightedAverageEffectSize ~ CorrectPvalue) 
+        of every phenotype in parallel & Merge the results into df_meta_output in the order of the serial run
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -348,32 +2604,51 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            # Calculation - Weighted average of the effect sizes 
-            # li_BETA_META : List of Weighted average of the effect sizes corresponding to li_PHENOTYPE_SNP
-            # li_STD_BETA_META : List of Standard Error of Weighted average of the effect sizes corresponding to li_PHENOTYPE_SNP
+            # phenotype_id : Phenotype of each (PHENOTYPE, SNP) pair & study row
+            # The rows & the pairs of each phenotype keep their order, so the first study of each pair is unchanged.
+            phenotype_id, phenotype_unique = pd.factorize(self.group_index.phenotype)
+            n_phenotype = len(phenotype_unique)
+            group_id = self.group_index.group_id
+
+            order_group = np.argsort(phenotype_id, kind='stable')
+            offsets_group = np.concatenate([[0], np.cumsum(np.bincount(phenotype_id, minlength=n_phenotype))])
+            group_local = np.empty(len(self.group_index), dtype='int64')
+            group_local[order_group] = np.arange(len(self.group_index)) - offsets_group[phenotype_id[order_group]]
+
+            order_row = np.argsort(phenotype_id[group_id], kind='stable')
+            offsets_row = np.concatenate([[0], np.cumsum(np.bincount(phenotype_id[group_id], minlength=n_phenotype))])
+
+            df_group = pd.DataFrame({'PHENOTYPE': self.group_index.phenotype, 
+                                     'SNP': self.group_index.snp, 
+                                     'EFFECT_ALLELE': self.li_EFFECT_ALLELE, 
+                                     'NON_EFFECT_ALLELE': self.li_NON_EFFECT_ALLELE, 
+                                     'ROW_ORDER': np.arange(len(self.group_index))}).iloc[order_group]
+            df_study = self.df_meta_input.reset_index(drop=True).assign(GROUP = group_local[group_id]).iloc[order_row]
+
+            li_df_group = [df_group.iloc[offsets_group[i]:offsets_group[i+1]].reset_index(drop=True) for i in range(n_phenotype)]
+            li_df_study = [df_study.iloc[offsets_row[i]:offsets_row[i+1]].reset_index(drop=True) for i in range(n_phenotype)]
+            li_argument = [li_df_group, li_df_study, [self.tau_method]*n_phenotype, [self.li_p_adjust]*n_phenotype]
+            n_worker = max(1, min(self.n_worker, n_phenotype))
+
+            if n_worker > 1:
+                with ProcessPoolExecutor(max_workers=n_worker) as executor:
+                    li_df_meta_output = list(executor.map(CalculatePhenotype, *li_argument))
 
-            self.li_BETA_META = []
-            self.li_STD_BETA_META = []
-
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                condition = (self.df_meta_input.SNP == self.li_PHENOTYPE_SNP[j][1]) & (self.df_meta_input.PHENOTYPE == self.li_PHENOTYPE_SNP[j][0]) 
-                sum_w_i = 0
-                sum_w_i_beta_i = 0
+            else:
+                li_df_meta_output = list(map(CalculatePhenotype, *li_argument))
 
-                if len(self.df_meta_input[condition]) > 1:
-                    for idx, row in self.df_meta_input[condition].iterrows():
-                        w_i = row['BETA_SE']**(-2)
-                        sum_w_i += w_i
-                        sum_w_i_beta_i += (w_i * row['BETA'])
+            # df_meta_output : Data Frame of Meta-analysis Result Ouput File - in the order of the serial run
+            if len(li_df_meta_output) > 0:
+                self.df_meta_output = pd.concat(li_df_meta_output, ignore_index=True)
+                self.df_meta_output = self.df_meta_output.sort_values('ROW_ORDER', kind='stable', ignore_index=True).drop(columns=['ROW_ORDER'])
 
-                    self.li_BETA_META.append(sum_w_i_beta_i/sum_w_i)
-                    self.li_STD_BETA_META.append(sum_w_i**-0.5)
+            else:
+                self.df_meta_output = pd.DataFrame(columns = ['PHENOTYPE', 'SNP', 'EFFECT_ALLELE', 'NON_EFFECT_ALLELE', 'BETA', 'BETA_SE', 'P_VAL', 'BH_P_VAL', 'I_SQUARE', 'Q_HET'])
 
-                elif len(self.df_meta_input[condition]) == 1:
-                    self.li_BETA_META.append(self.df_meta_input[condition]['BETA'].values[0])
-                    self.li_STD_BETA_META.append(self.df_meta_input[condition]['BETA_SE'].values[0])
-    
-            
+            # meta_result : Result store of the merged pairs (memory-mapped in path_meta_result)
+            self.meta_result = CreateMetaResult(self.df_meta_output, self.path_meta_result)
+        
+        
         except Exception as e:
             print(str(e))
             rv = False
@@ -381,11 +2656,15 @@ class BetaMeta:
             print(f"Error has occurred in the {myNAME} process") 
             sys.exit()
     
-        return rv, rvmsg  
+        return rv, rvmsg        
 
-    def CalculateQstatistic(self): 
+    def StreamData(self): 
         """
-        Heterogeniety Test - Calculate the Cochran's Q statistic
+        Streaming mode - Meta-analysis of the input files sorted by SNP with a bounded memory
+        
+        The complete SNPs of the k-way merge (See IterMergeStudy) pass through the stages block by block
+        (harmonize -> combine -> heterogeneity -> random effects) and are saved to the disk. The p-values are adjusted in a final pass 
+        over the saved blocks, which are written into path_meta_stream_output in the order of the SNPs.
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -398,27 +2677,73 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            # Heterogeniety Test 
-            # Calculation - Cochran's Q statistic
-            # li_Q : List of Cochran's Q statistic corresponding to li_PHENOTYPE_SNP
-
-            self.li_Q = []
-
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                condition = (self.df_meta_input.SNP == self.li_PHENOTYPE_SNP[j][1]) & (self.df_meta_input.PHENOTYPE == self.li_PHENOTYPE_SNP[j][0]) 
-                Q = 0
-
-                if len(self.df_meta_input[condition]) > 1:
-                    for idx, row in self.df_meta_input[condition].iterrows():
-                        w_i = row['BETA_SE']**(-2)
-                        delta_beta = (row['BETA'] - self.li_BETA_META[j])    
-                        Q += (w_i * (delta_beta**2))
-                    self.li_Q.append(Q)
-
-                elif len(self.df_meta_input[condition]) <= 1:
-                    self.li_Q.append('Unprocessed')
-    
-            
+            self.file_list = os.listdir(self.path_meta_data_dir)
+            self.li_column = list(li_INPUT_COLUMN)
+            li_path = [self.path_meta_data_dir + file for file in self.file_list]
+
+            def CreateBlock(df_block):
+                betameta = BetaMeta(tau_method=self.tau_method, float32=(self.float_dtype == 'float32'))
+                betameta.li_column = self.li_column
+                betameta.df_meta_input = EncodeInputData(df_block, self.float_dtype)
+                return betameta
+
+            iter_betameta = (CreateBlock(df_block) for df_block in IterMergeStudy(li_path, self.li_column, self.chunksize, self.excel_reader))
+            iter_betameta = IterStage(iter_betameta, li_INPUT_STAGE + li_HARMONIZE_STAGE)
+            iter_betameta = IterStage(iter_betameta, li_COMBINE_STAGE)
+            iter_betameta = IterStage(iter_betameta, li_RESULT_STAGE)
+
+            # 1st pass - Save the output blocks & Collect the phenotype & the p-value of every pair (The p-values are adjusted over all blocks.)
+            os.makedirs(os.path.dirname(self.path_meta_stream_output), exist_ok=True)
+            path_stream_dir = tempfile.mkdtemp(prefix='beta_meta_stream_', dir=os.path.dirname(self.path_meta_stream_output))
+            dict_phenotype = {}
+            li_phenotype_id = []
+            li_p_val = []
+            n_block = 0
+
+            for betameta in iter_betameta:
+                df_block = betameta.df_meta_output.sort_values('SNP', kind='stable', ignore_index=True)
+                SavePart(df_block, os.path.join(path_stream_dir, f"{n_block:08d}"))
+
+                li_phenotype_id.append(np.array([dict_phenotype.setdefault(phenotype, len(dict_phenotype)) for phenotype in df_block['PHENOTYPE'].tolist()], dtype='int32'))
+                li_p_val.append(df_block['P_VAL'].to_numpy(dtype='float64'))
+                n_block += 1
+
+            li_method = ['BH'] + [method for method in self.li_p_adjust if method != 'BH']
+            phenotype_id = np.concatenate(li_phenotype_id) if n_block > 0 else np.array([], dtype='int32')
+            p_val = np.concatenate(li_p_val) if n_block > 0 else np.array([])
+            dict_adjusted = AdjustPvalue(phenotype_id, p_val, li_method)
+            del li_phenotype_id, li_p_val
+
+            if self.manhattan_qq_plot and (n_block > 0):
+                genomic_lambda = SaveManhattanQQPlot(self.path_meta_manhattan_output, self.path_meta_qq_output, phenotype_id, list(dict_phenotype), p_val, self.plot_exact_p)
+                WriteLog(myNAME, f"Genomic inflation factor (lambda) : {genomic_lambda:.4f}", type='INFO', fplog=self.__fplog)
+
+            del p_val
+
+            # 2nd pass - Add the adjusted p-values & Write the output file block by block
+            start = 0
+
+            writer = OutputWriter(self.path_meta_stream_output)
+
+            try:
+                for i in range(n_block):
+                    df_block = LoadPart(os.path.join(path_stream_dir, f"{i:08d}"))
+                    end = start + len(df_block)
+                    df_block['BH_P_VAL'] = dict_adjusted['BH'][start:end]
+
+                    for j, method in enumerate(li_method[1:]):
+                        df_block.insert(df_block.columns.get_loc('BH_P_VAL') + 1 + j, f"{method}_P_VAL", dict_adjusted[method][start:end])
+
+                    writer.Write(df_block)
+                    start = end
+
+            finally:
+                writer.Close()
+
+            shutil.rmtree(path_stream_dir, ignore_errors=True)
+            WriteLog(myNAME, f"{start} pairs are written into {self.path_meta_stream_output}", type='INFO', fplog=self.__fplog)
+        
+        
         except Exception as e:
             print(str(e))
             rv = False
@@ -426,11 +2751,11 @@ class BetaMeta:
             print(f"Error has occurred in the {myNAME} process") 
             sys.exit()
     
-        return rv, rvmsg  
+        return rv, rvmsg        
 
-    def CalculateHeterogeneityMetric(self): 
+    def SaveOutputFiles(self): 
         """
-        Heterogeniety Test - Calculate the Higgin's heterogeneity metric
+        Save the Output File, Forest Plot, Manhattan Plot & QQ Plot
 
         Returns:
         A tuple (success, message), where success is a boolean indicating whether the operation was successful,
@@ -443,25 +2768,67 @@ class BetaMeta:
         rvmsg = "Success"
         
         try: 
-            # Calculation - Higgin's heterogeneity metric
-            # li_I_SQUARE : List of Higgin's heterogeneity metric corresponding to li_PHENOTYPE_SNP
+            # Save the Output File (Excel by default, See WriteOutputFile)
+            path_meta_output = self.path_meta_output
+            output_format = self.output_format
+
+            if (output_format == 'excel') and (len(self.df_meta_output) >= EXCEL_MAX_ROW):
+                path_meta_output = os.path.splitext(path_meta_output)[0] + dict_OUTPUT_EXTENSION['tsv.gz']
+                output_format = 'tsv.gz'
+                WriteLog(myNAME, f"{len(self.df_meta_output)} pairs exceed the rows of an Excel worksheet - written into {path_meta_output}", type='WARNING', fplog=self.__fplog)
+
+            WriteOutputFile(self.df_meta_output, path_meta_output, output_format, self.chunksize)
 
-            self.li_I_SQUARE = []
+            # Save the Output Forest Plot (one image per forest_page_rows pairs, See DrawForestPlot)
+            if self.forest_plot:
+                # The images of a previous run (which may have more pages) are removed, so the output folder holds the pages of this run only.
+                RemoveForestPlotPage(self.path_meta_forestplot_output)
 
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                condition = (self.df_meta_input.SNP == self.li_PHENOTYPE_SNP[j][1]) & (self.df_meta_input.PHENOTYPE == self.li_PHENOTYPE_SNP[j][0]) 
-                count = 0
+                df_forest = SelectForestPlotRow(self.df_meta_output, self.li_forest_phenotype, self.forest_p_threshold, self.forest_top_n)
 
-                if (len(self.df_meta_input[condition]) > 1) & (self.li_Q[j] != 0):
-                    for idx, row in self.df_meta_input[condition].iterrows():
-                        count += 1
+                # The number of the images is bounded unless all are requested, so the plot does not dominate a large run.
+                if (self.forest_max_page is not None) and (len(df_forest) > self.forest_max_page * self.forest_page_rows):
+                    n_forest_max = self.forest_max_page * self.forest_page_rows
+                    WriteLog(myNAME, f"{len(df_forest)} pairs are selected for the forest plot - only the {n_forest_max} pairs of the smallest P_VAL are drawn "
+                             f"(See --forest-max-pages & --forest-all)", type='WARNING', fplog=self.__fplog)
+                    df_forest = SelectForestPlotRow(df_forest, top_n=n_forest_max)
 
-                    I_square = 100 * (self.li_Q[j] - (count - 1)) / (self.li_Q[j])
-                    self.li_I_SQUARE.append(max(I_square,0))
+                if len(df_forest) == 0:
+                    WriteLog(myNAME, "No pair is selected for the forest plot", type='WARNING', fplog=self.__fplog)
 
                 else:
-                    self.li_I_SQUARE.append('Unprocessed')
-            
+                    li_label = (df_forest['PHENOTYPE'].astype('str') + ' - ' + df_forest['SNP'].astype('str')).tolist()
+                    measure = df_forest['BETA'].to_numpy(dtype='float64')
+                    beta_se = df_forest['BETA_SE'].to_numpy(dtype='float64')
+                    lower = measure - 1.96 * beta_se
+                    upper = measure + 1.96 * beta_se
+
+                    # The page numbers are zero-padded to the same width (e.g. _01.png ~ _12.png), so the file names sort in the page order.
+                    n_page = -(-len(df_forest) // self.forest_page_rows)
+                    li_path_page = [self.path_meta_forestplot_output] if n_page == 1 else \
+                        [f"{os.path.splitext(self.path_meta_forestplot_output)[0]}_{i+1:0{len(str(n_page))}d}.png" for i in range(n_page)]
+                    li_slice = [slice(i*self.forest_page_rows, (i+1)*self.forest_page_rows) for i in range(n_page)]
+
+                    li_argument = [li_path_page, [li_label[sl] for sl in li_slice], [measure[sl].tolist() for sl in li_slice], 
+                                   [lower[sl].tolist() for sl in li_slice], [upper[sl].tolist() for sl in li_slice]]
+                    n_worker = max(1, min(self.n_worker, n_page))
+
+                    if n_worker > 1:
+                        with ProcessPoolExecutor(max_workers=n_worker) as executor:
+                            list(executor.map(DrawForestPlot, *li_argument))
+
+                    else:
+                        list(map(DrawForestPlot, *li_argument))
+
+                    WriteLog(myNAME, f"{len(df_forest)} pairs in {n_page} forest plot images", type='INFO', fplog=self.__fplog)
+
+            # Save the Output Manhattan Plot & QQ Plot
+            if self.manhattan_qq_plot and (len(self.df_meta_output) > 0):
+                phenotype_id, li_phenotype = pd.factorize(self.df_meta_output['PHENOTYPE'])
+                genomic_lambda = SaveManhattanQQPlot(self.path_meta_manhattan_output, self.path_meta_qq_output, phenotype_id, [str(phenotype) for phenotype in li_phenotype], 
+                                                     self.df_meta_output['P_VAL'].to_numpy(dtype='float64'), self.plot_exact_p)
+                WriteLog(myNAME, f"Genomic inflation factor (lambda) : {genomic_lambda:.4f}", type='INFO', fplog=self.__fplog)
+
         except Exception as e:
             print(str(e))
             rv = False
@@ -469,260 +2836,1095 @@ class BetaMeta:
             print(f"Error has occurred in the {myNAME} process") 
             sys.exit()
     
-        return rv, rvmsg  
+        return rv, rvmsg     
 
-    def CalculateRandomEffectModel(self): 
-        """
-        Random Effect Model - Calculate the Weighted average of the effect sizes 
+####################################
+# Shard
+####################################
 
-        Returns:
-        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
-        and message is a string containing a success or error message.
-        """          
-        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
-        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+def GetShardId(df_meta_input_data, n_shard):
+    """
+    Hash-partition the study rows by (PHENOTYPE, SNP)
+    
+        Args:
+            df_meta_input_data (DataFrame): Data frame with the PHENOTYPE and SNP columns
+            n_shard (int): Number of shards
         
-        rv = True
-        rvmsg = "Success"
+        Returns:
+            shard_id (np.ndarray): Shard (0 ~ n_shard-1) of each study row - the same pair is always in the same shard
+    """
+    # The spaces are removed as in DeduplicateData before hashing.
+    key = df_meta_input_data['PHENOTYPE'].str.strip().astype('str') + '\t' + df_meta_input_data['SNP'].str.strip().astype('str')
+    
+    return (pd.util.hash_pandas_object(key, index=False).to_numpy() % n_shard).astype('int64')
+
+def RemoveShardDir(path_shard_run_dir, li_dir_created):
+    """
+    Remove the shards of a run & the directories created for them (from the deepest one, as long as they are empty)
+    """
+    shutil.rmtree(path_shard_run_dir, ignore_errors=True)
+    
+    for path in li_dir_created:
+        try:
+            os.rmdir(path)
         
-        try: 
-            # Calculation - Weighted average of the effect sizes Modification - Random Effect Model
-            # li_BETA_META : List of Weighted average of the effect sizes corrected by a Random Effect Model
-            # li_STD_BETA_META : List of Standard Error of Weighted average of the effect sizes corrected by a Random Effect Model
+        except OSError:
+            break
+
+def SavePart(df_part, path_part):
+    """
+    Save a part (a cache entry of .npy files, or a pickle if the values are neither numbers nor strings)
+    """
+    if not SaveCacheEntry(df_part, path_part):
+        df_part.to_pickle(f"{path_part}.pkl")
+
+def LoadPart(path_part):
+    """
+    Load a part saved by SavePart
+    """
+    if path_part.endswith('.pkl'):
+        return pd.read_pickle(path_part)
+    
+    if not os.path.isdir(path_part):
+        return pd.read_pickle(f"{path_part}.pkl")
+    
+    return LoadCacheEntry(path_part)
 
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                if self.li_I_SQUARE[j] != 'Unprocessed': 
-                    condition = (self.df_meta_input.SNP == self.li_PHENOTYPE_SNP[j][1]) & (self.df_meta_input.PHENOTYPE == self.li_PHENOTYPE_SNP[j][0]) 
+def ShardStudyFile(path, file_index, li_column, shard_dir, n_shard, chunksize=1000000, excel_reader='pandas', float_dtype='float64'):
+    """
+    Read the input file of a study in chunks & Write every chunk into the on-disk shards - Runs in a worker process of ShardData
+    
+    The encoded rows (See EncodeInputData) of a shard are appended as pickles to one file per worker process, {shard_dir}/{shard}/{pid}.pkl.
+    
+        Args:
+            path (str): Path of the input file
+            file_index (int): Position of the file in the input folder (the ROW_ORDER column keeps the row order of ConcatData)
+            li_column (list): List of the required column names
+            shard_dir (str): Directory of the shards
+            n_shard (int): Number of shards
+            chunksize (int): Number of rows parsed at once for the text files & the streamed Excel workbooks
+            excel_reader (str): 'pandas' or 'stream' (See IterInputFile)
+            float_dtype (str): dtype of the effect sizes (See EncodeInputData)
+        
+        Returns:
+            result (bool): False if a required column is missing
+    """
+    iter_chunk = IterInputFile(path, li_column, chunksize=chunksize, excel_reader=excel_reader)
+    
+    if iter_chunk is None:
+        return False
+    
+    offset = 0
+    
+    for df_chunk in iter_chunk:
+        df_chunk['STUDY'] = os.path.basename(path)
+        df_chunk['ROW_ORDER'] = (np.int64(file_index) << 40) + offset + np.arange(len(df_chunk), dtype='int64')
+        offset += len(df_chunk)
+        df_chunk = EncodeInputData(df_chunk, float_dtype)
+        
+        for shard, df_part in df_chunk.groupby(GetShardId(df_chunk, n_shard)):
+            path_shard = os.path.join(shard_dir, f"{shard:05d}")
+            os.makedirs(path_shard, exist_ok=True)
+            
+            # Each part keeps only the categories of its rows.
+            df_part = df_part.reset_index(drop=True)
+            df_part = df_part.assign(**{column: df_part[column].cat.remove_unused_categories() for column in ['PHENOTYPE', 'SNP']})
+            
+            with open(os.path.join(path_shard, f"{os.getpid()}.pkl"), 'ab') as fp:
+                pickle.dump(df_part, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    return True
 
-                if (self.li_I_SQUARE[j] >= 50):
-                    sum_w_i = 0
-                    sum_w_i_square = 0
-                    count = 0
+def LoadShard(path_shard):
+    """
+    Load the rows of a shard written by ShardStudyFile
+    
+        Args:
+            path_shard (str): Directory of the shard
+        
+        Returns:
+            df_meta_input (DataFrame): Encoded rows of the shard (in the order of the files & the appended parts)
+    """
+    li_df_part = []
+    
+    for name in sorted(os.listdir(path_shard)):
+        with open(os.path.join(path_shard, name), 'rb') as fp:
+            while True:
+                try:
+                    li_df_part.append(pickle.load(fp))
+                
+                except EOFError:
+                    break
+    
+    return ConcatInputData(li_df_part)
 
-                    for idx, row in self.df_meta_input[condition].iterrows():
-                        w_i = row['BETA_SE']**(-2)
-                        sum_w_i += w_i
-                        sum_w_i_square += w_i**2
-                        count += 1
+def CalculateShard(path_shard, li_column, tau_method='DL', float_dtype='float64'):
+    """
+    Run the meta-analysis stages (from DeduplicateData to CreateOutputDataFrame) on a shard - Runs in a worker process of CalculateShardData
+    
+        Args:
+            path_shard (str): Directory of the shard
+            li_column (list): List of the required column names
+            tau_method (str): Estimator of the between-study variance of the Random Effect Model
+            float_dtype (str): dtype of the effect sizes of the study rows (See EncodeInputData)
+        
+        Returns:
+            df_meta_output (DataFrame): Output data frame of the shard without the p-value adjustment, 
+                                        with the ROW_ORDER column (order of the first study row of each pair)
+    """
+    df_meta_input = LoadShard(path_shard)
+    
+    betameta = BetaMeta(tau_method=tau_method, float32=(float_dtype == 'float32'))
+    betameta.li_column = list(li_column)
+    betameta.df_meta_input = df_meta_input.sort_values('ROW_ORDER', kind='stable', ignore_index=True)
+    
+    betameta.RunStage(li_INPUT_STAGE)
+    
+    # The pairs are ordered by their first study row as in CorrectEffectDirection.
+    df_row_order = betameta.df_meta_input.groupby(['PHENOTYPE', 'SNP'], sort=False)['ROW_ORDER'].min().reset_index()
+    
+    betameta.RunStage(li_HARMONIZE_STAGE + li_COMBINE_STAGE + li_RESULT_STAGE)
+    
+    return betameta.df_meta_output.merge(df_row_order, on=['PHENOTYPE', 'SNP'], how='left')
 
-                    tau_square = (self.li_Q[j]-count+1) / (sum_w_i - sum_w_i_square / sum_w_i)                   
-                    tau_square = max(tau_square, 0)
+####################################
+# Phenotype
+####################################
 
-                    sum_w_i_R_beta_i = 0
-                    sum_w_i_R = 0
+def CalculatePhenotype(df_group, df_study, tau_method='DL', li_p_adjust=None):
+    """
+    Run the meta-analysis stages (from CalculateWeightedAverageEffectSize to CorrectPvalue) on a phenotype - Runs in a worker process of CalculatePhenotypeData
+    
+        Args:
+            df_group (DataFrame): (PHENOTYPE, SNP) pairs of the phenotype with the reference alleles & ROW_ORDER (order of the pair in the serial run)
+            df_study (DataFrame): Harmonized study rows of the phenotype (GROUP : row of df_group)
+            tau_method (str): Estimator of the between-study variance of the Random Effect Model
+            li_p_adjust (list): P-value adjustments in addition to BH
+        
+        Returns:
+            df_meta_output (DataFrame): Output data frame of the phenotype with the ROW_ORDER column
+    """
+    betameta = BetaMeta(tau_method=tau_method, li_p_adjust=li_p_adjust)
+    betameta.group_index = GroupIndex.FromGroupId(df_study['GROUP'].to_numpy(dtype='int64'), 
+                                                  df_group['PHENOTYPE'].to_numpy(dtype='object'), df_group['SNP'].to_numpy(dtype='object'))
+    betameta.li_EFFECT_ALLELE = df_group['EFFECT_ALLELE'].tolist()
+    betameta.li_NON_EFFECT_ALLELE = df_group['NON_EFFECT_ALLELE'].tolist()
+    betameta.df_meta_input = df_study.drop(columns=['GROUP'])
+    
+    betameta.RunStage(li_COMBINE_STAGE + li_RESULT_STAGE)
+    betameta.CorrectPvalue()
+    
+    return betameta.df_meta_output.assign(ROW_ORDER = df_group['ROW_ORDER'].to_numpy())
 
-                    for idx2, row2 in self.df_meta_input[condition].iterrows():
-                        w_i = row2['BETA_SE']**(-2)
-                        w_i_R = 1/(1/w_i + tau_square)
-                        sum_w_i_R_beta_i += w_i_R * row2['BETA']
-                        sum_w_i_R += w_i_R
+####################################
+# Stream
+####################################
 
-                    self.li_BETA_META[j] = sum_w_i_R_beta_i / sum_w_i_R
-                    self.li_STD_BETA_META[j] = sum_w_i_R**-0.5
+def IterMergeStudy(li_path, li_column, chunksize=1000000, excel_reader='pandas'):
+    """
+    k-way merge of the input files sorted by SNP - yields the study rows of complete SNPs block by block
+    
+    A SNP is complete when every study which is not exhausted has passed it, so at most one chunk (& the rows of its last SNP) 
+    of each study is kept in memory. The rows of a block are in the order of the studies (li_path), then of the rows.
+    
+        Args:
+            li_path (list): Paths of the input files - each sorted by SNP (lexicographic order, e.g. LC_ALL=C sort)
+            li_column (list): List of the required column names
+            chunksize (int): Number of rows parsed at once
+            excel_reader (str): 'pandas' or 'stream' (See IterInputFile)
+        
+        Returns:
+            iter_block (iterator): Data frames of the li_column columns & STUDY
+    """
+    li_iter_chunk = [IterInputFile(path, li_column, chunksize, excel_reader) for path in li_path]
+    
+    for path, iter_chunk in zip(li_path, li_iter_chunk):
+        if iter_chunk is None:
+            raise ValueError(f"Please check the columns of the input file! ({os.path.basename(path)})")
+    
+    n_study = len(li_path)
+    li_buffer = [None] * n_study
+    li_key = [np.array([], dtype='object')] * n_study
+    active = [True] * n_study
+    
+    def Refill(i):
+        # Read the next chunk of the study i (The rows without SNP are removed as in CalculateBeta.)
+        for df_chunk in li_iter_chunk[i]:
+            df_chunk = df_chunk[df_chunk['SNP'].notna()]
+            
+            if len(df_chunk) == 0:
+                continue
+            
+            key = df_chunk['SNP'].astype('object').str.strip().to_numpy(dtype='object')
+            
+            if (len(li_key[i]) > 0 and key[0] < li_key[i][-1]) or (key[1:] < key[:-1]).any():
+                raise ValueError(f"{os.path.basename(li_path[i])} is not sorted by SNP")
+            
+            df_chunk = df_chunk.assign(STUDY = os.path.basename(li_path[i]))
+            li_buffer[i] = df_chunk if li_buffer[i] is None else pd.concat([li_buffer[i], df_chunk], ignore_index=True)
+            li_key[i] = np.concatenate([li_key[i], key])
+            return
+        
+        active[i] = False
+    
+    while True:
+        for i in range(n_study):
+            if active[i] and len(li_key[i]) == 0:
+                Refill(i)
+        
+        li_last = [li_key[i][-1] for i in range(n_study) if active[i]]
+        
+        # bound : Every SNP before the bound is complete (None : all studies are exhausted)
+        bound = min(li_last) if len(li_last) > 0 else None
+        li_block = []
+        
+        for i in range(n_study):
+            if li_buffer[i] is None:
+                continue
+            
+            n_complete = len(li_key[i]) if bound is None else np.searchsorted(li_key[i], bound, side='left')
+            
+            if n_complete > 0:
+                li_block.append(li_buffer[i].iloc[:n_complete])
+                li_buffer[i] = li_buffer[i].iloc[n_complete:].reset_index(drop=True)
+                li_key[i] = li_key[i][n_complete:]
+        
+        if len(li_block) > 0:
+            yield pd.concat(li_block, ignore_index=True)
+        
+        if bound is None:
+            break
+        
+        # The studies at the bound may have more rows of the same SNP in their next chunk.
+        for i in range(n_study):
+            if active[i] and li_key[i][-1] == bound:
+                Refill(i)
 
+def IterStage(iter_betameta, li_stage):
+    """
+    Run the stages (method names of BetaMeta) on every block of the stream - the blocks of which no study row is left are dropped
+    """
+    for betameta in iter_betameta:
+        for stage in li_stage:
+            getattr(betameta, stage)()
             
-        except Exception as e:
-            print(str(e))
-            rv = False
-            rvmsg = str(e)
-            print(f"Error has occurred in the {myNAME} process") 
-            sys.exit()
+            if len(betameta.df_meta_input) == 0:
+                break
+        
+        else:
+            yield betameta
+
+####################################
+# Statistics Store
+####################################
+
+def WriteStatisticsStore(path_stats_dir, df_group, df_study, li_study):
+    """
+    Persist the sufficient statistics of a meta-analysis as a new store of one segment (replaces the previous store)
+    
+    The new store is written into a temporary directory. The previous store is renamed aside & removed only after 
+    the new store is renamed into its place (it is renamed back if that fails).
+    
+        Args:
+            path_stats_dir (str): Directory of the statistics store
+            df_group (DataFrame): One row per allele class of each (PHENOTYPE, SNP) - PHENOTYPE, SNP, EFFECT_ALLELE, NON_EFFECT_ALLELE 
+                                  (reference alleles of the class), BEST_P_VAL, SUM_W, SUM_W_BETA, SUM_W_BETA_SQUARE, SUM_W_SQUARE, COUNT
+            df_study (DataFrame): One row per harmonized study row - GROUP, BETA, BETA_SE, P_VAL, STUDY 
+                                  (the Random Effect Model re-weights each study, which the sums alone do not allow)
+            li_study (list): File names of the studies in the store
+    """
+    path_stats_dir = os.path.abspath(path_stats_dir)
+    os.makedirs(os.path.dirname(path_stats_dir), exist_ok=True)
+    path_tmp = tempfile.mkdtemp(prefix='beta_meta_stats_', dir=os.path.dirname(path_stats_dir))
+    
+    segment = WriteStatisticsSegment(path_tmp, df_group, df_study)
+    WriteStoreFile(path_tmp, {'PARSER_VERSION': PARSER_VERSION, 'STUDY': list(li_study), 'SEGMENT': [segment]})
+    
+    if not os.path.isdir(path_stats_dir):
+        os.rename(path_tmp, path_stats_dir)
+        return
+    
+    path_old = f"{path_tmp}_old"
+    os.rename(path_stats_dir, path_old)
+    
+    try:
+        os.rename(path_tmp, path_stats_dir)
+    
+    except OSError:
+        os.rename(path_old, path_stats_dir)
+        raise
+    
+    shutil.rmtree(path_old)
+
+def AppendStatisticsStore(path_stats_dir, df_group, df_study, li_study):
+    """
+    Add the sufficient statistics of new studies to a statistics store as a new segment - only the new rows are written
+    
+    The segment is used once store.json lists it, which is replaced at once. The segments of an interrupted add 
+    (not listed in store.json) are removed.
+    
+        Args:
+            path_stats_dir (str): Directory of the statistics store
+            df_group (DataFrame), df_study (DataFrame) : Partial of the new studies (See WriteStatisticsStore)
+            li_study (list): File names of the new studies
+    """
+    dict_store = ReadStoreFile(path_stats_dir)
+    
+    for name in os.listdir(path_stats_dir):
+        if name.startswith('segment_') and (name not in dict_store['SEGMENT']):
+            shutil.rmtree(os.path.join(path_stats_dir, name))
+    
+    dict_store['SEGMENT'].append(WriteStatisticsSegment(path_stats_dir, df_group, df_study))
+    dict_store['STUDY'] = list(dict.fromkeys(dict_store['STUDY'] + list(li_study)))
+    WriteStoreFile(path_stats_dir, dict_store)
+
+def WriteStatisticsSegment(path_stats_dir, df_group, df_study):
+    """
+    Write a segment (df_group & df_study) into a new directory of a statistics store
+    
+        Returns:
+            segment (str): Directory name of the segment
+    """
+    path_segment = tempfile.mkdtemp(prefix='segment_', dir=path_stats_dir)
+    
+    SavePart(df_group, os.path.join(path_segment, 'groups'))
+    SavePart(df_study, os.path.join(path_segment, 'studies'))
+    
+    return os.path.basename(path_segment)
+
+def WriteStoreFile(path_stats_dir, dict_store):
+    """
+    Replace store.json of a statistics store at once (os.replace of a temporary file)
+    """
+    path_tmp = os.path.join(path_stats_dir, 'store.json.tmp')
+    
+    with open(path_tmp, 'w') as fp:
+        json.dump(dict_store, fp)
+    
+    os.replace(path_tmp, os.path.join(path_stats_dir, 'store.json'))
+
+def ReadStoreFile(path_stats_dir):
+    """
+    Read store.json of a statistics store - PARSER_VERSION, STUDY (file names of the studies) & SEGMENT (directory names of the segments)
+    """
+    with open(os.path.join(path_stats_dir, 'store.json')) as fp:
+        dict_store = json.load(fp)
+    
+    if dict_store['PARSER_VERSION'] != PARSER_VERSION:
+        raise ValueError(f"The statistics store was written by the parser version {dict_store['PARSER_VERSION']} (current: {PARSER_VERSION}). Please run the full meta-analysis again.")
+    
+    return dict_store
+
+def ReadStatisticsStore(path_stats_dir):
+    """
+    Load the sufficient statistics saved by WriteStatisticsStore & AppendStatisticsStore - the segments are merged by MergePartial
+    
+        Returns:
+            df_group (DataFrame), df_study (DataFrame), li_study (list) : See WriteStatisticsStore
+    """
+    dict_store = ReadStoreFile(path_stats_dir)
+    
+    li_df_group = [LoadPart(os.path.join(path_stats_dir, segment, 'groups')) for segment in dict_store['SEGMENT']]
+    li_df_study = [LoadPart(os.path.join(path_stats_dir, segment, 'studies')) for segment in dict_store['SEGMENT']]
+    
+    if len(li_df_group) == 1:
+        return li_df_group[0], li_df_study[0], dict_store['STUDY']
+    
+    df_group, df_study = MergePartial(li_df_group, li_df_study)
     
-        return rv, rvmsg  
+    return df_group, df_study, dict_store['STUDY']
 
-    def CalculateIntegratedPvalue(self): 
-        """
-        Calculate the Integrated P-value 
+####################################
+# Map/Reduce
+####################################
 
-        Returns:
-        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
-        and message is a string containing a success or error message.
-        """          
-        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
-        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
-        
-        rv = True
-        rvmsg = "Success"
+def CalculateAlleleClass(effect_allele_code, non_effect_allele_code):
+    """
+    Classify the allele pairs - the pairs of a class can be harmonized with each other (swapped and/or on the opposite strand)
+    
+        Args:
+            effect_allele_code, non_effect_allele_code (np.ndarray): Encoded alleles (See EncodeAllele)
         
-        try: 
-            # Calculation - Integrated P-value 
-            # li_P_VALUE : List of P-value corresponding to li_PHENOTYPE_SNP
+        Returns:
+            allele_class (np.ndarray): Smallest code of the equivalent allele pairs (len(li_ALLELE)**2 for the invalid alleles)
+    """
+    n_allele = len(li_ALLELE)
+    effect_allele_code = np.asarray(effect_allele_code, dtype='int64')
+    non_effect_allele_code = np.asarray(non_effect_allele_code, dtype='int64')
+    
+    # The complementary alleles are n_allele/2 apart in li_ALLELE (A-T, G-C).
+    effect_allele_complement = (effect_allele_code + n_allele//2) % n_allele
+    non_effect_allele_complement = (non_effect_allele_code + n_allele//2) % n_allele
+    
+    allele_class = np.minimum.reduce([effect_allele_code*n_allele + non_effect_allele_code, 
+                                      non_effect_allele_code*n_allele + effect_allele_code, 
+                                      effect_allele_complement*n_allele + non_effect_allele_complement, 
+                                      non_effect_allele_complement*n_allele + effect_allele_complement])
+    allele_class[(effect_allele_code >= n_allele) | (non_effect_allele_code >= n_allele)] = n_allele**2
+    
+    return allele_class
 
-            self.li_P_VALUE = []
+def GroupAlleleClass(phenotype, snp, allele_class):
+    """
+    Group the rows by (PHENOTYPE, SNP, allele class)
+    
+        Returns:
+            group_index (GroupIndex): Index of the (PHENOTYPE, SNP) pairs
+            class_id (np.ndarray): Group (0 ~ n_class-1) of each row - ordered by the pair, then by the allele class
+            key (np.ndarray): Pair * (len(li_ALLELE)**2 + 1) + allele class of each group
+    """
+    group_index = GroupIndex(phenotype, snp)
+    key, class_id = np.unique(group_index.group_id*(len(li_ALLELE)**2 + 1) + allele_class, return_inverse=True)
+    
+    return group_index, class_id.reshape(-1), key
 
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                if self.li_I_SQUARE[j] != 'Unprocessed': 
-                    Z = self.li_BETA_META[j] / self.li_STD_BETA_META[j]
-                    p_value = 2 * norm.cdf(-abs(Z))
+def CreatePartial(df_meta_input):
+    """
+    Calculate the sufficient statistics of every (PHENOTYPE, SNP, allele class) of the deduplicated study rows
+    
+    Each class keeps its own reference study (the smallest p-value), so the partials can be merged in any order 
+    and the reference alleles of each pair are selected only after the merge (See SelectPartialReference).
+    
+        Args:
+            df_meta_input (DataFrame): Study rows after DeduplicateData & CalculateBeta
+        
+        Returns:
+            df_group (DataFrame), df_study (DataFrame) : See WriteStatisticsStore - one df_group row per allele class of each pair
+    """
+    effect_allele_code = EncodeAllele(df_meta_input['EFFECT_ALLELE'])
+    non_effect_allele_code = EncodeAllele(df_meta_input['NON_EFFECT_ALLELE'])
+    effect_allele = DecodeAllele(effect_allele_code)
+    non_effect_allele = DecodeAllele(non_effect_allele_code)
+    p_val = df_meta_input['P_VAL'].to_numpy(dtype='float64')
+    beta = df_meta_input['BETA'].to_numpy(dtype='float64')
+    beta_se = df_meta_input['BETA_SE'].to_numpy(dtype='float64')
+    
+    group_index, class_id, key = GroupAlleleClass(df_meta_input['PHENOTYPE'].to_numpy(dtype='object'), df_meta_input['SNP'].to_numpy(dtype='object'), 
+                                                  CalculateAlleleClass(effect_allele_code, non_effect_allele_code))
+    
+    # The invalid alleles are not combined (sign 0), but the class keeps its p-value for the selection of the reference.
+    ref_row, sign = HarmonizeEffectDirection(class_id, effect_allele_code, non_effect_allele_code, p_val, len(key))
+    keep = sign != 0
+    beta = beta * sign
+    w = beta_se**(-2)
+    pair = key // (len(li_ALLELE)**2 + 1)
+    
+    df_group = pd.DataFrame({'PHENOTYPE': group_index.phenotype[pair], 
+                             'SNP': group_index.snp[pair], 
+                             'EFFECT_ALLELE': effect_allele[ref_row], 
+                             'NON_EFFECT_ALLELE': non_effect_allele[ref_row], 
+                             'BEST_P_VAL': p_val[ref_row], 
+                             'SUM_W': np.bincount(class_id[keep], weights=w[keep], minlength=len(key)), 
+                             'SUM_W_BETA': np.bincount(class_id[keep], weights=(w*beta)[keep], minlength=len(key)), 
+                             'SUM_W_BETA_SQUARE': np.bincount(class_id[keep], weights=(w*beta*beta)[keep], minlength=len(key)), 
+                             'SUM_W_SQUARE': np.bincount(class_id[keep], weights=(w**2)[keep], minlength=len(key)), 
+                             'COUNT': np.bincount(class_id[keep], minlength=len(key))})
+    
+    df_study = pd.DataFrame({'GROUP': class_id[keep], 
+                             'BETA': beta[keep], 
+                             'BETA_SE': beta_se[keep], 
+                             'P_VAL': p_val[keep], 
+                             'STUDY': df_meta_input['STUDY'].to_numpy(dtype='object')[keep]})
+    
+    return df_group, df_study
 
-                    self.li_P_VALUE.append(p_value)
+def MergePartial(li_df_group, li_df_study):
+    """
+    Merge the partials of CreatePartial - the classes of the same (PHENOTYPE, SNP, allele class) are re-harmonized to the 
+    reference with the smallest p-value & their sums are added (The merge is associative, so a merged partial can be merged again.)
+    A study with the rows of a pair in more than one partial (e.g. a file given to two maps) is rejected, since its rows would be summed twice.
+    
+        Args:
+            li_df_group (list), li_df_study (list): df_group & df_study of each partial
+        
+        Returns:
+            df_group (DataFrame), df_study (DataFrame) : Merged partial
+    """
+    offset = np.cumsum([0] + [len(df_group) for df_group in li_df_group])
+    df_group = pd.concat(li_df_group, ignore_index=True)
+    df_study = pd.concat([df_study.assign(GROUP = df_study['GROUP'].to_numpy(dtype='int64') + offset[i]) for i, df_study in enumerate(li_df_study)], ignore_index=True)
+    
+    effect_allele_code = EncodeAllele(df_group['EFFECT_ALLELE'].to_numpy(dtype='object'))
+    non_effect_allele_code = EncodeAllele(df_group['NON_EFFECT_ALLELE'].to_numpy(dtype='object'))
+    best_p_val = df_group['BEST_P_VAL'].to_numpy(dtype='float64')
+    
+    group_index, class_id, key = GroupAlleleClass(df_group['PHENOTYPE'].to_numpy(dtype='object'), df_group['SNP'].to_numpy(dtype='object'), 
+                                                  CalculateAlleleClass(effect_allele_code, non_effect_allele_code))
+    
+    # (pair, study) of each study row & the partials in which it appears
+    part = np.repeat(np.arange(len(li_df_study)), [len(df_study_part) for df_study_part in li_df_study])
+    study_code, li_study = pd.factorize(df_study['STUDY'].to_numpy(dtype='object'))
+    pair_study = group_index.group_id[df_study['GROUP'].to_numpy(dtype='int64')] * max(len(li_study), 1) + study_code
+    pair_study = np.unique(pair_study * len(li_df_study) + part) // len(li_df_study)
+    overlap = np.flatnonzero(pair_study[1:] == pair_study[:-1])
+    
+    if len(overlap) > 0:
+        pair, study = divmod(int(pair_study[overlap[0]]), max(len(li_study), 1))
+        raise ValueError(f"{len(np.unique(pair_study[overlap]))} (STUDY, PHENOTYPE, SNP) are in more than one partial file, e.g. {li_study[study]} ({group_index.phenotype[pair]}, {group_index.snp[pair]}) "
+                         "- each study should be mapped once for each pair")
+    
+    # flip : Relation of the reference of each partial class to the merged reference (always 1/-1 in the same allele class)
+    ref_row, flip = HarmonizeEffectDirection(class_id, effect_allele_code, non_effect_allele_code, best_p_val, len(key))
+    pair = key // (len(li_ALLELE)**2 + 1)
+    
+    df_group_merge = pd.DataFrame({'PHENOTYPE': group_index.phenotype[pair], 
+                                   'SNP': group_index.snp[pair], 
+                                   'EFFECT_ALLELE': df_group['EFFECT_ALLELE'].to_numpy(dtype='object')[ref_row], 
+                                   'NON_EFFECT_ALLELE': df_group['NON_EFFECT_ALLELE'].to_numpy(dtype='object')[ref_row], 
+                                   'BEST_P_VAL': best_p_val[ref_row]})
+    
+    for column in ['SUM_W', 'SUM_W_BETA', 'SUM_W_BETA_SQUARE', 'SUM_W_SQUARE', 'COUNT']:
+        value = df_group[column].to_numpy(dtype='float64') * (flip if column == 'SUM_W_BETA' else (flip != 0))
+        df_group_merge[column] = np.bincount(class_id, weights=value, minlength=len(key))
+    
+    df_group_merge['COUNT'] = df_group_merge['COUNT'].round().astype('int64')
+    
+    group = df_study['GROUP'].to_numpy(dtype='int64')
+    df_study = df_study[flip[group] != 0].reset_index(drop=True)
+    df_study['BETA'] = df_study['BETA'].to_numpy(dtype='float64') * flip[group[flip[group] != 0]]
+    df_study['GROUP'] = class_id[group[flip[group] != 0]]
+    
+    return df_group_merge, df_study
 
-                else:
-                    condition = (self.df_meta_input.SNP == self.li_PHENOTYPE_SNP[j][1]) & (self.df_meta_input.PHENOTYPE == self.li_PHENOTYPE_SNP[j][0]) 
-                    self.li_P_VALUE.append(self.df_meta_input[condition]['P_VAL'].values[0])
+def SelectPartialReference(df_group, df_study):
+    """
+    Select the allele class of the reference study (the smallest p-value) of every (PHENOTYPE, SNP) - the other classes are not combined,
+    as in CorrectEffectDirection. The pairs of which the reference has invalid alleles are removed.
+    
+        Args:
+            df_group (DataFrame), df_study (DataFrame) : Partial (See MergePartial)
+        
+        Returns:
+            df_group (DataFrame), df_study (DataFrame) : Statistics of one row per pair (See LoadStatistics)
+    """
+    group_index = GroupIndex(df_group['PHENOTYPE'].to_numpy(dtype='object'), df_group['SNP'].to_numpy(dtype='object'))
+    ref_row, _ = HarmonizeEffectDirection(group_index.group_id, np.zeros(len(df_group)), np.zeros(len(df_group)), 
+                                          df_group['BEST_P_VAL'].to_numpy(dtype='float64'), len(group_index))
+    
+    select = np.zeros(len(df_group), dtype='bool')
+    select[ref_row] = True
+    select &= df_group['COUNT'].to_numpy() > 0
+    relocal = np.cumsum(select) - 1
+    
+    group = df_study['GROUP'].to_numpy(dtype='int64')
+    df_study = df_study[select[group]].reset_index(drop=True)
+    df_study['GROUP'] = relocal[group[select[group]]]
+    
+    return df_group[select].reset_index(drop=True), df_study
 
+####################################
+# Clumping
+####################################
+
+def ReadLDIndex(path_ld_dir):
+    """
+    Read the LD pairs of the correlated_with_{rsID}.txt files (written by haploR.R, haploreg.py or plink_ld.py)
+    
+        Args:
+            path_ld_dir (str): Directory of the correlated_with_{rsID}.txt files
+        
+        Returns:
+            ld_snp_a (np.ndarray): Query rsID of each LD pair
+            ld_snp_b (np.ndarray): rsID in LD with the query rsID
+    """
+    li_snp_a = []
+    li_snp_b = []
+    
+    for file in sorted(os.listdir(path_ld_dir)):
+        if file.startswith('correlated_with_') and file.endswith('.txt'):
+            rsid = file[len('correlated_with_'):-len('.txt')]
             
-        except Exception as e:
-            print(str(e))
-            rv = False
-            rvmsg = str(e)
-            print(f"Error has occurred in the {myNAME} process") 
-            sys.exit()
+            # Header 'rsID' & one '{row number}\t{rsID}' line per SNP in LD (write.table of R)
+            with open(os.path.join(path_ld_dir, file)) as fp:
+                li_partner = [line.rstrip('\r\n').split('\t')[-1] for line in fp.readlines()[1:] if line.strip() != '']
+            
+            li_snp_a.extend([rsid]*len(li_partner))
+            li_snp_b.extend(li_partner)
     
-        return rv, rvmsg  
+    return np.array(li_snp_a, dtype='object'), np.array(li_snp_b, dtype='object')
 
-    def CreateOutputDataFrame(self): 
-        """
-        Create an Output DataFrame - df_meta_output
+def ReadLDPairFile(path_ld_file, min_r2=0.0):
+    """
+    Read the LD pairs of a whitespace-separated file with the SNP_A & SNP_B columns (e.g. the .ld file of plink --r2)
+    
+        Args:
+            path_ld_file (str): Path of the LD pair file (optionally gzip compressed)
+            min_r2 (float): Minimum R2 of the pairs kept (if the file has the R2 column)
+        
+        Returns:
+            ld_snp_a (np.ndarray): rsID of one side of each LD pair
+            ld_snp_b (np.ndarray): rsID of the other side of each LD pair
+    """
+    df_ld = pd.read_csv(path_ld_file, sep=r'\s+', dtype={'SNP_A': 'str', 'SNP_B': 'str'}, 
+                        usecols=lambda column: column in ['SNP_A', 'SNP_B', 'R2'])
+    
+    if 'R2' in df_ld.columns:
+        df_ld = df_ld[df_ld['R2'] >= min_r2]
+    
+    return df_ld['SNP_A'].to_numpy(dtype='object'), df_ld['SNP_B'].to_numpy(dtype='object')
 
+def CalculateClump(phenotype_id, snp_id, p_val, ld_id_a, ld_id_b, n_snp, p1=1.0, p2=1.0):
+    """
+    Clump the pairs of each phenotype in the order of P_VAL - the first pair which is not clumped is a lead, and the pairs of 
+    its SNPs in LD with P_VAL <= p2 are clumped with it. The LD pairs are symmetric & indexed by SNP (CSR), so the clumping is 
+    linear in the number of pairs & LD pairs after one sort.
+    
+        Args:
+            phenotype_id (np.ndarray): Phenotype index of each pair
+            snp_id (np.ndarray): SNP index (0 ~ n_snp-1) of each pair
+            p_val (np.ndarray): P-value of each pair (NaN: not clumped)
+            ld_id_a (np.ndarray): SNP index of one side of each LD pair
+            ld_id_b (np.ndarray): SNP index of the other side of each LD pair
+            n_snp (int): Number of SNPs
+            p1 (float): Maximum P_VAL of the lead SNPs
+            p2 (float): Maximum P_VAL of the clumped SNPs
+        
         Returns:
-        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
-        and message is a string containing a success or error message.
-        """          
-        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
-        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+            clump (np.ndarray): Not clumped (0) / Lead (1) / Clumped (2) of each pair
+            lead_row (np.ndarray): Position of the lead pair of each pair (-1 if not clumped)
+    """
+    # CSR of the LD partners of each SNP (both directions, without itself)
+    ld_a = np.concatenate([ld_id_a, ld_id_b]).astype('int64')
+    ld_b = np.concatenate([ld_id_b, ld_id_a]).astype('int64')
+    select = ld_a != ld_b
+    ld_a, ld_b = ld_a[select], ld_b[select]
+    ld_offset = np.concatenate([[0], np.cumsum(np.bincount(ld_a, minlength=n_snp))]).tolist()
+    ld_partner = ld_b[np.argsort(ld_a, kind='stable')].tolist()
+    
+    n_row = len(p_val)
+    clump = np.zeros(n_row, dtype='int8')
+    lead_row = np.full(n_row, -1, dtype='int64')
+    
+    # Pairs with a P_VAL in the order of (phenotype, P_VAL)
+    row = np.flatnonzero(~np.isnan(p_val))
+    row = row[np.lexsort((p_val[row], phenotype_id[row]))]
+    boundary = np.flatnonzero(np.diff(phenotype_id[row])) + 1
+    
+    # li_row_of_snp : Position of the pair of each SNP in the current phenotype (-1: none)
+    li_row_of_snp = [-1]*n_snp
+    li_clump = clump.tolist()
+    li_lead_row = lead_row.tolist()
+    li_p_val = p_val.tolist()
+    li_snp_id = snp_id.tolist()
+    
+    for row_phenotype in np.split(row, boundary):
+        row_phenotype = row_phenotype.tolist()
         
-        rv = True
-        rvmsg = "Success"
+        for r in row_phenotype:
+            li_row_of_snp[li_snp_id[r]] = r
         
-        try: 
-            # Output file - Meta Analysis
-            # df_meta_output : Data Frame of Meta-analysis Result Ouput File
-
-            self.df_meta_output = pd.DataFrame(columns = ['PHENOTYPE', 'SNP', 'EFFECT_ALLELE', 'NON_EFFECT_ALLELE', 'BETA', 'BETA_SE', 'P_VAL', 'BH_P_VAL', 'I_SQUARE', 'Q_HET'])
-
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                self.df_meta_output.loc[j, 'PHENOTYPE'] = self.li_PHENOTYPE_SNP[j][0]
-                self.df_meta_output.loc[j, 'SNP'] = self.li_PHENOTYPE_SNP[j][1]
-
-            self.df_meta_output['BETA'] = self.li_BETA_META
-            self.df_meta_output['BETA_SE'] = self.li_STD_BETA_META
-            self.df_meta_output['P_VAL'] = self.li_P_VALUE
-            self.df_meta_output['EFFECT_ALLELE'] = self.li_EFFECT_ALLELE
-            self.df_meta_output['NON_EFFECT_ALLELE'] = self.li_NON_EFFECT_ALLELE
-            self.df_meta_output['I_SQUARE'] = self.li_I_SQUARE
-            self.df_meta_output['Q_HET'] = self.li_Q  
-
+        for r in row_phenotype:
+            if li_p_val[r] > p1:
+                break
             
-        except Exception as e:
-            print(str(e))
-            rv = False
-            rvmsg = str(e)
-            print(f"Error has occurred in the {myNAME} process") 
-            sys.exit()
+            if li_clump[r] != 0:
+                continue
+            
+            li_clump[r] = 1
+            li_lead_row[r] = r
+            snp = li_snp_id[r]
+            
+            for partner in ld_partner[ld_offset[snp]:ld_offset[snp+1]]:
+                q = li_row_of_snp[partner]
+                
+                if (q >= 0) and (li_clump[q] == 0) and (li_p_val[q] <= p2):
+                    li_clump[q] = 2
+                    li_lead_row[q] = r
+        
+        for r in row_phenotype:
+            li_row_of_snp[li_snp_id[r]] = -1
     
-        return rv, rvmsg 
+    return np.array(li_clump, dtype='int8'), np.array(li_lead_row, dtype='int64')
 
-    def CorrectPvalue(self): 
-        """
-        BH adjustment - Correct the P-value
+####################################
+# Forest Plot
+####################################
 
-        Returns:
-        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
-        and message is a string containing a success or error message.
-        """          
-        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
-        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
+def SelectForestPlotRow(df_meta_output, li_phenotype=None, p_threshold=None, top_n=None):
+    """
+    Select the processed pairs of the forest plot, in the order of the output file
+    
+        Args:
+            df_meta_output (DataFrame): Output data frame
+            li_phenotype (list): Phenotypes to keep (None: all)
+            p_threshold (float): Keep the pairs with P_VAL <= p_threshold (None: all)
+            top_n (int): Keep the top_n pairs of the smallest P_VAL (None: all)
         
-        rv = True
-        rvmsg = "Success"
+        Returns:
+            df_forest (DataFrame): Selected rows of df_meta_output
+    """
+    select = df_meta_output['I_SQUARE'].notna().to_numpy()
+    
+    if li_phenotype is not None:
+        select = select & df_meta_output['PHENOTYPE'].astype('str').isin(li_phenotype).to_numpy()
+    
+    if p_threshold is not None:
+        select = select & (df_meta_output['P_VAL'] <= p_threshold).to_numpy()
+    
+    df_forest = df_meta_output[select]
+    
+    if (top_n is not None) and (len(df_forest) > top_n):
+        # Stable sort - the tied pairs are kept in the order of the output file.
+        order = np.argsort(df_forest['P_VAL'].to_numpy(), kind='stable')[:top_n]
+        df_forest = df_forest.iloc[np.sort(order)]
+    
+    return df_forest
+
+def RemoveForestPlotPage(path_forestplot):
+    """
+    Remove the forest plot images of a previous run - path_forestplot & its pages ({name}_{page number}.png)
+    
+        Args:
+            path_forestplot (str): Path of the forest plot image (e.g. output/meta_forestplot.png)
         
-        try: 
-            # P-value Correction - BH adjustment
-            # df_meta_output : Data Frame of Meta-analysis Result Ouput File
+        Returns:
+            li_removed (list): Names of the removed images
+    """
+    path_dir, name = os.path.split(path_forestplot)
+    prefix = os.path.splitext(name)[0] + '_'
+    li_removed = []
+    
+    if not os.path.isdir(path_dir or '.'):
+        return li_removed
+    
+    for file in os.listdir(path_dir or '.'):
+        if (file == name) or (file.startswith(prefix) and file.endswith('.png') and file[len(prefix):-len('.png')].isdigit()):
+            os.remove(os.path.join(path_dir, file))
+            li_removed.append(file)
+    
+    return li_removed
 
-            for idx, row in self.df_meta_output.iterrows():
-                condition = self.df_meta_output.PHENOTYPE == row['PHENOTYPE']
+def DrawForestPlot(path_forestplot, li_label, li_measure, li_lower, li_upper):
+    """
+    Draw one image of the forest plot - the height grows with the number of pairs beyond 20
+    
+        Args:
+            path_forestplot (str): Path of the image
+            li_label (list): Label (PHENOTYPE - SNP) of each pair
+            li_measure (list): BETA of each pair
+            li_lower (list): Lower limit of the 95% confidence interval
+            li_upper (list): Upper limit of the 95% confidence interval
+    """
+    p = EffectMeasurePlot(label=li_label, effect_measure=li_measure, lcl=li_lower, ucl=li_upper)
+    p.labels(effectmeasure='Beta')
+    p.colors(pointshape="D")
+    ax=p.plot(figsize=(10,max(5, 0.25*len(li_label))), t_adjuster=0.02)
+    plt.suptitle("Beta-Meta Forest Plot",x=0.35,y=0.98)
+    ax.set_xticks([0])
+    ax.set_xticklabels(['$0$'])
+    ax.spines['top'].set_visible(False)
+    ax.spines['left'].set_visible(False) 
+    ax.spines['bottom'].set_visible(True)
+    ax.spines['right'].set_position(('data', 0)) 
+    plt.savefig(path_forestplot,bbox_inches='tight')
+    plt.close('all')
 
-                ascending_rank_p_val = self.df_meta_output.groupby('PHENOTYPE')['P_VAL'].rank(method='min', ascending=True).values[idx]
-                self.df_meta_output.loc[idx, 'BH_P_VAL'] = self.df_meta_output.loc[idx, 'P_VAL'] * len(self.df_meta_output[condition]) / ascending_rank_p_val
+####################################
+# Manhattan & QQ Plot
+####################################
 
-            
-        except Exception as e:
-            print(str(e))
-            rv = False
-            rvmsg = str(e)
-            print(f"Error has occurred in the {myNAME} process") 
-            sys.exit()
+def CalculateGenomicLambda(p_val):
+    """
+    Genomic inflation factor - median of the 1-df chi-square statistics of the p-values / its expected median (0.4549)
+    """
+    p_val = p_val[~np.isnan(p_val)]
     
-        return rv, rvmsg 
-
-    def SaveOutputFiles(self): 
-        """
-        Save the Output Excel File & Forest Plot
+    if len(p_val) == 0:
+        return np.nan
+    
+    # The chi-square statistic decreases with the p-value, so its median is the one of the median p-value.
+    return chi2.isf(np.median(p_val), 1) / chi2.ppf(0.5, 1)
 
-        Returns:
-        A tuple (success, message), where success is a boolean indicating whether the operation was successful,
-        and message is a string containing a success or error message.
-        """          
-        myNAME = self.__class__.__name__+"::"+sys._getframe().f_code.co_name
-        WriteLog(myNAME, "In", type='INFO', fplog=self.__fplog)
-        
-        rv = True
-        rvmsg = "Success"
+def BinPlotPoint(x, y, n_bin_x=2000, n_bin_y=500):
+    """
+    Keep one point of each cell of a n_bin_x * n_bin_y grid over the range of the points - the binned points look the same in the image
+    
+        Args:
+            x (np.ndarray): X of the points
+            y (np.ndarray): Y of the points
+            n_bin_x (int): Number of cells along x (about the number of pixels)
+            n_bin_y (int): Number of cells along y
         
-        try: 
-            # Save the Output Excel File             
-            self.df_meta_output.to_excel(self.path_meta_output)
-
-            # Save the Output Forest Plot
-            labs = []
-            measure = []
-            lower = []
-            upper = []
-            for j in range(len(self.li_PHENOTYPE_SNP)):
-                if self.li_I_SQUARE[j] != 'Unprocessed':
-                    text = self.li_PHENOTYPE_SNP[j][0] + ' - ' + self.li_PHENOTYPE_SNP[j][1]
-                    beta_lower = self.li_BETA_META[j] - 1.96 * self.li_STD_BETA_META[j]
-                    beta_upper = self.li_BETA_META[j] + 1.96 * self.li_STD_BETA_META[j]
-
-                    labs.append(text)
-                    measure.append(self.li_BETA_META[j])
-                    lower.append(beta_lower)
-                    upper.append(beta_upper)
-
-            p = EffectMeasurePlot(label=labs, effect_measure=measure, lcl=lower, ucl=upper)
-            p.labels(effectmeasure='Beta')
-            p.colors(pointshape="D")
-            ax=p.plot(figsize=(10,5), t_adjuster=0.02)
-            plt.suptitle("Beta-Meta Forest Plot",x=0.35,y=0.98)
-            ax.set_xticks([0])
-            ax.set_xticklabels(['$0$'])
-            ax.spines['top'].set_visible(False)
-            ax.spines['left'].set_visible(False) 
-            ax.spines['bottom'].set_visible(True)
-            ax.spines['right'].set_position(('data', 0)) 
-            plt.savefig(self.path_meta_forestplot_output,bbox_inches='tight')
+        Returns:
+            index (np.ndarray): Position of the first point of each occupied cell
+    """
+    if len(x) == 0:
+        return np.array([], dtype='int64')
+    
+    def CalculateBin(value, n_bin):
+        value_min, value_max = value.min(), value.max()
+        width = (value_max - value_min) / n_bin if value_max > value_min else 1.0
+        return np.minimum(((value - value_min) / width).astype('int64'), n_bin - 1)
+    
+    cell = CalculateBin(x, n_bin_x) * n_bin_y + CalculateBin(y, n_bin_y)
+    _, index = np.unique(cell, return_index=True)
+    
+    return np.sort(index)
 
-        except Exception as e:
-            print(str(e))
-            rv = False
-            rvmsg = str(e)
-            print(f"Error has occurred in the {myNAME} process") 
-            sys.exit()
+def SaveManhattanQQPlot(path_manhattan, path_qq, phenotype_id, li_phenotype, p_val, exact_p=1e-3):
+    """
+    Draw the Manhattan plot (the pairs of each phenotype side by side in the order of the output) & the QQ plot of the p-values
     
-        return rv, rvmsg     
+    The pairs with p-value <= exact_p are drawn exactly, the others are reduced to one point per cell of the image (See BinPlotPoint),
+    so the number of drawn points does not grow with the number of pairs.
+    
+        Args:
+            path_manhattan (str): Path of the Manhattan plot
+            path_qq (str): Path of the QQ plot
+            phenotype_id (np.ndarray): Phenotype (position in li_phenotype) of each pair
+            li_phenotype (list): Phenotypes
+            p_val (np.ndarray): P-value of each pair (NaN: not drawn)
+            exact_p (float): P-value threshold of the exactly drawn pairs
+        
+        Returns:
+            genomic_lambda (float): Genomic inflation factor of the p-values (See CalculateGenomicLambda)
+    """
+    select = ~np.isnan(p_val)
+    phenotype_id = np.asarray(phenotype_id)[select]
+    p_val = p_val[select]
+    genomic_lambda = CalculateGenomicLambda(p_val)
+    
+    # -log10(p) with p = 0 drawn at the smallest positive float
+    log_p = -np.log10(np.maximum(p_val, np.finfo('float64').tiny))
+    exact = p_val <= exact_p
+    li_color = ['#1f4e79', '#8fb3d9']
+    
+    # Manhattan Plot - x : position of the pair in its phenotype after the pairs of the previous phenotypes
+    count = np.bincount(phenotype_id, minlength=len(li_phenotype))
+    offset = np.concatenate([[0], np.cumsum(count)])
+    order = np.argsort(phenotype_id, kind='stable')
+    x = np.empty(len(p_val), dtype='int64')
+    x[order] = np.arange(len(p_val))
+    
+    index_bulk = np.flatnonzero(~exact)
+    index = np.concatenate([index_bulk[BinPlotPoint(x[index_bulk], log_p[index_bulk])], np.flatnonzero(exact)])
+    
+    fig, ax = plt.subplots(figsize=(12,5))
+    ax.scatter(x[index], log_p[index], s=3, c=np.array(li_color)[phenotype_id[index] % 2], rasterized=True)
+    ax.axhline(-np.log10(5e-8), color='red', linestyle='--', linewidth=0.8)
+    
+    if len(li_phenotype) <= 50:
+        ax.set_xticks((offset[:-1] + offset[1:]) / 2)
+        ax.set_xticklabels(li_phenotype, rotation=90)
+    
+    ax.set_xlim(-0.5, max(len(p_val), 1) - 0.5)
+    ax.set_xlabel('PHENOTYPE')
+    ax.set_ylabel('$-log_{10}(P)$')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    fig.suptitle("Beta-Meta Manhattan Plot")
+    fig.savefig(path_manhattan, bbox_inches='tight')
+    plt.close(fig)
+    
+    # QQ Plot - observed -log10(p) against the expected of the uniform distribution, both in ascending order of p
+    order = np.argsort(p_val, kind='stable')
+    observed = log_p[order]
+    expected = -np.log10((np.arange(1, len(p_val) + 1) - 0.5) / len(p_val))
+    n_exact = int(exact.sum())
+    index = np.concatenate([np.arange(n_exact), n_exact + BinPlotPoint(expected[n_exact:], observed[n_exact:])])
+    
+    fig, ax = plt.subplots(figsize=(5,5))
+    ax.scatter(expected[index], observed[index], s=3, c=li_color[0], rasterized=True)
+    limit = expected.max(initial=0)
+    ax.plot([0, limit], [0, limit], color='red', linestyle='--', linewidth=0.8)
+    ax.set_xlabel('Expected $-log_{10}(P)$')
+    ax.set_ylabel('Observed $-log_{10}(P)$')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    fig.suptitle(f"Beta-Meta QQ Plot ($\\lambda$ = {genomic_lambda:.3f})")
+    fig.savefig(path_qq, bbox_inches='tight')
+    plt.close(fig)
+    
+    return genomic_lambda
 
 ####################################
 # main
 ####################################
 if __name__ == '__main__':
     
-    betameta = BetaMeta()
-    betameta.ConcatData()
-    betameta.DeduplicateData()   
-    betameta.CalculateBeta()    
-    betameta.CorrectEffectDirection() 
-    betameta.CalculateWeightedAverageEffectSize()    
-    betameta.CalculateQstatistic()
-    betameta.CalculateHeterogeneityMetric()
-    betameta.CalculateRandomEffectModel()  
-    betameta.CalculateIntegratedPvalue()  
-    betameta.CreateOutputDataFrame()  
-    betameta.CorrectPvalue()  
-    betameta.SaveOutputFiles()  
-    
-    print("Meta-Analysis Complete")
+    multiprocessing.freeze_support()
+    
+    parser = argparse.ArgumentParser(description='Beta-Meta: a meta-analysis application considering heterogeneity among GWAS')
+    parser.add_argument('--tau-method', dest='tau_method', choices=['DL', 'REML', 'PM'], default='DL', 
+                        help='Estimator of the between-study variance of the Random Effect Model (default: DL)')
+    parser.add_argument('--chunksize', dest='chunksize', type=int, default=1000000, 
+                        help='Number of rows parsed at once from the TSV/CSV/gzip input files (default: 1000000)')
+    parser.add_argument('--workers', dest='n_worker', type=int, default=None, 
+                        help='Number of worker processes reading the input files (default: number of CPUs)')
+    parser.add_argument('--excel-reader', dest='excel_reader', choices=['pandas', 'stream'], default='pandas', 
+                        help="Excel reader - 'pandas' reads the first worksheet at once, 'stream' reads all worksheets row by row with a flat memory use (default: pandas)")
+    parser.add_argument('--cache-dir', dest='cache_dir', default=None, 
+                        help='Directory caching the parsed input files by their content (default: no cache)')
+    parser.add_argument('--cache-size-mb', dest='cache_size_mb', type=int, default=10240, 
+                        help='Maximum size of the cache directory in MB (default: 10240)')
+    parser.add_argument('--shards', dest='n_shard', type=int, default=None, 
+                        help='Out-of-core mode - number of on-disk shards the input is hash-partitioned into by (PHENOTYPE, SNP)')
+    parser.add_argument('--shard-dir', dest='shard_dir', default=None, 
+                        help='Directory of the on-disk shards (default: ./shard/)')
+    parser.add_argument('--stats-dir', dest='stats_dir', default=None, 
+                        help='Directory persisting the sufficient statistics of each (PHENOTYPE, SNP) after the run')
+    parser.add_argument('--add-study', dest='li_add_study', nargs='+', default=None, 
+                        help='Incremental mode - add these input files to the statistics of --stats-dir instead of reading the input folder')
+    parser.add_argument('--float32', dest='float32', action='store_true', 
+                        help='Keep BETA & BETA_SE of the study rows in float32 (the meta-analysis is calculated in float64)')
+    parser.add_argument('--result-dir', dest='result_dir', default=None, 
+                        help='Directory of the memory-mapped result store (value.npy, valid.npy, field.json), readable by other processes during the run (not with --stream & --map)')
+    parser.add_argument('--output', dest='output_path', default=None, 
+                        help='Path of the output file - the format follows the extension (.xlsx, .tsv, .tsv.gz, .csv, .csv.gz, .parquet)')
+    parser.add_argument('--output-format', dest='output_format', default=None, choices=list(dict_OUTPUT_EXTENSION), 
+                        help='Format of the output file (default: from --output, Excel for output/meta_output.xlsx)')
+    parser.add_argument('--no-forest-plot', dest='forest_plot', action='store_false', 
+                        help='Do not draw the forest plot')
+    parser.add_argument('--forest-phenotype', dest='li_forest_phenotype', nargs='+', default=None, 
+                        help='Phenotypes of the forest plot (default: all)')
+    parser.add_argument('--forest-p-threshold', dest='forest_p_threshold', type=float, default=None, 
+                        help='Only the pairs with P_VAL at most this threshold in the forest plot')
+    parser.add_argument('--forest-top', dest='forest_top_n', type=int, default=None, 
+                        help='Only the N pairs of the smallest P_VAL in the forest plot')
+    parser.add_argument('--forest-rows', dest='forest_page_rows', type=int, default=50, 
+                        help='Number of pairs in each forest plot image - more pairs are split into meta_forestplot_1.png, meta_forestplot_2.png, ... (zero-padded, e.g. _01.png ~ _12.png for 10 or more images, default: 50)')
+    parser.add_argument('--forest-max-pages', dest='forest_max_page', type=int, default=20, 
+                        help='Maximum number of forest plot images - beyond it only the pairs of the smallest P_VAL are drawn with a warning (default: 20)')
+    parser.add_argument('--forest-all', dest='forest_all', action='store_true', 
+                        help='Draw every selected pair in the forest plot without --forest-max-pages')
+    parser.add_argument('--no-manhattan-qq', dest='manhattan_qq_plot', action='store_false', 
+                        help='Do not draw the Manhattan plot & the QQ plot')
+    parser.add_argument('--plot-exact-p', dest='plot_exact_p', type=float, default=1e-3, 
+                        help='The pairs with P_VAL at most this threshold are drawn exactly in the Manhattan & QQ plots, the others are binned (default: 1e-3)')
+    parser.add_argument('--clump-ld-dir', dest='clump_ld_dir', default=None, 
+                        help='Clump the output with the correlated_with_{rsID}.txt files of this directory (e.g. ../beta_meta_LD_script/output)')
+    parser.add_argument('--clump-ld-file', dest='clump_ld_file', default=None, 
+                        help='Clump the output with the LD pairs of this file (SNP_A & SNP_B columns, e.g. the .ld file of plink --r2)')
+    parser.add_argument('--clump-r2', dest='clump_r2', type=float, default=0.0, 
+                        help='Minimum R2 of the LD pairs of --clump-ld-file with the R2 column (default: 0)')
+    parser.add_argument('--clump-p1', dest='clump_p1', type=float, default=1.0, 
+                        help='Maximum P_VAL of the lead SNPs (default: 1)')
+    parser.add_argument('--clump-p2', dest='clump_p2', type=float, default=1.0, 
+                        help='Maximum P_VAL of the clumped SNPs (default: 1)')
+    parser.add_argument('--stream', dest='stream', action='store_true', 
+                        help='Streaming mode for input files sorted by SNP - bounded memory, written in chunks (output/meta_output.tsv.gz unless --output is not Excel) without the forest plot')
+    parser.add_argument('--by-phenotype', dest='by_phenotype', action='store_true', 
+                        help='Run the stages after the effect direction correction of every phenotype in parallel (--workers)')
+    parser.add_argument('--map', dest='path_partial', default=None, 
+                        help='Map/Reduce mode - save the harmonized sufficient statistics into this partial file instead of the output')
+    parser.add_argument('--map-files', dest='li_map_file', nargs='+', default=None, 
+                        help='Input files of --map (default: every file in the input folder)')
+    parser.add_argument('--map-part', dest='map_part', default=None, 
+                        help='K/N - with --map, only the (PHENOTYPE, SNP) pairs of the K-th (0 ~ N-1) of N hash partitions')
+    parser.add_argument('--reduce', dest='li_reduce', nargs='+', default=None, 
+                        help='Map/Reduce mode - merge these partial files into the output')
+    parser.add_argument('--p-adjust', dest='li_p_adjust', nargs='*', choices=['BONFERRONI', 'BY'], default=[], 
+                        help='P-value adjustments written in addition to BH_P_VAL')
+    args = parser.parse_args()
+    
+    if (args.li_add_study is not None) and (args.stats_dir is None):
+        parser.error('--add-study requires --stats-dir')
+    
+    if sum(value is not None for value in [args.li_add_study, args.path_partial, args.li_reduce, args.n_shard, args.stream or None]) > 1:
+        parser.error('--add-study, --map, --reduce, --shards and --stream cannot be used together')
+    
+    if (args.by_phenotype or args.stream) and ((args.li_add_study, args.path_partial, args.li_reduce, args.n_shard, args.stats_dir) != (None,)*5):
+        parser.error('--by-phenotype & --stream cannot be used with --add-study, --map, --reduce, --shards and --stats-dir')
+    
+    if args.by_phenotype and args.stream:
+        parser.error('--by-phenotype cannot be used with --stream')
+    
+    if args.forest_page_rows < 1:
+        parser.error('--forest-rows should be at least 1')
+    
+    if args.forest_max_page < 1:
+        parser.error('--forest-max-pages should be at least 1')
+    
+    if (args.clump_ld_dir is not None) and (args.clump_ld_file is not None):
+        parser.error('--clump-ld-dir cannot be used with --clump-ld-file')
+    
+    if ((args.clump_ld_dir is not None) or (args.clump_ld_file is not None)) and (args.stream or (args.path_partial is not None)):
+        parser.error('--clump-ld-dir & --clump-ld-file cannot be used with --stream and --map')
+    
+    if (args.result_dir is not None) and (args.stream or (args.path_partial is not None)):
+        parser.error('--result-dir cannot be used with --stream and --map')
+    
+    if (args.n_shard is not None) and (args.stats_dir is not None):
+        parser.error('--stats-dir is not supported with --shards')
+    
+    # The shards & the stream read the input files in chunks, so the whole parsed file of the cache is never built.
+    if (args.cache_dir is not None) and ((args.n_shard is not None) or args.stream):
+        parser.error('--cache-dir cannot be used with --shards and --stream')
+    
+    map_part = None
+    
+    if args.map_part is not None:
+        try:
+            map_part = tuple(int(value) for value in args.map_part.split('/'))
+            assert (len(map_part) == 2) and (0 <= map_part[0] < map_part[1])
+        
+        except (ValueError, AssertionError):
+            parser.error('--map-part should be K/N with 0 <= K < N')
+    
+    betameta = BetaMeta(tau_method=args.tau_method, li_p_adjust=args.li_p_adjust, chunksize=args.chunksize, n_worker=args.n_worker, 
+                        cache_dir=args.cache_dir, cache_max_bytes=args.cache_size_mb*1024**2, excel_reader=args.excel_reader, 
+                        n_shard=args.n_shard, shard_dir=args.shard_dir, stats_dir=args.stats_dir, float32=args.float32, 
+                        result_dir=args.result_dir, output_path=args.output_path, output_format=args.output_format, 
+                        forest_plot=args.forest_plot, li_forest_phenotype=args.li_forest_phenotype, forest_p_threshold=args.forest_p_threshold, 
+                        forest_top_n=args.forest_top_n, forest_page_rows=args.forest_page_rows, 
+                        forest_max_page=None if args.forest_all else args.forest_max_page, 
+                        manhattan_qq_plot=args.manhattan_qq_plot, plot_exact_p=args.plot_exact_p, 
+                        clump_ld_dir=args.clump_ld_dir, clump_ld_file=args.clump_ld_file, clump_r2=args.clump_r2, 
+                        clump_p1=args.clump_p1, clump_p2=args.clump_p2)
+    
+    if args.path_partial is not None:
+        betameta.MapData(args.path_partial, args.li_map_file, map_part)
+        
+        print("Map Complete")
+    
+    elif args.stream:
+        betameta.StreamData()
+        
+        print("Meta-Analysis Complete")
+    
+    else:
+        if args.n_shard:
+            betameta.ShardData()
+            betameta.CalculateShardData()
+        
+        elif (args.li_add_study is not None) or (args.li_reduce is not None):
+            if args.li_add_study is not None:
+                betameta.AddStudyData(args.li_add_study)
+            
+            else:
+                betameta.ReduceData(args.li_reduce)
+                
+                if args.stats_dir is not None:
+                    betameta.SaveStatistics()
+            
+            betameta.RunStage(li_RESULT_STAGE)
+        
+        elif args.by_phenotype:
+            betameta.ConcatData()
+            betameta.RunStage(li_INPUT_STAGE + li_HARMONIZE_STAGE)
+            betameta.CalculatePhenotypeData()
+        
+        elif args.stats_dir is not None:
+            # The statistics store keeps the studies before the harmonization (See CreatePartial).
+            betameta.ConcatData()
+            betameta.RunStage(li_INPUT_STAGE)
+            betameta.SaveStatistics()
+            betameta.RunStage(li_HARMONIZE_STAGE + li_COMBINE_STAGE + li_RESULT_STAGE)
+        
+        else:
+            betameta.ConcatData()
+            betameta.RunStage(li_META_STAGE)
+        
+        # The p-values of the per-phenotype mode are adjusted in each phenotype.
+        if not args.by_phenotype:
+            betameta.CorrectPvalue()  
+        
+        if (args.clump_ld_dir is not None) or (args.clump_ld_file is not None):
+            betameta.ClumpData()
+        
+        betameta.SaveOutputFiles()  
+        
+        print("Meta-Analysis Complete")
 
     
     
\ No newline at end of file
@@ -0,0 +1,93 @@
+import http.server
+import os
+import sys
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'script', 'beta_meta_LD_script'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'script', 'beta_meta_script'))
+
+
+class HaploregServer:
+    def __init__(self):
+        """
+        Initializes a HaploregServer object - local stand-in of the HaploReg form, answering the text output of queryHaploreg
+
+        Attributes:
+        url (str): URL of the form
+        li_request (list): Form of each request (query : list of the rsIDs, ldThresh, ldPop & time : time.monotonic() of the request)
+        li_status (list): HTTP error codes answered (in order) to the next requests
+        set_fail_rsid (set): rsIDs of which every request fails with 500
+        """
+        self.li_request = []
+        self.li_status = []
+        self.set_fail_rsid = set()
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                server.Respond(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/mammals/haploreg/haploreg.php"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def Partner(rsid):
+        """
+        SNPs in LD with a query rsID (itself first) - the rsIDs ending with 9 are unknown to the server
+        """
+        if rsid.endswith('9'):
+            return []
+
+        n = int(rsid[2:])
+
+        return [rsid] + [f"rs{n*10 + i}" for i in range(n % 3 + 1)]
+
+    def Respond(self, handler):
+        dict_form = urllib.parse.parse_qs(handler.rfile.read(int(handler.headers['Content-Length'])).decode())
+        li_rsid = dict_form['query'][0].split(',')
+
+        with self.lock:
+            self.li_request.append({'query': li_rsid, 'ldThresh': dict_form['ldThresh'][0], 'ldPop': dict_form['ldPop'][0], 'time': time.monotonic()})
+            status = self.li_status.pop(0) if len(self.li_status) > 0 else 500 if not self.set_fail_rsid.isdisjoint(li_rsid) else 200
+
+        if status != 200:
+            handler.send_response(status)
+            handler.end_headers()
+            return
+
+        li_line = ["chr\tpos_hg38\tr2\tD'\tis_query_snp\trsID\tref\talt\tquery_snp_rsid"]
+
+        for rsid in li_rsid:
+            for i, partner in enumerate(self.Partner(rsid)):
+                li_line.append(f"4\t{1000 + i}\t1\t1\t{int(partner == rsid)}\t{partner}\tA\tG\t{rsid}")
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/plain')
+        handler.end_headers()
+        handler.wfile.write(('\n'.join(li_line) + '\n').encode() if len(li_line) > 1 else b'')
+
+    def QueriedRsid(self):
+        return [rsid for request in self.li_request for rsid in request['query']]
+
+    def Close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def haploreg_server():
+    server = HaploregServer()
+
+    yield server
+
+    server.Close()
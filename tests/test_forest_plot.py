@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+from test_map_reduce import PATH_BETA_META, path_dir  # noqa: F401 (fixture)
+
+
+def RunForestPlot(path_dir, *args):
+    result = subprocess.run([sys.executable, PATH_BETA_META, '--workers', '1', '--no-manhattan-qq', '--forest-top', '24'] + list(args), 
+                            cwd=path_dir, env=dict(os.environ, MPLBACKEND='Agg'), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert (result.returncode == 0) and ('Error has occurred' not in result.stdout), result.stdout
+
+    return sorted(name for name in os.listdir(path_dir / 'output') if name.startswith('meta_forestplot'))
+
+
+def test_forest_plot_pages_are_zero_padded_and_replace_the_previous_run(path_dir):
+    li_page = RunForestPlot(path_dir, '--forest-rows', '2')
+
+    assert li_page == [f"meta_forestplot_{page:02d}.png" for page in range(1, 13)]
+
+    li_page = RunForestPlot(path_dir, '--forest-rows', '8')
+
+    assert li_page == ['meta_forestplot_1.png', 'meta_forestplot_2.png', 'meta_forestplot_3.png']
+
+    li_page = RunForestPlot(path_dir, '--forest-rows', '50')
+
+    assert li_page == ['meta_forestplot.png']
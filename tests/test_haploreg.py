@@ -0,0 +1,199 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import haploreg
+from haploreg import LDStore, LookupLD, QueryHaploreg, WriteCorrelatedFile
+
+PATH_LD_SCRIPT_DIR = os.path.dirname(os.path.abspath(haploreg.__file__))
+
+
+def RunHaploreg(path_dir, url, *args):
+    return subprocess.run([sys.executable, os.path.join(PATH_LD_SCRIPT_DIR, 'haploreg.py'), '--input', str(path_dir / 'input_SNPs.txt'),
+                           '--output-dir', str(path_dir / 'output'), '--store', str(path_dir / 'ld_store.sqlite'), '--url', url,
+                           '--rate', '100', '--backoff', '0'] + list(args),
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def test_query_haploreg(haploreg_server):
+    dict_partner = QueryHaploreg(['rs11', 'rs19', 'rs12'], ld_thresh=0.8, ld_pop='EUR', url=haploreg_server.url)
+
+    assert dict_partner == {'rs11': ['rs11', 'rs110', 'rs111', 'rs112'], 'rs19': [], 'rs12': ['rs12', 'rs120']}
+    assert haploreg_server.li_request[0]['query'] == ['rs11', 'rs19', 'rs12']
+    assert (haploreg_server.li_request[0]['ldThresh'], haploreg_server.li_request[0]['ldPop']) == ('0.8', 'EUR')
+
+
+def test_lookup_queries_missing_rsids_in_batches(haploreg_server, tmp_path):
+    li_rsid = [f"rs{n}" for n in range(100, 350)]
+    store = LDStore(str(tmp_path / 'ld_store.sqlite'))
+
+    # Cache miss - the rsIDs are queried in batches of batch_size, each rsID once
+    dict_partner, li_missing = LookupLD(store, li_rsid + li_rsid[:10], batch_size=100, url=haploreg_server.url, rate=None)
+
+    assert sorted(len(request['query']) for request in haploreg_server.li_request) == [50, 100, 100]
+    assert sorted(haploreg_server.QueriedRsid()) == sorted(li_rsid)
+    assert dict_partner == {rsid: haploreg_server.Partner(rsid) for rsid in li_rsid}
+    assert li_missing == []
+
+    # Cache hit - the stored rsIDs (also the ones unknown to HaploReg) are not queried again
+    n_request = len(haploreg_server.li_request)
+    dict_partner, li_missing = LookupLD(store, li_rsid[::-1], batch_size=100, url=haploreg_server.url, rate=None)
+
+    assert len(haploreg_server.li_request) == n_request
+    assert dict_partner == {rsid: haploreg_server.Partner(rsid) for rsid in li_rsid}
+    assert li_missing == []
+
+    # Partial hit - only the new rsIDs are queried
+    dict_partner, li_missing = LookupLD(store, li_rsid + ['rs1000', 'rs1001'], batch_size=100, url=haploreg_server.url, rate=None)
+
+    assert [request['query'] for request in haploreg_server.li_request[n_request:]] == [['rs1000', 'rs1001']]
+    assert dict_partner['rs1001'] == haploreg_server.Partner('rs1001')
+
+    # The store is keyed by the LD threshold & the population as well
+    n_request = len(haploreg_server.li_request)
+    LookupLD(store, li_rsid[:5], ld_thresh=0.8, batch_size=100, url=haploreg_server.url, rate=None)
+    LookupLD(store, li_rsid[:5], ld_pop='EUR', batch_size=100, url=haploreg_server.url, rate=None)
+
+    assert [(request['ldThresh'], request['ldPop']) for request in haploreg_server.li_request[n_request:]] == [('0.8', 'ASN'), ('1', 'EUR')]
+
+    store.Close()
+
+
+def test_offline_serves_the_store_only(haploreg_server, tmp_path):
+    li_rsid = ['rs101', 'rs102', 'rs109']
+
+    with open(tmp_path / 'input_SNPs.txt', 'w') as fp:
+        fp.write('\n'.join(li_rsid) + '\n\n')
+
+    # Nothing is stored yet - the rsIDs are reported & no file is written
+    result = RunHaploreg(tmp_path, haploreg_server.url, '--offline')
+
+    assert result.returncode == 1, result.stdout
+    assert '3 rsIDs are not resolved' in result.stdout
+    assert haploreg_server.li_request == []
+    assert os.listdir(tmp_path / 'output') == []
+
+    result = RunHaploreg(tmp_path, haploreg_server.url)
+
+    assert result.returncode == 0, result.stdout
+    assert len(haploreg_server.li_request) == 1
+
+    for name in os.listdir(tmp_path / 'output'):
+        os.remove(tmp_path / 'output' / name)
+
+    result = RunHaploreg(tmp_path, haploreg_server.url, '--offline')
+
+    assert result.returncode == 0, result.stdout
+    assert len(haploreg_server.li_request) == 1
+    assert sorted(os.listdir(tmp_path / 'output')) == sorted(f"correlated_with_{rsid}.txt" for rsid in li_rsid)
+
+    for rsid in li_rsid:
+        df_partner = pd.read_csv(tmp_path / 'output' / f"correlated_with_{rsid}.txt", sep='\t')
+        assert df_partner['rsID'].tolist() == haploreg_server.Partner(rsid)
+
+
+def test_correlated_file_format_matches_haploR(tmp_path):
+    # The committed outputs of haploR.R (write.table of the rsID column with the row numbers)
+    path_r_output_dir = os.path.join(PATH_LD_SCRIPT_DIR, 'output')
+
+    for name in sorted(os.listdir(path_r_output_dir)):
+        if not name.startswith('correlated_with_'):
+            continue
+
+        rsid = name[len('correlated_with_'):-len('.txt')]
+        li_partner = pd.read_csv(os.path.join(path_r_output_dir, name), sep='\t')['rsID'].tolist()
+        WriteCorrelatedFile(str(tmp_path), rsid, li_partner)
+
+        with open(os.path.join(path_r_output_dir, name), 'rb') as fp_r, open(tmp_path / name, 'rb') as fp:
+            assert fp.read() == fp_r.read()
+
+
+def test_retry_on_server_errors(haploreg_server):
+    haploreg_server.li_status = [503, 429, 500]
+    dict_partner = haploreg.QueryHaploregRetry(['rs11'], 1, 'ASN', haploreg_server.url, haploreg.RateLimiter(None), n_retry=3, backoff=0)
+
+    assert dict_partner == {'rs11': haploreg_server.Partner('rs11')}
+    assert len(haploreg_server.li_request) == 4
+
+
+def test_no_retry_on_client_errors_and_after_the_last_retry(haploreg_server):
+    haploreg_server.li_status = [404]
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        haploreg.QueryHaploregRetry(['rs11'], 1, 'ASN', haploreg_server.url, haploreg.RateLimiter(None), n_retry=3, backoff=0)
+
+    assert (e.value.code, len(haploreg_server.li_request)) == (404, 1)
+
+    haploreg_server.li_status = [503, 503, 503]
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        haploreg.QueryHaploregRetry(['rs11'], 1, 'ASN', haploreg_server.url, haploreg.RateLimiter(None), n_retry=2, backoff=0)
+
+    assert (e.value.code, len(haploreg_server.li_request)) == (503, 4)
+
+
+def test_rate_limiter_spaces_the_requests_of_all_threads(haploreg_server, tmp_path):
+    rate = 20.0
+    rate_limiter = haploreg.RateLimiter(rate)
+    li_time = []
+
+    def Wait():
+        rate_limiter.Wait()
+        li_time.append(time.monotonic())
+
+    li_thread = [threading.Thread(target=Wait) for _ in range(8)]
+
+    for thread in li_thread:
+        thread.start()
+
+    for thread in li_thread:
+        thread.join()
+
+    # (with a margin for the scheduling of the threads after the sleep)
+    assert np.diff(sorted(li_time)).min() >= 0.5/rate
+    assert max(li_time) - min(li_time) >= 6.5/rate
+
+    # The concurrent batches of LookupLD share the limit
+    store = LDStore(str(tmp_path / 'ld_store.sqlite'))
+    LookupLD(store, [f"rs{n}" for n in range(100, 160)], batch_size=10, url=haploreg_server.url, n_worker=4, rate=rate)
+    store.Close()
+
+    li_request_time = sorted(request['time'] for request in haploreg_server.li_request)
+
+    assert len(li_request_time) == 6
+    assert li_request_time[-1] - li_request_time[0] >= 4.5/rate
+
+
+def test_resume_after_a_failed_batch(haploreg_server, tmp_path):
+    li_rsid = [f"rs{n}" for n in range(100, 300)]
+
+    with open(tmp_path / 'input_SNPs.txt', 'w') as fp:
+        fp.write('\n'.join(li_rsid) + '\n')
+
+    # Every request of the batch of rs150 fails - the other batches are stored
+    haploreg_server.set_fail_rsid = {'rs150'}
+    result = RunHaploreg(tmp_path, haploreg_server.url, '--batch-size', '50', '--retries', '2')
+
+    li_failed = [request['query'] for request in haploreg_server.li_request if 'rs150' in request['query']]
+
+    assert result.returncode == 1, result.stdout
+    assert '50 rsIDs are not resolved' in result.stdout
+    assert len(li_failed) == 3
+    assert len(os.listdir(tmp_path / 'output')) == 150
+    assert not os.path.exists(tmp_path / 'output' / 'correlated_with_rs150.txt')
+
+    # The second run queries the rsIDs of the failed batch only
+    haploreg_server.set_fail_rsid = set()
+    n_request = len(haploreg_server.li_request)
+    result = RunHaploreg(tmp_path, haploreg_server.url, '--batch-size', '50', '--retries', '2')
+
+    assert result.returncode == 0, result.stdout
+    assert sorted(rsid for request in haploreg_server.li_request[n_request:] for rsid in request['query']) == sorted(li_failed[0])
+    assert len(os.listdir(tmp_path / 'output')) == 200
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PATH_BETA_META = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'script', 'beta_meta_script', 'beta_meta.py')
+
+li_COLUMN = ['PHENOTYPE', 'SNP', 'EFFECT_ALLELE', 'NON_EFFECT_ALLELE', 'BETA', 'BETA_SE', 'OR', 'OR_95%CI_LOWER', 'OR_95%CI_UPPER', 'P_VAL']
+dict_COMPLEMENT = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
+
+
+def WriteStudyFiles(path_input_dir, n_study=4, n_snp=120, seed=0):
+    """
+    Write n_study TSV files of the same pairs with swapped alleles, opposite strands, another allele class, OR-only rows & duplicated rows
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(path_input_dir, exist_ok=True)
+    li_rows = [[] for _ in range(n_study)]
+
+    for i in range(n_snp):
+        phenotype, snp = f"Pheno{i % 3}", f"rs{1000 + i}"
+        effect_allele, non_effect_allele = rng.choice(list('AGTC'), 2, replace=False)
+        effect = rng.normal(0, 0.2)
+
+        for study in rng.choice(n_study, rng.integers(1, n_study + 1), replace=False):
+            ea, nea, sign = effect_allele, non_effect_allele, 1
+            r = rng.random()
+
+            if r < 0.25:
+                ea, nea, sign = nea, ea, -1
+
+            elif r < 0.35:
+                ea, nea = dict_COMPLEMENT[ea], dict_COMPLEMENT[nea]
+
+            elif r < 0.40:
+                nea = [allele for allele in 'AGTC' if allele not in (ea, nea, dict_COMPLEMENT[ea])][0]
+
+            beta_se = rng.uniform(0.02, 0.3)
+            beta = sign * (effect + rng.normal(0, beta_se))
+            p_val = float(np.exp(-abs(beta / beta_se)))
+
+            if rng.random() < 0.5:
+                row = [phenotype, snp, ea, nea, beta, beta_se, np.nan, np.nan, np.nan, p_val]
+
+            else:
+                row = [phenotype, snp, ea, nea, np.nan, np.nan, np.exp(beta), np.exp(beta - 1.96*beta_se), np.exp(beta + 1.96*beta_se), p_val]
+
+            li_rows[study].append(row)
+
+            if rng.random() < 0.05:
+                li_rows[study].append(row)
+
+    li_path = []
+
+    for study, rows in enumerate(li_rows):
+        li_path.append(os.path.join(path_input_dir, f"study{study}.tsv"))
+        pd.DataFrame(rows, columns=li_COLUMN).to_csv(li_path[-1], sep='\t', index=False)
+
+    return li_path
+
+
+def BetaMetaCommand(*args):
+    return [sys.executable, PATH_BETA_META, '--workers', '1', '--no-forest-plot', '--no-manhattan-qq'] + list(args)
+
+
+def RunBetaMeta(path_dir, *args):
+    result = subprocess.run(BetaMetaCommand(*args), cwd=path_dir, env=dict(os.environ, MPLBACKEND='Agg'),
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert result.returncode == 0, result.stdout
+
+    return result.stdout
+
+
+def RunMapWorkers(path_dir, li_args):
+    """
+    Run the maps as concurrent local worker processes
+    """
+    li_process = [subprocess.Popen(BetaMetaCommand(*args), cwd=path_dir, env=dict(os.environ, MPLBACKEND='Agg'),
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) for args in li_args]
+
+    for process in li_process:
+        stdout, _ = process.communicate()
+        assert (process.returncode == 0) and ('Error has occurred' not in stdout), stdout
+
+
+def ReadOutput(path_output):
+    # The values which are not processed are written 'Unprocessed' (See FormatOutputDataFrame).
+    df_meta_output = pd.read_csv(path_output, sep='\t', na_values=['Unprocessed'])
+
+    return df_meta_output.sort_values(['PHENOTYPE', 'SNP']).reset_index(drop=True)
+
+
+@pytest.fixture
+def path_dir(tmp_path):
+    WriteStudyFiles(str(tmp_path / 'input'))
+    os.makedirs(tmp_path / 'output')
+
+    return tmp_path
+
+
+@pytest.mark.parametrize('tau_method', ['DL', 'REML'])
+def test_reduce_of_split_files_matches_single_run(path_dir, tau_method):
+    RunBetaMeta(path_dir, '--tau-method', tau_method, '--output', 'output/single.tsv')
+
+    RunMapWorkers(path_dir, [['--map', f"parts/p{study}", '--map-files', f"input/study{study}.tsv"] for study in range(4)])
+    stdout = RunBetaMeta(path_dir, '--tau-method', tau_method, '--output', 'output/reduce.tsv', '--reduce', 'parts/p2', 'parts/p0', 'parts/p3', 'parts/p1')
+
+    assert 'Error has occurred' not in stdout
+    pd.testing.assert_frame_equal(ReadOutput(path_dir / 'output' / 'reduce.tsv'), ReadOutput(path_dir / 'output' / 'single.tsv'), rtol=1e-9)
+
+
+def test_reduce_of_pair_partitions_matches_single_run(path_dir):
+    RunBetaMeta(path_dir, '--output', 'output/single.tsv')
+
+    # Two groups of files, each split into 3 partitions of the pairs
+    li_args = [['--map', f"parts/{group}_{k}", '--map-part', f"{k}/3", '--map-files'] + li_file
+               for group, li_file in enumerate([['input/study0.tsv', 'input/study1.tsv'], ['input/study2.tsv', 'input/study3.tsv']]) for k in range(3)]
+    RunMapWorkers(path_dir, li_args)
+    stdout = RunBetaMeta(path_dir, '--output', 'output/reduce.tsv', '--reduce', *sorted(args[1] for args in li_args))
+
+    assert 'Error has occurred' not in stdout
+    pd.testing.assert_frame_equal(ReadOutput(path_dir / 'output' / 'reduce.tsv'), ReadOutput(path_dir / 'output' / 'single.tsv'), rtol=1e-9)
+
+
+def test_reduce_rejects_study_in_two_partials(path_dir):
+    RunMapWorkers(path_dir, [['--map', 'parts/a', '--map-files', 'input/study0.tsv', 'input/study1.tsv'],
+                             ['--map', 'parts/b', '--map-files', 'input/study1.tsv', 'input/study2.tsv']])
+    stdout = RunBetaMeta(path_dir, '--output', 'output/reduce.tsv', '--reduce', 'parts/a', 'parts/b')
+
+    assert 'in more than one partial file' in stdout
+    assert not os.path.exists(path_dir / 'output' / 'reduce.tsv')
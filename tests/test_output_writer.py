@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from beta_meta import WriteOutputFile
+
+pytest.importorskip('pyarrow')
+
+
+def ClumpedOutput(n_row=7):
+    """
+    Output data frame of a --clump run of which the first rows are not clumped (CLUMP & LEAD_SNP are NaN)
+    """
+    df_meta_output = pd.DataFrame({'PHENOTYPE': ['Pheno'] * n_row, 
+                                   'SNP': [f"rs{i}" for i in range(n_row)], 
+                                   'EFFECT_ALLELE': ['A'] * n_row, 
+                                   'NON_EFFECT_ALLELE': ['G'] * n_row, 
+                                   'BETA': np.linspace(-0.3, 0.3, n_row), 
+                                   'P_VAL': np.geomspace(1e-9, 0.5, n_row), 
+                                   'TAU_CONVERGED': np.array([np.nan, True, np.nan, False, np.nan, True, np.nan][:n_row], dtype='object'), 
+                                   'TAU_ITERATION': np.array([np.nan, 3, np.nan, 100, np.nan, 7, np.nan][:n_row], dtype='object')})
+    # (object columns as in ClumpData)
+    df_meta_output['CLUMP'] = pd.Series([np.nan, np.nan, np.nan, 'LEAD', 'CLUMPED', np.nan, 'LEAD'][:n_row], dtype='object')
+    df_meta_output['LEAD_SNP'] = pd.Series([np.nan, np.nan, np.nan, 'rs3', 'rs3', np.nan, 'rs6'][:n_row], dtype='object')
+
+    return df_meta_output
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 100])
+def test_parquet_output_in_chunks(tmp_path, chunksize):
+    df_meta_output = ClumpedOutput()
+    WriteOutputFile(df_meta_output, str(tmp_path / 'x.parquet'), chunksize=chunksize)
+    df_read = pd.read_parquet(tmp_path / 'x.parquet')
+
+    assert len(df_read) == len(df_meta_output)
+    assert df_read['CLUMP'].fillna('').tolist() == ['', '', '', 'LEAD', 'CLUMPED', '', 'LEAD']
+    assert df_read['LEAD_SNP'].fillna('').tolist() == ['', '', '', 'rs3', 'rs3', '', 'rs6']
+    assert df_read['TAU_ITERATION'].fillna(-1).tolist() == [-1, 3, -1, 100, -1, 7, -1]
+    np.testing.assert_allclose(df_read['P_VAL'].to_numpy(), df_meta_output['P_VAL'].to_numpy())
+
+
+def test_tsv_output_in_chunks_matches_single_chunk(tmp_path):
+    df_meta_output = ClumpedOutput()
+    WriteOutputFile(df_meta_output, str(tmp_path / 'chunked.tsv'), chunksize=2)
+    WriteOutputFile(df_meta_output, str(tmp_path / 'single.tsv'), chunksize=100)
+
+    assert (tmp_path / 'chunked.tsv').read_bytes() == (tmp_path / 'single.tsv').read_bytes()
@@ -0,0 +1,151 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+from test_map_reduce import RunBetaMeta, li_COLUMN
+
+NA = np.nan
+
+# Study rows of each input file (PHENOTYPE, SNP, EFFECT_ALLELE, NON_EFFECT_ALLELE, BETA, BETA_SE, OR, OR_95%CI_LOWER, OR_95%CI_UPPER, P_VAL)
+dict_STUDY_ROWS = {
+    'study0.tsv': [['P1', 'rs1', 'A', 'G', 0.10, 0.05, NA, NA, NA, 0.04],
+                   ['P1', 'rs2', 'A', 'G', 0.50, 0.05, NA, NA, NA, 1e-20],
+                   ['P1', 'rs4', 'A', 'G', 0.20, 0.05, NA, NA, NA, 1e-5],
+                   ['P1', 'rs5', 'A', 'G', 0.50, 0.50, NA, NA, NA, 0.3],
+                   ['P2', 'rs1', 'A', 'G', 0.01, 0.10, NA, NA, NA, 0.01],
+                   ['P2', 'rs2', 'A', 'G', 0.02, 0.10, NA, NA, NA, 0.04],
+                   ['P2', 'rs3', 'A', 'G', 0.03, 0.10, NA, NA, NA, 0.03],
+                   ['P2', 'rs4', 'A', 'G', 0.04, 0.10, NA, NA, NA, 0.04],
+                   ['P2', 'rs5', 'A', 'G', 0.05, 0.10, NA, NA, NA, 0.5]],
+    'study1.tsv': [['P1', 'rs1', 'A', 'G', 0.12, 0.06, NA, NA, NA, 0.05],
+                   ['P1', 'rs2', 'A', 'G', -0.20, 0.05, NA, NA, NA, 1e-4],
+                   ['P1', 'rs3', 'C', 'T', 0.30, 0.10, NA, NA, NA, 0.003],
+                   ['P1', 'rs4', 'G', 'A', -0.18, 0.06, NA, NA, NA, 0.003],
+                   ['P1', 'rs5', 'A', 'G', 0.50, 0.25, NA, NA, NA, 0.04]],
+    'study2.tsv': [['P1', 'rs1', 'A', 'G', NA, NA, 1.10, 0.95, 1.27, 0.2],
+                   ['P1', 'rs2', 'A', 'G', 0.10, 0.10, NA, NA, NA, 0.3],
+                   ['P1', 'rs4', 'T', 'C', 0.22, 0.08, NA, NA, NA, 0.01]],
+    'study3.tsv': [['P1', 'rs4', 'C', 'T', -0.25, 0.10, NA, NA, NA, 0.02]],
+    'study4.tsv': [['P1', 'rs4', 'A', 'C', 0.90, 0.10, NA, NA, NA, 1e-3]],
+}
+
+
+def FixedEffect(li_beta, li_beta_se):
+    """
+    Weighted average, its standard error & Cochran's Q of the original per-pair loops
+    """
+    li_w = [beta_se**(-2) for beta_se in li_beta_se]
+    beta_meta = sum(w * beta for w, beta in zip(li_w, li_beta)) / sum(li_w)
+    q = sum(w * (beta - beta_meta)**2 for w, beta in zip(li_w, li_beta))
+
+    return beta_meta, sum(li_w)**-0.5, q
+
+
+def TwoSidedPvalue(beta, beta_se):
+    return 2 * norm.cdf(-abs(beta / beta_se))
+
+
+@pytest.fixture(scope='module')
+def df_output(tmp_path_factory):
+    """
+    Meta-analysis output of dict_STUDY_ROWS, run once for the module - the original row-by-row code gives the same BETA, BETA_SE, 
+    P_VAL, Q_HET & I_SQUARE (BH_P_VAL differs only where its missing step-up was not monotone)
+    """
+    tmp_path = tmp_path_factory.mktemp('regression')
+    os.makedirs(tmp_path / 'input')
+    os.makedirs(tmp_path / 'output')
+
+    for name, rows in dict_STUDY_ROWS.items():
+        pd.DataFrame(rows, columns=li_COLUMN).to_csv(tmp_path / 'input' / name, sep='\t', index=False)
+
+    RunBetaMeta(tmp_path, '--output', 'output/meta_output.tsv', '--p-adjust', 'BY', 'BONFERRONI')
+
+    # The values which are not processed stay the string 'Unprocessed'.
+    df_output = pd.read_csv(tmp_path / 'output' / 'meta_output.tsv', sep='\t', dtype={'I_SQUARE': 'object', 'Q_HET': 'object'})
+
+    return df_output.set_index(['PHENOTYPE', 'SNP'])
+
+
+def AssertPair(df_output, pair, beta, beta_se, p_val, q, i_square):
+    row = df_output.loc[pair]
+
+    assert row['BETA'] == pytest.approx(beta, rel=1e-9)
+    assert row['BETA_SE'] == pytest.approx(beta_se, rel=1e-9)
+    assert row['P_VAL'] == pytest.approx(p_val, rel=1e-9)
+
+    for column, expected in [('Q_HET', q), ('I_SQUARE', i_square)]:
+        if expected == 'Unprocessed':
+            assert row[column] == 'Unprocessed'
+
+        else:
+            assert float(row[column]) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+def test_fixed_effect_q_and_i_square(df_output):
+    # rs1 : 3 studies (the 3rd from OR & its 95% CI) of low heterogeneity - fixed effect
+    beta_or, beta_se_or = math.log(1.10), (math.log(1.27) - math.log(0.95)) / 3.92
+    beta, beta_se, q = FixedEffect([0.10, 0.12, beta_or], [0.05, 0.06, beta_se_or])
+
+    assert q < 2
+    AssertPair(df_output, ('P1', 'rs1'), beta, beta_se, TwoSidedPvalue(beta, beta_se), q, 0.0)
+
+    # rs3 : A single study - its own values & 'Unprocessed' Q & I_SQUARE
+    AssertPair(df_output, ('P1', 'rs3'), 0.30, 0.10, 0.003, 'Unprocessed', 'Unprocessed')
+    assert tuple(df_output.loc[('P1', 'rs3'), ['EFFECT_ALLELE', 'NON_EFFECT_ALLELE']]) == ('C', 'T')
+
+    # rs5 : Equal effect sizes - Q = 0, so I_SQUARE is 'Unprocessed' & P_VAL is the p-value of the first study
+    AssertPair(df_output, ('P1', 'rs5'), 0.5, 20**-0.5, 0.3, 0.0, 'Unprocessed')
+
+
+def test_dersimonian_laird_random_effect(df_output):
+    # rs2 : I_SQUARE >= 50 - the DerSimonian-Laird tau^2 re-weights the studies with 1/(beta_se^2 + tau^2)
+    li_beta, li_beta_se = [0.50, -0.20, 0.10], [0.05, 0.05, 0.10]
+    _, _, q = FixedEffect(li_beta, li_beta_se)
+    li_w = [beta_se**(-2) for beta_se in li_beta_se]
+    i_square = 100 * (q - 2) / q
+    tau_square = max((q - 2) / (sum(li_w) - sum(w**2 for w in li_w) / sum(li_w)), 0)
+    li_w_random = [1/(1/w + tau_square) for w in li_w]
+    beta = sum(w * b for w, b in zip(li_w_random, li_beta)) / sum(li_w_random)
+    beta_se = sum(li_w_random)**-0.5
+
+    assert i_square >= 50
+    AssertPair(df_output, ('P1', 'rs2'), beta, beta_se, TwoSidedPvalue(beta, beta_se), q, i_square)
+
+
+def test_harmonized_flipped_and_complement_alleles(df_output):
+    # rs4 : The reference alleles (A, G) are of the smallest p-value - G/A is flipped, T/C is the same strand complement, 
+    # C/T is the flipped complement & A/C does not match, so it is dropped
+    beta, beta_se, q = FixedEffect([0.20, 0.18, 0.22, 0.25], [0.05, 0.06, 0.08, 0.10])
+    i_square = max(100 * (q - 3) / q, 0)
+
+    assert i_square < 50
+    assert tuple(df_output.loc[('P1', 'rs4'), ['EFFECT_ALLELE', 'NON_EFFECT_ALLELE']]) == ('A', 'G')
+    AssertPair(df_output, ('P1', 'rs4'), beta, beta_se, TwoSidedPvalue(beta, beta_se), q, i_square)
+
+
+def test_pairs_are_keyed_by_phenotype_and_snp(df_output):
+    # The same SNPs of P1 & P2 are separate pairs, each once
+    assert df_output.index.is_unique
+    assert sorted(df_output.index) == [('P1', f"rs{i}") for i in range(1, 6)] + [('P2', f"rs{i}") for i in range(1, 6)]
+    AssertPair(df_output, ('P2', 'rs1'), 0.01, 0.10, 0.01, 'Unprocessed', 'Unprocessed')
+
+
+def test_bh_by_and_bonferroni_step_up(df_output):
+    # P2 : p = 0.01, 0.04, 0.03, 0.04, 0.5 (m = 5) - sorted 0.01, 0.03, 0.04, 0.04, 0.5 with p*m/rank 0.05, 0.075, 0.0667, 0.05, 0.5 
+    # The step-up takes the minimum over the larger ranks - 0.05, 0.05, 0.05, 0.05, 0.5 (the ties get the same value)
+    df_p2 = df_output.loc['P2'].loc[['rs1', 'rs2', 'rs3', 'rs4', 'rs5']]
+    c_5 = 1 + 1/2 + 1/3 + 1/4 + 1/5
+
+    np.testing.assert_allclose(df_p2['BH_P_VAL'], [0.05, 0.05, 0.05, 0.05, 0.5], rtol=1e-12)
+    np.testing.assert_allclose(df_p2['BY_P_VAL'], [0.05*c_5, 0.05*c_5, 0.05*c_5, 0.05*c_5, 1.0], rtol=1e-12)
+    np.testing.assert_allclose(df_p2['BONFERRONI_P_VAL'], [0.05, 0.2, 0.15, 0.2, 1.0], rtol=1e-12)
+
+    # P1 is adjusted separately (m = 5)
+    df_p1 = df_output.loc['P1'].sort_values('P_VAL')
+    bh = np.minimum.accumulate((df_p1['P_VAL'] * 5 / np.arange(1, 6)).to_numpy()[::-1])[::-1]
+
+    np.testing.assert_allclose(df_p1['BH_P_VAL'], np.minimum(bh, 1), rtol=1e-12)
@@ -0,0 +1,42 @@
+import os
+import subprocess
+
+import pandas as pd
+
+from test_map_reduce import BetaMetaCommand, ReadOutput, RunBetaMeta, path_dir  # noqa: F401 (fixture)
+
+
+def test_shard_run_matches_single_run_and_removes_its_directories(path_dir):
+    RunBetaMeta(path_dir, '--output', 'output/single.tsv')
+    stdout = RunBetaMeta(path_dir, '--output', 'output/shard.tsv', '--shards', '3', '--chunksize', '50')
+
+    assert 'Error has occurred' not in stdout
+    pd.testing.assert_frame_equal(ReadOutput(path_dir / 'output' / 'shard.tsv'), ReadOutput(path_dir / 'output' / 'single.tsv'), rtol=1e-9)
+
+    # The default shard/ directory is created by the run, so it is removed with the shards.
+    assert not os.path.exists(path_dir / 'shard')
+
+    # A given --shard-dir which exists is kept (only the directories created under it are removed).
+    os.makedirs(path_dir / 'scratch')
+    RunBetaMeta(path_dir, '--output', 'output/shard.tsv', '--shards', '3', '--shard-dir', 'scratch/a/b')
+
+    assert os.listdir(path_dir / 'scratch') == []
+
+
+def test_shard_run_keeps_float32(path_dir):
+    RunBetaMeta(path_dir, '--output', 'output/single.tsv', '--float32')
+    RunBetaMeta(path_dir, '--output', 'output/shard.tsv', '--float32', '--shards', '3')
+    RunBetaMeta(path_dir, '--output', 'output/shard64.tsv', '--shards', '3')
+
+    df_shard = ReadOutput(path_dir / 'output' / 'shard.tsv')
+
+    pd.testing.assert_frame_equal(df_shard, ReadOutput(path_dir / 'output' / 'single.tsv'), rtol=1e-12)
+    assert not df_shard['BETA'].equals(ReadOutput(path_dir / 'output' / 'shard64.tsv')['BETA'])
+
+
+def test_cache_dir_is_rejected_with_shards(path_dir):
+    result = subprocess.run(BetaMetaCommand('--shards', '3', '--cache-dir', 'cache'), cwd=path_dir, 
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    assert result.returncode != 0
+    assert '--cache-dir cannot be used with --shards' in result.stdout
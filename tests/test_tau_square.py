@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from scipy.optimize import brentq, minimize_scalar
+
+from beta_meta import CalculateGroupStatistics, CalculateTauSquareDL, CalculateTauSquareIterative
+
+# Groups on which the undamped Fisher scoring oscillated until max_iter (effect sizes, standard errors)
+li_OSCILLATING_GROUP = [([0.0258, -0.0183, 0.0219, -0.0016, 0.0167, -0.2584, 0.0261, -0.2057, -0.0282], 
+                         [0.014, 0.0404, 0.0302, 0.0287, 0.0316, 0.3022, 0.0365, 0.2031, 0.0072]),
+                        ([-0.1527, -0.0153, -0.1152, -0.0835, 0.1045, -0.0916, -0.0535, -0.0482, 0.017], 
+                         [0.2022, 0.3595, 0.0082, 0.2586, 0.4845, 0.1663, 0.1489, 0.0686, 0.0082])]
+
+# Group of which the restricted log-likelihood has a local maximum (~0.011) below the REML estimate (~0.199)
+BIMODAL_GROUP = ([0.8089, -0.3124, -0.4212], [0.4701, 0.0867, 0.011])
+
+
+def RestrictedLogLikelihood(y, v, tau_square):
+    w = 1/(v + tau_square)
+    mu = np.sum(w*y) / np.sum(w)
+
+    return -0.5 * (np.sum(np.log(v + tau_square)) + np.log(np.sum(w)) + np.sum(w * (y - mu)**2))
+
+
+def ReferenceREML(y, v):
+    """
+    Maximum of the restricted log-likelihood on a fine grid, refined by a bounded scalar minimization
+    """
+    grid = np.concatenate([[0], max(np.var(y), np.mean(v)) * np.geomspace(1e-8, 1e5, 2000)])
+    best = int(np.argmax([RestrictedLogLikelihood(y, v, tau_square) for tau_square in grid]))
+
+    if best == 0:
+        return 0.0
+
+    result = minimize_scalar(lambda tau_square: -RestrictedLogLikelihood(y, v, tau_square), 
+                             bounds=(grid[best - 1], grid[min(best + 1, len(grid) - 1)]), method='bounded', options={'xatol': 1e-12})
+
+    return result.x
+
+
+def ReferencePM(y, v):
+    """
+    Root of the generalized Q statistic Q(tau^2) = count - 1
+    """
+    def Score(tau_square):
+        w = 1/(v + tau_square)
+        return np.sum(w * (y - np.sum(w*y)/np.sum(w))**2) - (len(y) - 1)
+
+    if Score(0) <= 0:
+        return 0.0
+
+    high = max(np.var(y), 1e-8)
+
+    while Score(high) > 0:
+        high *= 2
+
+    return brentq(Score, 0, high, xtol=1e-14)
+
+
+def HeterogeneousGroups(n_group=600, seed=0):
+    """
+    Random groups of 2 ~ 11 studies with standard errors over two orders of magnitude - the groups with I_SQUARE >= 50 are random
+    """
+    rng = np.random.default_rng(seed)
+    li_group_id, li_beta, li_beta_se = [], [], []
+
+    for group in range(n_group):
+        count = rng.integers(2, 12)
+        beta_se = np.exp(rng.uniform(np.log(0.005), np.log(0.5), count))
+        tau_square = rng.choice([0, 0.001, 0.01, 0.1])
+        li_group_id += [group] * count
+        li_beta += list(rng.normal(0, np.sqrt(beta_se**2 + tau_square)))
+        li_beta_se += list(beta_se)
+
+    group_id, beta, beta_se = np.array(li_group_id), np.array(li_beta), np.array(li_beta_se)
+    dict_stat = CalculateGroupStatistics(group_id, beta, beta_se, np.full(len(beta), 0.5), n_group)
+    random = dict_stat['I_SQUARE_PROCESSED'].copy()
+    random[random] = dict_stat['I_SQUARE'][random] >= 50
+    tau_square_dl = CalculateTauSquareDL(dict_stat['SUM_W'], dict_stat['SUM_W_SQUARE'], dict_stat['Q'], dict_stat['COUNT'], random)
+
+    return group_id, beta, beta_se, random, tau_square_dl
+
+
+def AssertMatchesReference(method, y, beta_se, tau_square):
+    y, v = np.asarray(y), np.asarray(beta_se)**2
+    scale = max(np.mean(v), tau_square)
+
+    if method == 'REML':
+        tau_square_ref = ReferenceREML(y, v)
+        assert RestrictedLogLikelihood(y, v, tau_square) >= RestrictedLogLikelihood(y, v, tau_square_ref) - 1e-5
+        assert abs(tau_square - tau_square_ref) <= 1e-2 * scale
+
+    else:
+        assert abs(tau_square - ReferencePM(y, v)) <= 1e-4 * scale
+
+
+@pytest.mark.parametrize('method', ['REML', 'PM'])
+@pytest.mark.parametrize('start', ['DL', 'zero'])
+def test_tau_square_matches_reference_solver(method, start):
+    group_id, beta, beta_se, random, tau_square_dl = HeterogeneousGroups()
+    tau_square, converged, _ = CalculateTauSquareIterative(group_id, beta, beta_se, random, method=method, 
+                                                           tau_square_init=tau_square_dl if start == 'DL' else None)
+
+    assert random.sum() > 200
+    assert converged[random].all()
+    assert np.isnan(tau_square[~random]).all()
+
+    for group in np.flatnonzero(random):
+        row = group_id == group
+        AssertMatchesReference(method, beta[row], beta_se[row], tau_square[group])
+
+
+@pytest.mark.parametrize('method', ['REML', 'PM'])
+@pytest.mark.parametrize('group', li_OSCILLATING_GROUP + [BIMODAL_GROUP])
+def test_tau_square_of_oscillating_and_bimodal_groups(method, group):
+    y, beta_se = np.array(group[0]), np.array(group[1])
+
+    for tau_square_init in [None, np.array([0.0]), np.array([1.0])]:
+        tau_square, converged, _ = CalculateTauSquareIterative(np.zeros(len(y), dtype='int64'), y, beta_se, np.array([True]), 
+                                                               method=method, tau_square_init=tau_square_init)
+
+        assert converged[0]
+        AssertMatchesReference(method, y, beta_se, tau_square[0])